@@ -1,11 +1,10 @@
 # scripts/2_run_analysis_and_export.py
 
 import sys, os, pandas as pd, configparser
-from sqlalchemy import text
 
 # --- Setup Paths and Imports ---
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from src.database.utils import get_db_engine
+from src.database.utils import get_db_engine, read_master_table, update_customer_segments
 from src.analysis.segmentation import perform_rfm_segmentation
 from src.analysis.elasticity import calculate_elasticity_and_model
 
@@ -27,7 +26,7 @@ def main():
         
     try:
         print("Reading data from 'master_table'...")
-        df = pd.read_sql('SELECT * FROM master_table', engine)
+        df = read_master_table(engine)
         if df.empty: print("❌ Master table is empty. Run ETL script first."); return
 
         # --- 1. Run Segmentation & UPDATE Database (CRITICAL STEP) ---
@@ -39,20 +38,8 @@ def main():
         df = pd.merge(df, segments_df, on='customer_unique_id', how='left')
         
         print("Updating database with new segment labels...")
-        # We need to save the segmented data to the database so our next script can use it
-        df.to_sql('temp_master_with_segments', engine, if_exists='replace', index=False)
-        with engine.connect() as conn:
-            with conn.begin() as transaction:
-                conn.execute(text(
-                    """
-                    UPDATE master_table AS m
-                    JOIN temp_master_with_segments AS t
-                    ON m.order_id = t.order_id AND m.order_item_id = t.order_item_id
-                    SET m.customer_segment = t.customer_segment;
-                    """
-                ))
-                conn.execute(text("DROP TABLE temp_master_with_segments;"))
-                transaction.commit()
+        # Only the (customer, segment) pairs are sent to the database and joined per customer
+        update_customer_segments(engine, segments_df)
         print("✅ Database successfully updated with segment data.")
 
 
@@ -1,9 +1,15 @@
 # scripts/3_create_parquet_export.py
 
-import sys, os, pandas as pd
+import sys, os, configparser, pandas as pd
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from src.database.utils import get_db_engine
+from src.database.utils import get_db_engine, read_master_table
+from src.data_processing.loader import enforce_master_schema
+from src.data_processing.partitions import write_partitioned_dataset
+from src.analysis.product_elasticity import calculate_product_elasticities
+from src.analysis.price_recommendations import build_price_recommendations
+from src.analysis.geography import build_geo_hierarchy
+from src.analysis.sampling import build_stratified_sample
 
 def main():
     """
@@ -11,6 +17,9 @@ def main():
     and saves it to a single, efficient Parquet file for the Streamlit app.
     """
     print("--- Starting export to Parquet process ---")
+    config = configparser.ConfigParser()
+    config.read('config/config.ini')
+    sample_fraction = config.getfloat('pipeline', 'sample_fraction', fallback=0.05)
 
     # Connect to your LOCAL MySQL database
     engine = get_db_engine()
@@ -21,7 +30,7 @@ def main():
     # Read the entire table, which should already be segmented.
     print("Reading data from 'master_table'...")
     try:
-        df = pd.read_sql('SELECT * FROM master_table', engine)
+        df = read_master_table(engine)
     except Exception as e:
         print(f"❌ Failed to read from master_table: {e}")
         return
@@ -31,16 +40,52 @@ def main():
     if df.empty or 'customer_segment' not in df.columns or df['customer_segment'].isnull().all():
         print("❌ Data is incomplete. Please run scripts 1 and 2 pointed at your LOCAL database first.")
         return
+    unsegmented = df['customer_segment'].isnull().sum()
+    if unsegmented:
+        print(f"⚠️ {unsegmented:,} rows have no customer segment yet (loaded after the last run of script 2 "
+              "or refresh_rfm_segments.py). They are exported without one and show as 'Unknown' in the app.")
         
     # Define the output path
     output_dir = "streamlit_app/data" # We'll create a new data folder inside the app
     os.makedirs(output_dir, exist_ok=True)
     output_path = os.path.join(output_dir, "master_data.parquet")
     
-    # Save to Parquet
+    # Save to Parquet with the same schema as the database-free pipeline export
+    df = enforce_master_schema(df)
     df.to_parquet(output_path, index=False)
     
     print(f"\n✅ Successfully exported {len(df)} rows to {output_path}")
+
+    # Monthly partitions + manifest: a running app loads only the months that changed
+    partitions_dir = os.path.join(output_dir, "master_partitions")
+    changes = write_partitioned_dataset(df, partitions_dir)
+    print(f"✅ Updated {partitions_dir}: {len(changes['added'])} month(s) added, "
+          f"{len(changes['changed'])} changed, {len(changes['removed'])} removed")
+
+    # Stratified sample (category x month) behind the app's approximate mode
+    sample = build_stratified_sample(df, fraction=sample_fraction)
+    sample_path = os.path.join(output_dir, "master_sample.parquet")
+    sample.to_parquet(sample_path, index=False)
+    print(f"✅ Exported a {len(sample)}-row stratified sample to {sample_path}")
+
+    # Product-level elasticity table used by the Price Optimization Lab
+    product_table = calculate_product_elasticities(df)
+    product_table_path = os.path.join(output_dir, "product_elasticity.parquet")
+    product_table.to_parquet(product_table_path, index=False)
+    print(f"✅ Exported elasticities for {len(product_table)} products to {product_table_path}")
+
+    # Category and product price recommendations served by scripts/run_pricing_service.py
+    recommendations = build_price_recommendations(df, product_table)
+    recommendations_path = os.path.join(output_dir, "price_recommendations.parquet")
+    recommendations.to_parquet(recommendations_path + ".tmp", index=False)
+    os.replace(recommendations_path + ".tmp", recommendations_path)
+    print(f"✅ Exported {len(recommendations)} price recommendations to {recommendations_path}")
+
+    # Pre-aggregated state -> city -> zip prefix hierarchy for the Geographic Insights page
+    geo_hierarchy = build_geo_hierarchy(df)
+    geo_hierarchy_path = os.path.join(output_dir, "geo_hierarchy.parquet")
+    geo_hierarchy.to_parquet(geo_hierarchy_path, index=False)
+    print(f"✅ Exported {len(geo_hierarchy)} geographic nodes to {geo_hierarchy_path}")
     print("--- The app is now ready to run in self-contained mode. ---")
 
 
@@ -0,0 +1,74 @@
+# scripts/benchmark_parallel_analysis.py
+
+import sys, os, argparse, time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.data_processing.loader import load_app_data
+from src.analysis.parallel import ParallelAnalysisRunner
+from src.analysis.elasticity import calculate_elasticity_and_model
+from src.analysis.cross_elasticity import calculate_cross_price_elasticity
+
+# Columns read by the own-price and cross-price elasticity functions
+ELASTICITY_COLUMNS = ['product_category_name_english', 'order_purchase_timestamp', 'price', 'order_item_id']
+
+def process_pss_kb():
+    """Proportional set size of this process in kB (shared pages split between their users). Linux only."""
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            return next(int(line.split()[1]) for line in f if line.startswith('Pss:'))
+    except (OSError, StopIteration):
+        return None
+
+def own_price_task(df, product_category):
+    elasticity, _ = calculate_elasticity_and_model(df, product_category=product_category)
+    return elasticity, os.getpid(), process_pss_kb()
+
+def cross_price_task(df, demand_category, price_category):
+    elasticity = calculate_cross_price_elasticity(df, demand_category=demand_category, price_category=price_category)
+    return elasticity, os.getpid(), process_pss_kb()
+
+def main():
+    """
+    Times the per-category own-price elasticities and the cross-price elasticities of the top
+    categories for several worker counts, and reports the workers' combined memory (PSS, so
+    the shared dataframe is counted once). Run from the project root.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the shared-memory parallel analysis runner.")
+    parser.add_argument('--data', default='streamlit_app/data/master_data.parquet', help="App Parquet export to analyze.")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count()], help="Worker counts to compare.")
+    parser.add_argument('--top-pairs', type=int, default=15, help="Cross elasticities for every pair of the top N categories.")
+    args = parser.parse_args()
+
+    df = load_app_data(args.data)
+    categories = df['product_category_name_english'].value_counts().index.tolist()
+    top = categories[:args.top_pairs]
+    pairs = [(a, b) for a in top for b in top if a != b]
+    print(f"--- {len(df):,} rows: {len(categories)} own-price fits and {len(pairs)} cross-price fits per run ---")
+    own_price_task(df, categories[0])  # warm-up: imports statsmodels before anything is timed
+    print(f"{'Workers':>7} {'Seconds':>9} {'Speed-up':>9} {'Worker PSS (MB)':>16}")
+
+    baseline, reference = None, None
+    for workers in sorted(set(args.workers)):
+        start = time.perf_counter()
+        with ParallelAnalysisRunner(df, columns=ELASTICITY_COLUMNS, max_workers=workers) as runner:
+            own = runner.map_categories(own_price_task, categories)
+            cross = runner.map_category_pairs(cross_price_task, pairs)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+
+        results = list(own.values()) + list(cross.values())
+        peak_pss = {}
+        for _, pid, pss in results:
+            peak_pss[pid] = max(peak_pss.get(pid, 0), pss or 0)
+        memory = f"{sum(peak_pss.values()) / 1024:,.0f}" if workers > 1 and all(peak_pss.values()) else '-'
+        print(f"{workers:>7} {elapsed:>9.2f} {baseline / elapsed:>8.2f}x {memory:>16}")
+
+        scores = [r[0] for r in results]
+        if reference is None:
+            reference = scores
+        elif scores != reference:
+            print("⚠️ Results differ from the first run.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# scripts/benchmark_startup.py
+
+import sys, os, ast, glob, json, argparse, subprocess, statistics
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+APP_DIR = os.path.join(PROJECT_ROOT, 'streamlit_app')
+
+# Modules whose import cost dominates a cold start; reported when a page loads them up front
+HEAVY_MODULES = ['prophet', 'statsmodels', 'sklearn', 'scipy', 'plotly', 'pyarrow', 'sqlalchemy']
+
+# Runs in a fresh interpreter: executes only the page's top-level import statements
+IMPORT_PROBE = """
+import sys, time, json
+sys.path.insert(0, {root!r})
+code = compile({source!r}, {path!r}, 'exec')
+start = time.perf_counter()
+exec(code, {{'__name__': '__benchmark__', '__file__': {path!r}}})
+elapsed = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{'seconds': elapsed, 'heavy': heavy}}))
+"""
+
+# Runs in a fresh interpreter: executes the whole page once with Streamlit's headless test runner
+RENDER_PROBE = """
+import sys, time, json
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({path!r}, default_timeout={timeout}).run()
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'exceptions': len(at.exception)}}))
+"""
+
+def extract_top_level_imports(path):
+    """
+    Returns the source of a script's import header: the import statements before its first
+    other statement (sys.path setup lines are skipped). Deferred imports further down the
+    page are not included, since they are paid for later (or never) rather than at start-up.
+    """
+    with open(path, encoding='utf-8') as f:
+        source = f.read()
+    imports = []
+    for node in ast.parse(source).body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            imports.append(ast.get_source_segment(source, node))
+        elif not (isinstance(node, ast.Expr) and 'sys.path' in ast.get_source_segment(source, node)):
+            break
+    return '\n'.join(imports)
+
+def run_probe(code, workdir):
+    """Runs a probe in a new Python process and returns its JSON result."""
+    result = subprocess.run([sys.executable, '-c', code], cwd=workdir, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'probe failed')
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def benchmark_script(path, workdir, repeat, timeout):
+    """Measures cold import time and time to first render of one Streamlit script."""
+    import_code = IMPORT_PROBE.format(root=PROJECT_ROOT, source=extract_top_level_imports(path),
+                                      path=path, heavy=HEAVY_MODULES)
+    render_code = RENDER_PROBE.format(root=PROJECT_ROOT, path=path, timeout=timeout)
+
+    import_times, render_times, heavy, exceptions = [], [], [], 0
+    for _ in range(repeat):
+        probe = run_probe(import_code, workdir)
+        import_times.append(probe['seconds'])
+        heavy = probe['heavy']
+        probe = run_probe(render_code, workdir)
+        render_times.append(probe['seconds'])
+        exceptions = max(exceptions, probe['exceptions'])
+
+    return {
+        'import_s': statistics.median(import_times),
+        'render_s': statistics.median(render_times),
+        'heavy': heavy,
+        'exceptions': exceptions
+    }
+
+def main():
+    """
+    Benchmarks the cold start of App.py and every page: the time to run each script's top-level
+    imports and the time to its first complete render, each measured in a fresh interpreter.
+    Run from the project root (the pages read data and assets relative to it).
+    """
+    parser = argparse.ArgumentParser(description="Measure Streamlit cold-start time per page.")
+    parser.add_argument('--repeat', type=int, default=3, help="Fresh-process runs per page (the median is reported).")
+    parser.add_argument('--page', action='append', dest='pages', help="Only benchmark pages whose file name contains this text.")
+    parser.add_argument('--timeout', type=int, default=300, help="Render timeout per page, in seconds.")
+    args = parser.parse_args()
+
+    scripts = [os.path.join(APP_DIR, 'App.py')] + sorted(glob.glob(os.path.join(APP_DIR, 'pages', '*.py')))
+    if args.pages:
+        scripts = [s for s in scripts if any(p in os.path.basename(s) for p in args.pages)]
+
+    print(f"--- Benchmarking Streamlit start-up ({args.repeat} run(s) per page) ---")
+    print(f"{'Script':<36} {'Imports (s)':>12} {'First render (s)':>17}  Heavy modules at import")
+    for path in scripts:
+        name = os.path.basename(path)
+        try:
+            stats = benchmark_script(path, os.getcwd(), args.repeat, args.timeout)
+        except RuntimeError as e:
+            print(f"{name:<36} ❌ {e}")
+            continue
+        note = ' ⚠️ page raised an exception' if stats['exceptions'] else ''
+        print(f"{name:<36} {stats['import_s']:>12.2f} {stats['render_s']:>17.2f}  {', '.join(stats['heavy']) or '-'}{note}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# scripts/load_test_pricing_service.py
+
+import sys, argparse, json, random, statistics, threading, time
+import http.client
+from urllib.parse import quote
+import pandas as pd
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else float('nan')
+
+def build_requests(table_path, n, batch_size, seed=42):
+    """Random mix of recommendation, what-if and batch requests over ids taken from the served table."""
+    table = pd.read_parquet(table_path, columns=['level', 'product_category_name_english', 'product_id', 'avg_price'])
+    products = table[table['level'] == 'product']
+    categories = table.loc[table['level'] == 'category', 'product_category_name_english'].tolist()
+    rng = random.Random(seed)
+
+    def random_item():
+        row = products.iloc[rng.randrange(len(products))]
+        return {'product_id': row['product_id'], 'category': row['product_category_name_english'],
+                'price': round(row['avg_price'] * rng.uniform(0.7, 1.3), 2)}
+
+    requests = []
+    for _ in range(n):
+        kind = rng.random()
+        if kind < 0.45:
+            item = random_item()
+            requests.append(('GET', f"/v1/recommendation?product_id={quote(item['product_id'])}", None))
+        elif kind < 0.5:
+            requests.append(('GET', f"/v1/recommendation?category={quote(rng.choice(categories))}", None))
+        elif kind < 0.95:
+            item = random_item()
+            requests.append(('GET', f"/v1/predict?product_id={quote(item['product_id'])}&price={item['price']}", None))
+        else:
+            body = json.dumps({'items': [random_item() for _ in range(batch_size)]})
+            requests.append(('POST', '/v1/batch', body))
+    return requests
+
+def worker(host, port, requests, deadline, latencies, errors):
+    # One keep-alive connection per client thread
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    i = 0
+    while time.perf_counter() < deadline:
+        method, path, body = requests[i % len(requests)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, body=body, headers={'Content-Type': 'application/json'} if body else {})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=10)
+            continue
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+
+def main():
+    """
+    Load-tests a running pricing service (scripts/run_pricing_service.py) with concurrent
+    keep-alive clients and reports throughput and latency percentiles.
+    """
+    parser = argparse.ArgumentParser(description="Load-test the pricing recommendation service.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--table', default='streamlit_app/data/price_recommendations.parquet',
+                        help="The table the service is serving (used to pick realistic ids).")
+    parser.add_argument('--clients', type=int, default=8, help="Concurrent client connections.")
+    parser.add_argument('--duration', type=float, default=10.0, help="Test duration in seconds.")
+    parser.add_argument('--batch-size', type=int, default=50, help="Items per /v1/batch request.")
+    args = parser.parse_args()
+
+    try:
+        conn = http.client.HTTPConnection(args.host, args.port, timeout=5)
+        conn.request('GET', '/health')
+        health = json.loads(conn.getresponse().read())
+        conn.close()
+    except OSError as e:
+        print(f"❌ Could not reach the service at {args.host}:{args.port}: {e}")
+        sys.exit(1)
+    print(f"--- Load testing {args.host}:{args.port} ({health['products']:,} products) "
+          f"with {args.clients} clients for {args.duration:.0f}s ---")
+
+    requests = build_requests(args.table, 5000, args.batch_size)
+    latencies, errors = [], []
+    deadline = time.perf_counter() + args.duration
+    threads = [threading.Thread(target=worker, args=(args.host, args.port, requests[i::args.clients], deadline, latencies, errors))
+               for i in range(args.clients)]
+    started = time.perf_counter()
+    for t in threads: t.start()
+    for t in threads: t.join()
+    elapsed = time.perf_counter() - started
+
+    print(f"Requests:   {len(latencies):,} ok, {len(errors):,} errors")
+    print(f"Throughput: {len(latencies) / elapsed:,.0f} requests/s")
+    if latencies:
+        print(f"Latency:    mean {statistics.mean(latencies) * 1000:.2f} ms, p50 {percentile(latencies, 0.5) * 1000:.2f} ms, "
+              f"p95 {percentile(latencies, 0.95) * 1000:.2f} ms, p99 {percentile(latencies, 0.99) * 1000:.2f} ms")
+    if errors:
+        print(f"⚠️ Error breakdown: {pd.Series(errors).value_counts().to_dict()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# scripts/refresh_rfm_segments.py
+
+import sys, os, argparse, configparser, pandas as pd
+
+# --- Setup Paths and Imports ---
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.database.utils import get_db_engine, read_master_table, update_customer_segments
+from src.analysis.rfm_store import RFMStateStore
+
+RFM_COLUMNS = ['customer_unique_id', 'order_id', 'order_item_id', 'price', 'order_purchase_timestamp']
+
+def main():
+    """
+    Refreshes customer segment labels from the orders added since the last run.
+    Orders are re-read from `rfm_lookback_days` before the newest counted purchase, so late-arriving
+    orders are picked up; items already counted are skipped by the store.
+    Only new or changed customers are re-assigned, using the persisted scaler and centroids.
+    Run with --full-refit (e.g. nightly) to rebuild the RFM state and refit K-Means.
+    """
+    parser = argparse.ArgumentParser(description="Incrementally refresh RFM customer segments.")
+    parser.add_argument('--full-refit', action='store_true', help="Rebuild the state from all orders and refit K-Means.")
+    parser.add_argument('--num-clusters', type=int, default=4, help="Number of segments for a full refit.")
+    args = parser.parse_args()
+
+    config = configparser.ConfigParser()
+    config.read('config/config.ini')
+    store_dir = config.get('pipeline', 'rfm_store_dir', fallback='data/rfm_state')
+    lookback_days = config.getint('pipeline', 'rfm_lookback_days', fallback=7)
+
+    print("--- Starting RFM Segment Refresh ---")
+    engine = get_db_engine()
+    if not engine: print("❌ DB engine creation failed."); return
+
+    try:
+        if args.full_refit or not RFMStateStore.exists(store_dir):
+            print("Rebuilding RFM state from the full order history...")
+            df = read_master_table(engine, columns=RFM_COLUMNS)
+            if df.empty: print("❌ Master table is empty. Run ETL script first."); return
+            store = RFMStateStore.rebuild(store_dir, df, num_clusters=args.num_clusters)
+            segments_df = store.customers[['customer_segment']].reset_index()
+        else:
+            store = RFMStateStore.load(store_dir)
+            since = store.watermark - pd.Timedelta(days=lookback_days)
+            print(f"Reading orders placed since {since} ({lookback_days} days before the newest counted order)...")
+            new_orders = read_master_table(
+                engine, columns=RFM_COLUMNS, where='order_purchase_timestamp >= :since',
+                params={'since': since.to_pydatetime()}
+            )
+            changed = store.update(new_orders)
+            if changed.empty:
+                print("✅ No new orders since the last run. Segments are up to date.")
+                return
+            segments_df = store.assign_segments(changed)
+
+        print(f"Updating segment labels for {len(segments_df):,} customers...")
+        update_customer_segments(engine, segments_df)
+        store.save()
+        print("✅ Segment refresh completed successfully!")
+
+    except Exception as e:
+        print(f"❌ An error occurred during the segment refresh: {e}")
+    finally:
+        engine.dispose()
+        print("--- Process finished. ---")
+
+
+if __name__ == "__main__":
+    main()
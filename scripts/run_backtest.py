@@ -0,0 +1,83 @@
+# scripts/run_backtest.py
+
+import sys, os, argparse, configparser, logging, time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.data_processing.loader import load_app_data
+from src.data_processing.partitions import IncrementalDataset, read_manifest
+from src.analysis.forecasting import aggregate_daily_sales
+from src.analysis.backtesting import BACKENDS, run_backtest, summarize_backtest, select_backends
+
+def load_daily_sales(data_path, partitions_dir):
+    """Daily revenue per category: the rollup of the partitioned app dataset if it exists, else aggregated from the export."""
+    if read_manifest(partitions_dir) is not None:
+        dataset = IncrementalDataset(partitions_dir, rollups={'daily_sales': aggregate_daily_sales})
+        dataset.refresh()
+        return dataset.rollups['daily_sales']
+    return aggregate_daily_sales(load_app_data(data_path))
+
+def main():
+    """
+    Rolling-origin backtest of the forecasting backends for every category. Writes the accuracy
+    per backend, category and horizon (MAPE, sMAPE, interval coverage, fit time) and the best
+    backend per category and horizon to the exports folder. Run from the project root.
+    """
+    parser = argparse.ArgumentParser(description="Backtest the demand forecasting backends.")
+    parser.add_argument('--backends', nargs='+', default=['seasonal_naive', 'global', 'prophet'], choices=sorted(BACKENDS),
+                        help="Backends to compare.")
+    parser.add_argument('--horizon', type=int, default=90, help="Days forecast from each cutoff.")
+    parser.add_argument('--horizons', type=int, nargs='+', default=[7, 30, 90],
+                        help="Report accuracy over the first N forecast days, for each N.")
+    parser.add_argument('--period', type=int, default=None, help="Days between cutoffs (default: half the horizon).")
+    parser.add_argument('--initial', type=int, default=None, help="Minimum training days (default: three horizons).")
+    parser.add_argument('--max-cutoffs', type=int, default=None, help="Only backtest the most recent N cutoffs.")
+    parser.add_argument('--top-n', type=int, default=None, help="Only the N categories with the highest revenue (plus 'all').")
+    parser.add_argument('--metric', default='smape', choices=['mape', 'smape'], help="Metric used to pick the best backend.")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: analysis_workers in [pipeline]).")
+    args = parser.parse_args()
+
+    config = configparser.ConfigParser()
+    config.read('config/config.ini')
+    data_path = config.get('pipeline', 'app_data_path', fallback='streamlit_app/data/master_data.parquet')
+    partitions_dir = os.path.join(os.path.dirname(data_path), 'master_partitions')
+    export_path = config.get('data_paths', 'tableau_exports_dir', fallback='data/exports_for_tableau')
+    workers = args.workers or config.getint('pipeline', 'analysis_workers', fallback=1)
+    if 'prophet' in args.backends:
+        # Prophet logs every fit (and its short-history warning); with hundreds of fits that buries
+        # the report. Its loggers configure themselves on first use, so set them up before quieting them.
+        import prophet  # noqa: F401
+        from cmdstanpy.utils import get_logger
+        get_logger().setLevel(logging.WARNING)
+        logging.getLogger('prophet').setLevel(logging.ERROR)
+
+    print("--- Starting forecast backtest ---")
+    daily_sales = load_daily_sales(data_path, partitions_dir)
+    categories = None
+    if args.top_n:
+        totals = daily_sales.groupby('product_category_name_english')['y'].sum()
+        categories = ['all'] + totals.nlargest(args.top_n).index.tolist()
+
+    start = time.perf_counter()
+    forecasts = run_backtest(daily_sales, backends=args.backends, categories=categories, horizon=args.horizon,
+                             initial_days=args.initial, period_days=args.period, max_cutoffs=args.max_cutoffs,
+                             max_workers=workers)
+    if forecasts.empty:
+        print("❌ No backtest results: the data is too short for the requested horizon.")
+        return
+    print(f"✅ Backtest finished in {time.perf_counter() - start:.1f}s with {workers} worker(s).")
+
+    summary = summarize_backtest(forecasts, horizons=[h for h in args.horizons if h <= args.horizon])
+    best = select_backends(summary, metric=args.metric)
+    os.makedirs(export_path, exist_ok=True)
+    summary.to_csv(os.path.join(export_path, 'backtest_summary.csv'), index=False)
+    best.to_csv(os.path.join(export_path, 'backtest_best_backends.csv'), index=False)
+
+    print("\nMean accuracy across categories:")
+    print(summary.groupby(['horizon', 'backend'])[['mape', 'smape', 'coverage', 'fit_seconds']].mean().round(3).to_string())
+    print(f"\nBest backend per category (by {args.metric}):")
+    print(best.groupby(['horizon', 'backend']).size().rename('categories').to_string())
+    print(f"\n✅ Wrote backtest_summary.csv and backtest_best_backends.csv to {export_path}")
+
+
+if __name__ == "__main__":
+    main()
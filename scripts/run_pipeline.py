@@ -0,0 +1,40 @@
+# scripts/run_pipeline.py
+
+import sys, os, argparse, configparser
+
+# --- Setup Paths and Imports ---
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.pipeline.stages import build_pipeline
+
+def main():
+    """
+    Single entry point for the whole data pipeline (replaces running scripts 1-3 by hand).
+    Stages whose inputs are unchanged since the last run are skipped, and independent
+    stages (MySQL load, Tableau exports, Parquet export, forecasts) run in parallel.
+    """
+    parser = argparse.ArgumentParser(description="Run the dynamic pricing data pipeline.")
+    parser.add_argument('--force', action='store_true', help="Re-run every stage even if its inputs are unchanged.")
+    parser.add_argument('--no-db', action='store_true', help="Skip the MySQL stage; run entirely in memory from the raw CSVs.")
+    parser.add_argument('--target', action='append', dest='targets',
+                        help="Only run this stage and its upstream stages (repeatable), e.g. --target parquet_export.")
+    args = parser.parse_args()
+
+    config = configparser.ConfigParser()
+    config.read('config/config.ini')
+
+    print("--- Starting Pipeline ---")
+    pipeline = build_pipeline(config, use_database=not args.no_db)
+    status = pipeline.run(force=args.force, targets=args.targets)
+
+    print("\n--- Pipeline Summary ---")
+    for name, outcome in status.items():
+        print(f"  {name:<20} {outcome}")
+
+    if any(outcome in ('failed', 'blocked') for outcome in status.values()):
+        print("❌ Pipeline finished with errors.")
+        sys.exit(1)
+    print("✅ Pipeline finished successfully!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# scripts/run_pricing_service.py
+
+import sys, os, argparse, configparser
+
+# --- Setup Paths and Imports ---
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.serving.pricing_service import PricingServer
+
+def main():
+    """
+    Serves elasticities, recommended prices and what-if demand predictions over HTTP from the
+    precomputed price_recommendations.parquet (written by run_pipeline.py or script 3).
+    The table is reloaded automatically when a new export replaces it.
+    """
+    config = configparser.ConfigParser()
+    config.read('config/config.ini')
+
+    parser = argparse.ArgumentParser(description="Run the pricing recommendation HTTP service.")
+    parser.add_argument('--host', default=config.get('serving', 'host', fallback='127.0.0.1'))
+    parser.add_argument('--port', type=int, default=config.getint('serving', 'port', fallback=8080))
+    parser.add_argument('--table', default=config.get('serving', 'table_path', fallback='streamlit_app/data/price_recommendations.parquet'),
+                        help="Price recommendations Parquet file to serve.")
+    parser.add_argument('--reload-interval', type=float, default=config.getfloat('serving', 'reload_interval', fallback=5.0),
+                        help="Seconds between checks for a new table (0 disables hot reload).")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.table):
+        print(f"❌ {args.table} not found. Run scripts/run_pipeline.py or scripts/3_create_parquet_export.py first.")
+        sys.exit(1)
+
+    server = PricingServer((args.host, args.port), args.table, reload_interval=args.reload_interval)
+    print(f"✅ Loaded {len(server.index.products):,} products and {len(server.index.categories):,} categories.")
+    print(f"--- Pricing service listening on http://{args.host}:{args.port} (Ctrl+C to stop) ---")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print("--- Pricing service stopped. ---")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+# src/analysis/backtesting.py
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.forecasting import generate_global_forecast
+from src.analysis.parallel import ParallelAnalysisRunner
+
+CATEGORY = 'product_category_name_english'
+FORECAST_COLUMNS = ['ds', 'yhat', 'yhat_lower', 'yhat_upper']
+
+# ========================= BACKENDS =========================
+# A backend forecasts the `horizon` days after the end of a history of daily revenue.
+# Per-series backends take one series ('ds', 'y', complete daily) and return FORECAST_COLUMNS.
+# Pooled backends (marked pooled = True) fit every category at once: they take the history of
+# all categories (the columns of aggregate_daily_sales()) and the minimum history a category
+# needs, and return 'product_category' plus FORECAST_COLUMNS, with an 'all' series for the total.
+
+def prophet_backend(history: pd.DataFrame, horizon: int, interval_width: float = 0.95):
+    """Prophet, with the settings of generate_forecast()."""
+    from prophet import Prophet
+
+    model = Prophet(yearly_seasonality=True, weekly_seasonality=True, daily_seasonality=False, interval_width=interval_width)
+    model.fit(history)
+    future = model.make_future_dataframe(periods=horizon, freq='D', include_history=False)
+    return model.predict(future)[FORECAST_COLUMNS]
+
+def seasonal_naive_backend(history: pd.DataFrame, horizon: int, interval_width: float = 0.95, season: int = 7):
+    """
+    Repeats the last `season` days. The interval comes from the spread of the in-sample seasonal
+    differences, widened with the number of seasons ahead. A baseline the other backends should beat.
+    """
+    from statistics import NormalDist
+
+    y = history['y'].to_numpy(dtype=np.float64)
+    steps = np.arange(horizon)
+    yhat = y[-season:][steps % season] if len(y) >= season else np.full(horizon, y.mean())
+    residuals = y[season:] - y[:-season]
+    sigma = residuals.std(ddof=1) if len(residuals) > 1 else 0.0
+    half_width = NormalDist().inv_cdf(0.5 + interval_width / 2) * sigma * np.sqrt(steps // season + 1)
+    return pd.DataFrame({
+        'ds': pd.date_range(history['ds'].iloc[-1] + pd.Timedelta(days=1), periods=horizon, freq='D'),
+        'yhat': yhat, 'yhat_lower': np.clip(yhat - half_width, 0, None), 'yhat_upper': yhat + half_width
+    })
+
+def global_backend(history: pd.DataFrame, horizon: int, interval_width: float = 0.95, min_history_days: int = 14):
+    """generate_global_forecast(): one reconciled fit for every category and 'all'."""
+    forecast = generate_global_forecast(None, periods=horizon, min_history_days=min_history_days,
+                                        interval_width=interval_width, daily_sales=history)
+    return forecast[forecast['y'].isna()].drop(columns='y')
+
+global_backend.pooled = True
+
+BACKENDS = {
+    'prophet': prophet_backend,
+    'global': global_backend,
+    'seasonal_naive': seasonal_naive_backend
+}
+
+# ========================= SERIES AND CUTOFFS =========================
+
+def prepare_daily_series(daily_sales: pd.DataFrame):
+    """
+    Completes the output of aggregate_daily_sales() for backtesting: every category gets a row
+    per day (zero revenue on days without sales) from its first sale to the last recorded day,
+    and an 'all' series holds the daily total.
+
+    Returns:
+        pd.DataFrame: CATEGORY, 'ds' and 'y', sorted by category and date.
+    """
+    daily = daily_sales.pivot_table(index='ds', columns=CATEGORY, values='y', aggfunc='sum')
+    daily = daily.reindex(pd.date_range(daily.index.min(), daily.index.max(), freq='D'))
+    started = daily.notna().cummax()
+    daily = daily.fillna(0.0).where(started)
+    daily.insert(0, 'all', daily.sum(axis=1))
+    daily.index.name, daily.columns.name = 'ds', CATEGORY
+    series = daily.stack().dropna().rename('y').reset_index()
+    series[CATEGORY] = series[CATEGORY].astype(str)
+    return series[[CATEGORY, 'ds', 'y']].sort_values([CATEGORY, 'ds'], kind='stable').reset_index(drop=True)
+
+def rolling_origin_cutoffs(start, end, horizon: int, initial_days: int = None, period_days: int = None,
+                           max_cutoffs: int = None):
+    """
+    Forecast origins for a rolling-origin backtest, as in Prophet's cross_validation(): the last
+    cutoff leaves `horizon` days of data after it, earlier ones step back by `period_days`, and the
+    first leaves at least `initial_days` of history before it.
+
+    Args:
+        start, end (pd.Timestamp): First and last recorded day.
+        horizon (int): Days forecast from each cutoff.
+        initial_days (int): Minimum training days. Defaults to three horizons.
+        period_days (int): Days between cutoffs. Defaults to half a horizon.
+        max_cutoffs (int): Keep only the most recent cutoffs.
+
+    Returns:
+        list: Cutoff dates, oldest first. Empty if the data is too short.
+    """
+    initial_days = initial_days if initial_days is not None else 3 * horizon
+    period_days = period_days or max(horizon // 2, 1)
+    cutoffs = []
+    cutoff = pd.Timestamp(end) - pd.Timedelta(days=horizon)
+    while cutoff - pd.Timestamp(start) >= pd.Timedelta(days=initial_days - 1):
+        cutoffs.append(cutoff)
+        if max_cutoffs and len(cutoffs) >= max_cutoffs:
+            break
+        cutoff -= pd.Timedelta(days=period_days)
+    return cutoffs[::-1]
+
+# ========================= BACKTEST =========================
+
+def _backtest_task(series: pd.DataFrame, backend: str, categories: list, cutoff, horizon: int,
+                   interval_width: float, min_history_days: int):
+    """
+    Fits one backend at one cutoff, for one category (or every category, for a pooled backend),
+    and lines its forecast up with the recorded revenue of the following `horizon` days.
+    """
+    func = BACKENDS[backend]
+    pooled = getattr(func, 'pooled', False)
+    series = series[series['ds'] <= cutoff + pd.Timedelta(days=horizon)]
+    if not pooled:
+        series = series[series[CATEGORY] == categories[0]]
+    history = series[series['ds'] <= cutoff]
+    actual = series[series['ds'] > cutoff]
+
+    start = time.perf_counter()
+    if pooled:
+        # The pooled model builds 'all' itself, from the categories
+        forecast = func(history[history[CATEGORY] != 'all'], horizon, interval_width=interval_width,
+                        min_history_days=min_history_days)
+        forecast = forecast[forecast['product_category'].isin(categories)]
+    else:
+        category_history = history[['ds', 'y']]
+        if len(category_history) < min_history_days:
+            return pd.DataFrame()
+        forecast = func(category_history.reset_index(drop=True), horizon, interval_width=interval_width)
+        forecast = forecast.assign(product_category=categories[0])
+    fit_seconds = time.perf_counter() - start
+
+    forecast = forecast.merge(actual.rename(columns={CATEGORY: 'product_category'}), on=['product_category', 'ds'])
+    forecast['fit_seconds'] = fit_seconds / max(forecast['product_category'].nunique(), 1)
+    forecast['backend'] = backend
+    forecast['cutoff'] = cutoff
+    forecast['horizon_day'] = (forecast['ds'] - cutoff).dt.days
+    return forecast[['backend', 'product_category', 'cutoff', 'horizon_day', 'ds', 'y', 'yhat', 'yhat_lower',
+                     'yhat_upper', 'fit_seconds']]
+
+def run_backtest(daily_sales: pd.DataFrame, backends=('prophet',), categories=None, horizon: int = 90,
+                 initial_days: int = None, period_days: int = None, max_cutoffs: int = None,
+                 interval_width: float = 0.95, min_history_days: int = 60, max_workers: int = 1):
+    """
+    Rolling-origin backtest of forecasting backends on daily revenue per category.
+
+    Every (backend, cutoff, category) fit is an independent task; pooled backends fit all
+    categories in one task per cutoff. Tasks run on a process pool whose workers share one copy
+    of the daily series (see parallel.py), so the raw order items are never re-aggregated.
+
+    Args:
+        daily_sales (pd.DataFrame): Output of aggregate_daily_sales(), e.g. the app dataset's rollup.
+        backends (list): Names from BACKENDS.
+        categories (list): Series to evaluate ('all' is the total). Defaults to 'all' and every category.
+        horizon (int): Days forecast from each cutoff.
+        initial_days, period_days, max_cutoffs: See rolling_origin_cutoffs().
+        interval_width (float): Width of the backends' uncertainty intervals.
+        min_history_days (int): Days since its first sale a category needs before a cutoff to be
+            forecast from it, by every backend.
+        max_workers (int): Worker processes.
+
+    Returns:
+        pd.DataFrame: One row per backend, category, cutoff and forecast day, with the recorded
+                      revenue 'y', the forecast and its interval, and the fit time per category.
+    """
+    unknown = set(backends) - set(BACKENDS)
+    if unknown:
+        raise ValueError(f"Unknown forecasting backends: {sorted(unknown)}. Choose from {sorted(BACKENDS)}.")
+
+    series = prepare_daily_series(daily_sales)
+    if categories is None:
+        categories = series[CATEGORY].unique().tolist()
+    cutoffs = rolling_origin_cutoffs(series['ds'].min(), series['ds'].max(), horizon, initial_days=initial_days,
+                                     period_days=period_days, max_cutoffs=max_cutoffs)
+    if not cutoffs:
+        print("Warning: Not enough history for a single backtest cutoff.")
+        return pd.DataFrame()
+
+    common = {'horizon': horizon, 'interval_width': interval_width, 'min_history_days': min_history_days}
+    tasks = []
+    for backend in backends:
+        if getattr(BACKENDS[backend], 'pooled', False):
+            tasks += [dict(common, backend=backend, categories=list(categories), cutoff=cutoff) for cutoff in cutoffs]
+        else:
+            tasks += [dict(common, backend=backend, categories=[category], cutoff=cutoff)
+                      for category in categories for cutoff in cutoffs]
+    print(f"Backtesting {len(backends)} backend(s) over {len(cutoffs)} cutoffs and {len(categories)} series: "
+          f"{len(tasks)} fits.")
+
+    with ParallelAnalysisRunner(series, max_workers=max_workers) as runner:
+        results = runner.map(_backtest_task, tasks, chunksize=1)
+    results = [result for result in results if not result.empty]
+    return pd.concat(results, ignore_index=True) if results else pd.DataFrame()
+
+def summarize_backtest(forecasts: pd.DataFrame, horizons=(7, 30, 90)):
+    """
+    Accuracy of each backend and category over the first h forecast days, for each h in `horizons`.
+
+    Backends are compared on the same forecasts: only the (category, cutoff) pairs that every
+    backend in `forecasts` scored are kept. MAPE skips days without sales (their percentage error
+    is undefined); sMAPE counts a day where both the forecast and the revenue are zero as exact.
+    Both are in percent. Coverage is the share of recorded days inside the forecast interval.
+
+    Returns:
+        pd.DataFrame: 'backend', 'product_category', 'horizon', 'cutoffs', 'mape', 'smape',
+                      'coverage' and 'fit_seconds' (mean time of one fit).
+    """
+    pairs = forecasts.groupby(['product_category', 'cutoff'])['backend'].nunique()
+    shared = pairs[pairs == forecasts['backend'].nunique()].index
+    forecasts = forecasts[pd.MultiIndex.from_frame(forecasts[['product_category', 'cutoff']]).isin(shared)]
+
+    errors = (forecasts['y'] - forecasts['yhat']).abs()
+    scale = forecasts['y'].abs() + forecasts['yhat'].abs()
+    scored = forecasts.assign(
+        ape=100 * errors / forecasts['y'].abs().where(forecasts['y'] != 0),
+        sape=100 * (2 * errors / scale.where(scale > 0)).fillna(0.0),
+        covered=((forecasts['y'] >= forecasts['yhat_lower']) & (forecasts['y'] <= forecasts['yhat_upper'])).astype(np.float64)
+    )
+    keys = ['backend', 'product_category']
+    fit_seconds = forecasts.drop_duplicates(keys + ['cutoff']).groupby(keys)['fit_seconds'].mean()
+
+    summaries = []
+    for horizon in horizons:
+        window = scored[scored['horizon_day'] <= horizon]
+        summary = window.groupby(keys).agg(cutoffs=('cutoff', 'nunique'), mape=('ape', 'mean'),
+                                           smape=('sape', 'mean'), coverage=('covered', 'mean'))
+        summary.insert(0, 'horizon', horizon)
+        summaries.append(summary.join(fit_seconds))
+    return pd.concat(summaries).reset_index()
+
+def select_backends(summary: pd.DataFrame, metric: str = 'smape'):
+    """
+    The most accurate backend for each category and horizon.
+
+    Returns:
+        pd.DataFrame: The rows of summarize_backtest() with the lowest `metric` per category and horizon.
+    """
+    ranked = summary.dropna(subset=[metric]).sort_values(['product_category', 'horizon', metric])
+    return ranked.drop_duplicates(['product_category', 'horizon']).reset_index(drop=True)
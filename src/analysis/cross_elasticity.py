@@ -1,25 +1,15 @@
 # src/analysis/cross_elasticity.py
 
 import pandas as pd
-import statsmodels.api as sm
 import numpy as np
 
-def calculate_cross_price_elasticity(df: pd.DataFrame, demand_category: str, price_category: str):
-    """
-    Calculates the cross-price elasticity between two product categories.
-    This measures the effect of the price of 'price_category' on the demand for 'demand_category'.
+from src.analysis.vectorized_ols import bootstrap_simple_ols, percentile_interval
 
-    Args:
-        df (pd.DataFrame): The master dataframe.
-        demand_category (str): The product category whose demand is being measured.
-        price_category (str): The product category whose price is changing.
-
-    Returns:
-        float: The calculated cross-price elasticity coefficient. Returns None if fails.
+def _prepare_weekly_cross_data(df: pd.DataFrame, demand_category: str, price_category: str):
+    """
+    Aligns weekly demand of 'demand_category' with the weekly average price of 'price_category'
+    and adds the log columns. Returns None if there is not enough overlapping data.
     """
-    if demand_category == price_category:
-        return None # This is own-price elasticity, not cross-price.
-
     # 1. Isolate the data for each category
     df_demand_cat = df[df['product_category_name_english'] == demand_category]
     df_price_cat = df[df['product_category_name_english'] == price_category]
@@ -51,10 +41,33 @@ def calculate_cross_price_elasticity(df: pd.DataFrame, demand_category: str, pri
         print("Warning: Not enough overlapping weekly data to calculate cross-price elasticity reliably.")
         return None
 
-    # 4. Apply Log-Log model
     merged_weekly['log_demand'] = np.log(merged_weekly['demand'])
     merged_weekly['log_price'] = np.log(merged_weekly['avg_price'])
-    
+    return merged_weekly
+
+def calculate_cross_price_elasticity(df: pd.DataFrame, demand_category: str, price_category: str):
+    """
+    Calculates the cross-price elasticity between two product categories.
+    This measures the effect of the price of 'price_category' on the demand for 'demand_category'.
+
+    Args:
+        df (pd.DataFrame): The master dataframe.
+        demand_category (str): The product category whose demand is being measured.
+        price_category (str): The product category whose price is changing.
+
+    Returns:
+        float: The calculated cross-price elasticity coefficient. Returns None if fails.
+    """
+    if demand_category == price_category:
+        return None # This is own-price elasticity, not cross-price.
+
+    merged_weekly = _prepare_weekly_cross_data(df, demand_category, price_category)
+    if merged_weekly is None:
+        return None
+
+    # Apply Log-Log model (statsmodels is imported on first use to keep app start-up fast)
+    import statsmodels.api as sm
+
     y = merged_weekly['log_demand']
     X = merged_weekly['log_price']
     X = sm.add_constant(X)
@@ -64,4 +77,33 @@ def calculate_cross_price_elasticity(df: pd.DataFrame, demand_category: str, pri
     # The coefficient of the log_price is our cross-price elasticity
     cross_elasticity_score = model.params.get('log_price', None)
     
-    return cross_elasticity_score
\ No newline at end of file
+    return cross_elasticity_score
+
+def bootstrap_cross_price_elasticity(df: pd.DataFrame, demand_category: str, price_category: str,
+                                     n_boot: int = 2000, ci: float = 0.95, n_jobs: int = 1, random_state: int = 42):
+    """
+    Bootstraps the weekly log-log cross-price model to get a confidence interval.
+    All resamples are solved at once as batched least squares (see vectorized_ols.py).
+
+    Args:
+        df (pd.DataFrame): The master dataframe.
+        demand_category (str): The product category whose demand is being measured.
+        price_category (str): The product category whose price is changing.
+        n_boot (int): Number of bootstrap resamples.
+        ci (float): Confidence level of the interval.
+        n_jobs (int): Number of processes to split the resamples across.
+        random_state (int): Seed for reproducible intervals.
+
+    Returns:
+        tuple: (lower, upper) bounds of the cross-price elasticity. Returns None if fails.
+    """
+    if demand_category == price_category:
+        return None
+
+    merged_weekly = _prepare_weekly_cross_data(df, demand_category, price_category)
+    if merged_weekly is None:
+        return None
+
+    _, slopes = bootstrap_simple_ols(merged_weekly['log_price'].values, merged_weekly['log_demand'].values,
+                                     n_boot=n_boot, random_state=random_state, n_jobs=n_jobs)
+    return percentile_interval(slopes, ci)
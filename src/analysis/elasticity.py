@@ -1,19 +1,16 @@
 # src/analysis/elasticity.py
 
 import pandas as pd
-import statsmodels.api as sm
 import numpy as np
 
-def calculate_elasticity_and_model(df: pd.DataFrame, product_category: str = 'all'):
-    """
-    Calculates price elasticity using a log-log model and returns the trained model.
-
-    Args:
-        df (pd.DataFrame): The master dataframe.
-        product_category (str): The category to analyze. 'all' for the whole dataset.
+from src.analysis.vectorized_ols import bootstrap_simple_ols, percentile_interval
 
-    Returns:
-        tuple: (elasticity_score, trained_model). Returns (None, None) if calculation fails.
+def _aggregate_price_demand(df: pd.DataFrame, product_category: str = 'all'):
+    """
+    Aggregates demand (quantity sold) at each unique price point and adds the log columns
+    used by the log-log model. Returns None if there are fewer than 10 price points.
+    On a stratified sample (src/analysis/sampling.py) each sampled price point keeps its full-data
+    demand and gets a 'point_weight' (the number of full-data points it stands for).
     """
     if product_category != 'all':
         df_filtered = df[df['product_category_name_english'] == product_category].copy()
@@ -21,27 +18,120 @@ def calculate_elasticity_and_model(df: pd.DataFrame, product_category: str = 'al
         df_filtered = df.copy()
 
     # Aggregate to get price vs. demand (quantity sold)
-    agg_df = df_filtered.groupby('price').agg(
-        demand=('order_item_id', 'count')
-    ).reset_index()
+    if 'sample_weight' in df_filtered.columns:
+        demand_column = 'price_point_demand' if product_category != 'all' else 'all_price_point_demand'
+        agg_df = df_filtered.groupby('price').agg(
+            demand=(demand_column, 'first'), sampled=('sample_weight', 'sum')
+        ).reset_index()
+        agg_df['point_weight'] = agg_df.pop('sampled') / agg_df['demand']
+    else:
+        agg_df = df_filtered.groupby('price').agg(
+            demand=('order_item_id', 'count')
+        ).reset_index()
 
     # Need at least 10 unique price points for a meaningful regression
     if len(agg_df) < 10:
         print(f"Warning: Not enough unique price points for '{product_category}' to build a model.")
-        return None, None
+        return None
 
     # Apply the log-log transformation
     agg_df['log_price'] = np.log(agg_df['price'])
     agg_df['log_demand'] = np.log(agg_df['demand'])
+    return agg_df
+
+def calculate_elasticity_and_model(df: pd.DataFrame, product_category: str = 'all'):
+    """
+    Calculates price elasticity using a log-log model and returns the trained model.
+
+    Args:
+        df (pd.DataFrame): The master dataframe.
+        product_category (str): The category to analyze. 'all' for the whole dataset.
+
+    Returns:
+        tuple: (elasticity_score, trained_model). Returns (None, None) if calculation fails.
+    """
+    # statsmodels takes ~1s to import, so it is only loaded when a model is first fitted
+    import statsmodels.api as sm
+
+    agg_df = _aggregate_price_demand(df, product_category)
+    if agg_df is None:
+        return None, None
 
     # Build and fit the regression model
     X = agg_df['log_price']
     y = agg_df['log_demand']
     X = sm.add_constant(X)  # Add intercept
-    
-    model = sm.OLS(y, X).fit()
+
+    # Sampled price points are weighted by the number of full-data points they stand for
+    if 'point_weight' in agg_df.columns:
+        model = sm.WLS(y, X, weights=agg_df['point_weight']).fit()
+    else:
+        model = sm.OLS(y, X).fit()
 
     # The coefficient for log_price is our elasticity
     price_elasticity = model.params.get('log_price', None)
 
-    return price_elasticity, model
\ No newline at end of file
+    return price_elasticity, model
+
+def bootstrap_elasticity(df: pd.DataFrame, product_category: str = 'all', n_boot: int = 2000,
+                         ci: float = 0.95, n_jobs: int = 1, random_state: int = 42):
+    """
+    Bootstraps the log-log elasticity model to get a confidence interval for the elasticity.
+    All resamples are solved at once as batched least squares (see vectorized_ols.py).
+
+    Args:
+        df (pd.DataFrame): The master dataframe.
+        product_category (str): The category to analyze. 'all' for the whole dataset.
+        n_boot (int): Number of bootstrap resamples.
+        ci (float): Confidence level of the interval.
+        n_jobs (int): Number of processes to split the resamples across.
+        random_state (int): Seed for reproducible intervals.
+
+    Returns:
+        dict: 'lower' and 'upper' bounds of the elasticity, plus the bootstrap 'intercepts' and
+              'slopes' arrays (used for revenue bands). Returns None if calculation fails.
+    """
+    agg_df = _aggregate_price_demand(df, product_category)
+    if agg_df is None:
+        return None
+
+    intercepts, slopes = bootstrap_simple_ols(agg_df['log_price'].values, agg_df['log_demand'].values,
+                                              n_boot=n_boot, random_state=random_state, n_jobs=n_jobs)
+    lower, upper = percentile_interval(slopes, ci)
+
+    return {'lower': lower, 'upper': upper, 'intercepts': intercepts, 'slopes': slopes}
+
+def simulate_revenue_curve(price_range, intercept: float, elasticity: float,
+                           boot_intercepts=None, boot_slopes=None, ci: float = 0.95):
+    """
+    Projects revenue over a range of prices with the log-log demand model.
+
+    Args:
+        price_range (array-like): Candidate prices.
+        intercept (float): Model intercept ('const').
+        elasticity (float): Model price coefficient ('log_price').
+        boot_intercepts, boot_slopes (np.ndarray): Optional bootstrap draws from bootstrap_elasticity().
+            If given, a revenue band and a range for the revenue-maximizing price are added.
+        ci (float): Confidence level of the band.
+
+    Returns:
+        tuple: (sim_df, optimal_price_range). sim_df has 'Price' and 'Projected_Revenue' columns,
+               plus 'Revenue_Lower'/'Revenue_Upper' with bootstrap draws. optimal_price_range is
+               (low, high) or None without bootstrap draws.
+    """
+    prices = np.asarray(price_range, dtype=np.float64)
+    log_prices = np.log(prices)
+    sim_df = pd.DataFrame({'Price': prices, 'Projected_Revenue': prices * np.exp(intercept + elasticity * log_prices)})
+
+    if boot_intercepts is None or boot_slopes is None:
+        return sim_df, None
+
+    # (n_boot x n_prices) revenue matrix in one broadcast
+    revenues = prices * np.exp(boot_intercepts[:, None] + boot_slopes[:, None] * log_prices)
+    sim_df['Revenue_Lower'], sim_df['Revenue_Upper'] = percentile_interval(revenues, ci, axis=0)
+
+    valid = np.isfinite(revenues).all(axis=1)
+    if not valid.any():
+        return sim_df, None
+    optimal_prices = prices[np.argmax(revenues[valid], axis=1)]
+    return sim_df, percentile_interval(optimal_prices, ci)
@@ -1,7 +1,7 @@
 # src/analysis/forecasting.py
 
 import pandas as pd
-from prophet import Prophet
+import numpy as np
 
 # Make sure your function definition looks EXACTLY like this line:
 def generate_forecast(df: pd.DataFrame, periods: int = 90, freq: str = 'D', product_category: str = 'all'):
@@ -25,7 +25,9 @@ def generate_forecast(df: pd.DataFrame, periods: int = 90, freq: str = 'D', prod
         print(f"Warning: Not enough historical data for '{product_category}' to generate a reliable forecast.")
         return None, None
         
-    # Initialize and fit the Prophet model
+    # Initialize and fit the Prophet model (imported on first use; loading Prophet is slow)
+    from prophet import Prophet
+
     model = Prophet(yearly_seasonality=True, weekly_seasonality=True, daily_seasonality=False, interval_width=0.95)
     model.fit(daily_sales)
     
@@ -35,4 +37,124 @@ def generate_forecast(df: pd.DataFrame, periods: int = 90, freq: str = 'D', prod
     
     print(f"Forecast generated for '{product_category}' for the next {periods} days.")
     
-    return model, forecast
\ No newline at end of file
+    return model, forecast
+
+
+def aggregate_daily_sales(df: pd.DataFrame):
+    """
+    Daily revenue per category, the series every forecasting model starts from.
+
+    Days are never split across purchase months, so the result can be computed per monthly
+    partition and concatenated (see src/data_processing/partitions.py).
+
+    Returns:
+        pd.DataFrame: 'product_category_name_english', 'ds' and 'y', one row per category and day with sales.
+    """
+    daily = df.groupby(['product_category_name_english', pd.Grouper(key='order_purchase_timestamp', freq='D')])['price'].sum()
+    return daily.rename('y').reset_index().rename(columns={'order_purchase_timestamp': 'ds'})
+
+
+def _fourier_terms(day_numbers, period: float, order: int):
+    """Sine/cosine seasonality features (same form as Prophet's), one row per day."""
+    angles = 2 * np.pi * np.outer(day_numbers, np.arange(1, order + 1)) / period
+    return np.hstack([np.sin(angles), np.cos(angles)])
+
+
+def generate_global_forecast(df: pd.DataFrame, periods: int = 90, min_history_days: int = 14,
+                             weekly_order: int = 3, yearly_order: int = 10, interval_width: float = 0.95,
+                             seasonality_ridge: float = 1.0, daily_sales: pd.DataFrame = None):
+    """
+    Forecasts daily revenue for every category (and 'all') with one global model.
+
+    Each series is modeled in log1p space as its own level and linear trend plus weekly and yearly
+    seasonality shared by all series, and the whole model is solved in closed form in one pass
+    (block normal equations). Because seasonality is learned from every series together, categories
+    with a short or sparse history still get usable forecasts. Category forecasts are then reconciled
+    proportionally so that, on every date, they sum to the 'all' forecast.
+
+    Args:
+        df (pd.DataFrame): The master dataframe.
+        periods (int): Days to forecast beyond the last recorded day.
+        min_history_days (int): Days since its first sale a category needs to be forecast.
+        weekly_order, yearly_order (int): Number of Fourier terms of each shared seasonality.
+        interval_width (float): Width of the uncertainty interval.
+        seasonality_ridge (float): Ridge penalty on the seasonality coefficients (stabilizes the
+            yearly terms when there is less than two years of history).
+        daily_sales (pd.DataFrame): Optional output of aggregate_daily_sales(), e.g. the app
+            dataset's rollup. When given, `df` is not read.
+
+    Returns:
+        pd.DataFrame: 'product_category', 'ds', 'yhat', 'yhat_lower', 'yhat_upper' and 'y' (the
+                      recorded revenue, NaN in the forecast horizon), from each series' first sale
+                      to the end of the horizon. Returns an empty dataframe if there is no data.
+    """
+    from statistics import NormalDist
+
+    # 1. Daily revenue matrix: one row per series ('all' first), one column per day
+    if daily_sales is None:
+        daily_sales = aggregate_daily_sales(df)
+    daily = daily_sales.pivot_table(index='product_category_name_english', columns='ds', values='y',
+                                    aggfunc='sum', fill_value=0.0)
+    if daily.empty:
+        return pd.DataFrame(columns=['product_category', 'ds', 'yhat', 'yhat_lower', 'yhat_upper', 'y'])
+    history_dates = pd.date_range(daily.columns.min(), daily.columns.max(), freq='D')
+    daily = daily.reindex(columns=history_dates, fill_value=0.0)
+    daily = pd.concat([daily.sum().to_frame('all').T, daily])
+
+    # Each series is fitted from its first sale on; series with too short a history are dropped
+    Y = daily.to_numpy(dtype=np.float64)
+    n_days = Y.shape[1]
+    first_sale = (Y > 0).argmax(axis=1)
+    keep = ((Y > 0).any(axis=1)) & (n_days - first_sale >= min_history_days)
+    keep[0] = True  # always forecast 'all'
+    Y, first_sale, series = Y[keep], first_sale[keep], daily.index[keep]
+    Z = np.log1p(Y)
+    M = (np.arange(n_days)[None, :] >= first_sale[:, None]).astype(np.float64)
+
+    # 2. Regressors: per-series [1, t] and shared Fourier seasonality
+    all_dates = pd.date_range(history_dates[0], periods=n_days + periods, freq='D')
+    day_numbers = (all_dates - pd.Timestamp('1970-01-01')).days.to_numpy()
+    t_all = np.arange(n_days + periods) / max(n_days - 1, 1)
+    F_all = np.hstack([_fourier_terms(day_numbers, 7.0, weekly_order), _fourier_terms(day_numbers, 365.25, yearly_order)])
+    t, F = t_all[:n_days], F_all[:n_days]
+
+    # 3. Normal equations, with the per-series [level, trend] blocks eliminated (Schur complement)
+    A = np.stack([np.stack([M.sum(axis=1), M @ t], axis=1),
+                  np.stack([M @ t, M @ (t * t)], axis=1)], axis=1)                  # C x 2 x 2
+    B = np.stack([M @ F, M @ (t[:, None] * F)], axis=1)                              # C x 2 x K
+    MZ = M * Z
+    h = np.stack([MZ.sum(axis=1), MZ @ t], axis=1)                                   # C x 2
+    A_inv = np.linalg.inv(A)
+
+    D = F.T @ (F * M.sum(axis=0)[:, None])
+    schur = D - np.einsum('cak,cab,cbl->kl', B, A_inv, B) + seasonality_ridge * np.eye(F.shape[1])
+    rhs = (MZ @ F).sum(axis=0) - np.einsum('cak,cab,cb->k', B, A_inv, h)
+    gamma = np.linalg.solve(schur, rhs)
+    level_trend = np.einsum('cab,cb->ca', A_inv, h - B @ gamma)                      # C x 2
+
+    # 4. Fitted values and forecast in log1p space; per-series residual spread for the interval
+    Z_hat = level_trend[:, :1] + level_trend[:, 1:] * t_all + F_all @ gamma
+    residuals = M * (Z - Z_hat[:, :n_days])
+    dof = np.maximum(M.sum(axis=1) - 2, 1)
+    sigma = np.sqrt((residuals ** 2).sum(axis=1) / dof)[:, None]
+    z = NormalDist().inv_cdf(0.5 + interval_width / 2)
+
+    yhat = np.expm1(Z_hat).clip(min=0)
+    lower = np.expm1(Z_hat - z * sigma).clip(min=0)
+    upper = np.expm1(Z_hat + z * sigma).clip(min=0)
+
+    # 5. Proportional reconciliation: active categories sum to the 'all' forecast on every date
+    active = np.arange(n_days + periods)[None, :] >= first_sale[:, None]
+    category_total = (yhat[1:] * active[1:]).sum(axis=0)
+    scale = np.divide(yhat[0], category_total, out=np.ones_like(category_total), where=category_total > 0)
+    yhat[1:], lower[1:], upper[1:] = yhat[1:] * scale, lower[1:] * scale, upper[1:] * scale
+
+    recorded = np.full_like(yhat, np.nan)
+    recorded[:, :n_days] = Y
+    forecast = pd.DataFrame({
+        'product_category': np.repeat(series.to_numpy(), len(all_dates)),
+        'ds': np.tile(all_dates.to_numpy(), len(series)),
+        'yhat': yhat.ravel(), 'yhat_lower': lower.ravel(), 'yhat_upper': upper.ravel(), 'y': recorded.ravel()
+    })
+    print(f"Global forecast generated for {len(series) - 1} categories and 'all' for the next {periods} days.")
+    return forecast[active.ravel()].reset_index(drop=True)
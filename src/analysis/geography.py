@@ -0,0 +1,74 @@
+# src/analysis/geography.py
+
+import pandas as pd
+
+# Drill-down levels, from the top of the hierarchy to the bottom
+GEO_LEVELS = ['customer_state', 'customer_city', 'customer_zip_code_prefix']
+ROOT_NODE = 'all'
+
+def build_geo_hierarchy(df: pd.DataFrame):
+    """
+    Pre-aggregates revenue, orders, customers and average order value for every node of the
+    state -> city -> zip prefix hierarchy, plus a root node for the whole dataset.
+
+    Distinct orders and customers are counted per node (they are not additive across children).
+
+    Args:
+        df (pd.DataFrame): The master dataframe.
+
+    Returns:
+        pd.DataFrame: One row per node with 'level', 'node_id', 'parent_id', 'name' and the metrics.
+                      Rows are sorted by parent_id so the children of a node are contiguous.
+    """
+    geo = df[['order_id', 'customer_unique_id', 'price']].copy()
+    geo['customer_state'] = df['customer_state'].astype(str)
+    geo['customer_city'] = df['customer_city'].astype(str)
+    geo['customer_zip_code_prefix'] = df['customer_zip_code_prefix'].astype(int).astype(str).str.zfill(5)
+
+    metrics = dict(revenue=('price', 'sum'), orders=('order_id', 'nunique'), customers=('customer_unique_id', 'nunique'))
+
+    root = pd.DataFrame({
+        'level': ['all'], 'node_id': [ROOT_NODE], 'parent_id': [''], 'name': ['All Regions'],
+        'revenue': [geo['price'].sum()], 'orders': [geo['order_id'].nunique()],
+        'customers': [geo['customer_unique_id'].nunique()]
+    })
+
+    nodes = [root]
+    for depth, level in enumerate(GEO_LEVELS):
+        keys = GEO_LEVELS[:depth + 1]
+        agg = geo.groupby(keys, sort=False).agg(**metrics).reset_index()
+        path = agg[keys[0]].str.cat([agg[k] for k in keys[1:]], sep='/') if depth > 0 else agg[level]
+        parent = agg[keys[0]].str.cat([agg[k] for k in keys[1:-1]], sep='/') if depth > 0 else ROOT_NODE
+        nodes.append(pd.DataFrame({
+            'level': level, 'node_id': path, 'parent_id': parent, 'name': agg[level],
+            'revenue': agg['revenue'], 'orders': agg['orders'], 'customers': agg['customers']
+        }))
+
+    hierarchy = pd.concat(nodes, ignore_index=True)
+    hierarchy['avg_order_value'] = hierarchy['revenue'] / hierarchy['orders']
+    return hierarchy.sort_values(['parent_id', 'revenue'], ascending=[True, False]).reset_index(drop=True)
+
+def index_geo_hierarchy(hierarchy: pd.DataFrame):
+    """Indexes the hierarchy by parent_id (sorted), so get_geo_children() is a binary-search slice."""
+    return hierarchy.set_index('parent_id').sort_index(kind='stable')
+
+def get_geo_children(indexed_hierarchy: pd.DataFrame, parent_id: str = ROOT_NODE):
+    """
+    Returns the child rows of one node, read from the index built by index_geo_hierarchy().
+
+    Args:
+        indexed_hierarchy (pd.DataFrame): Output of index_geo_hierarchy().
+        parent_id (str): node_id of the selected node. 'all' returns the states.
+
+    Returns:
+        pd.DataFrame: The children, highest revenue first. Empty if the node has no children.
+    """
+    start, stop = indexed_hierarchy.index.searchsorted(parent_id, side='left'), \
+        indexed_hierarchy.index.searchsorted(parent_id, side='right')
+    return indexed_hierarchy.iloc[start:stop].reset_index()
+
+def get_geo_node(indexed_hierarchy: pd.DataFrame, node_id: str, parent_id: str):
+    """Returns the metrics row of one node (looked up among its parent's children), or None."""
+    siblings = get_geo_children(indexed_hierarchy, parent_id)
+    rows = siblings[siblings['node_id'] == node_id]
+    return None if rows.empty else rows.iloc[0]
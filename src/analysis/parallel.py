@@ -0,0 +1,215 @@
+# src/analysis/parallel.py
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+# Buffers in the shared block start on cache-line boundaries
+_ALIGNMENT = 64
+
+# ========================= SHARED FRAMES =========================
+# A frame is shared as one block of raw column buffers: NumPy arrays for numeric and datetime
+# columns, the codes of categorical columns, and the Arrow buffers (validity, offsets, bytes)
+# of string columns. Workers rebuild the frame as views on the block, so the data exists once
+# in memory however many workers read it. Only the small layout description is pickled.
+
+def _column_parts(series: pd.Series):
+    """Splits a column into (kind, meta, buffers), where buffers support the buffer protocol (or are None)."""
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        codes = np.ascontiguousarray(series.cat.codes.to_numpy())
+        return 'category', {'dtype': dtype, 'codes_dtype': codes.dtype.str}, [codes.view(np.uint8)]
+    if isinstance(dtype, pd.StringDtype) or dtype == object:
+        import pyarrow as pa
+        arrow = pa.array(series.array, type=pa.large_string(), from_pandas=True)
+        if isinstance(arrow, pa.ChunkedArray):
+            arrow = arrow.combine_chunks()
+        # Object columns come back as the default string dtype
+        string_dtype = dtype if isinstance(dtype, pd.StringDtype) else pd.StringDtype(na_value=np.nan)
+        return 'string', {'dtype': string_dtype, 'offset': arrow.offset, 'null_count': arrow.null_count}, arrow.buffers()
+    if isinstance(dtype, np.dtype) and dtype.kind in 'biufmM':
+        values = np.ascontiguousarray(series.to_numpy())
+        return 'numpy', {'dtype': values.dtype.str}, [values.view(np.uint8)]  # datetimes have no buffer format
+    raise TypeError(f"Column '{series.name}' has dtype {dtype}, which cannot be shared.")
+
+class SharedFrame:
+    """
+    Copies the columns of a dataframe into one shared memory block, once. Worker processes
+    rebuild the frame from `spec` with attach_shared_frame() without copying it.
+
+    The index is not shared (the rebuilt frame has a RangeIndex) and the rebuilt columns are
+    read-only. Use as a context manager, or call close(), to free the block.
+
+    Args:
+        df (pd.DataFrame): The frame to share.
+        columns (list): Columns to share. Defaults to all of them; sharing only the columns
+            the analysis reads keeps the block small.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns=None):
+        columns = list(df.columns) if columns is None else list(columns)
+        layout, parts, size = [], [], 0
+        for column in columns:
+            kind, meta, buffers = _column_parts(df[column])
+            locations = []
+            for buffer in buffers:
+                if buffer is None:
+                    locations.append(None)
+                    continue
+                view = memoryview(buffer).cast('B')
+                size = -(-size // _ALIGNMENT) * _ALIGNMENT
+                locations.append((size, view.nbytes))
+                parts.append((size, view))
+                size += view.nbytes
+            layout.append((column, kind, meta, locations))
+
+        self._shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for offset, view in parts:
+            self._shm.buf[offset:offset + view.nbytes] = view
+            view.release()
+        self.nbytes = size
+        self.spec = {'name': self._shm.name, 'length': len(df), 'columns': layout}
+
+    def close(self):
+        """Frees the shared block. Frames attached in other processes must not be used afterwards."""
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def attach_shared_frame(spec: dict):
+    """
+    Rebuilds a SharedFrame's dataframe as zero-copy views on its shared block.
+
+    Returns:
+        tuple: (shared_memory.SharedMemory, pd.DataFrame). Keep the SharedMemory object alive
+               for as long as the frame is used.
+    """
+    shm = shared_memory.SharedMemory(name=spec['name'])
+    length = spec['length']
+    data = {}
+    for column, kind, meta, locations in spec['columns']:
+        views = [None if loc is None else shm.buf[loc[0]:loc[0] + loc[1]] for loc in locations]
+        if kind == 'numpy':
+            values = np.frombuffer(views[0], dtype=meta['dtype'])
+            values.flags.writeable = False
+            data[column] = values
+        elif kind == 'category':
+            codes = np.frombuffer(views[0], dtype=meta['codes_dtype'])
+            codes.flags.writeable = False
+            data[column] = pd.Categorical.from_codes(codes, dtype=meta['dtype'])
+        else:
+            import pyarrow as pa
+            arrow = pa.Array.from_buffers(pa.large_string(), length,
+                                          [None if view is None else pa.py_buffer(view) for view in views],
+                                          null_count=meta['null_count'], offset=meta['offset'])
+            data[column] = meta['dtype'].__from_arrow__(arrow)
+    return shm, pd.DataFrame(data, copy=False)
+
+# ========================= PARALLEL RUNNER =========================
+# Each worker attaches to the shared frame once, when it starts; tasks only carry the function
+# (pickled by reference) and its keyword arguments.
+_worker_shm, _worker_df = None, None
+
+def _init_worker(spec):
+    global _worker_shm, _worker_df
+    _worker_shm, _worker_df = attach_shared_frame(spec)
+
+def _run_task(func, kwargs):
+    return func(_worker_df, **kwargs)
+
+class ParallelAnalysisRunner:
+    """
+    Maps analysis functions over categories (or category pairs) in a process pool whose workers
+    all read one shared copy of the master dataframe.
+
+    Any function taking the dataframe as its first argument works, e.g.
+    calculate_elasticity_and_model, generate_forecast or calculate_cross_price_elasticity.
+    Functions must be defined at module level so workers can import them.
+
+        with ParallelAnalysisRunner(df, columns=[...], max_workers=8) as runner:
+            elasticities = runner.map_categories(calculate_elasticity_and_model, categories)
+            cross = runner.map_category_pairs(calculate_cross_price_elasticity, pairs)
+
+    With max_workers=1 everything runs in-process on `df` itself, without shared memory.
+
+    Args:
+        df (pd.DataFrame): The master dataframe.
+        columns (list): Columns the mapped functions read. Defaults to all of them.
+        max_workers (int): Worker processes. Defaults to the number of CPUs.
+        mp_context: Optional multiprocessing context for the pool (default: the platform's).
+    """
+
+    def __init__(self, df: pd.DataFrame, columns=None, max_workers: int = None, mp_context=None):
+        self.df = df
+        self.columns = columns
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.mp_context = mp_context
+        self.shared = None
+        self._executor = None
+
+    def __enter__(self):
+        if self.max_workers > 1:
+            self.shared = SharedFrame(self.df, self.columns)
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self.mp_context,
+                                                 initializer=_init_worker, initargs=(self.shared.spec,))
+        return self
+
+    def __exit__(self, *exc):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self.shared is not None:
+            self.shared.close()
+            self.shared = None
+
+    def map(self, func, tasks, chunksize: int = None):
+        """
+        Calls func(df, **kwargs) for every kwargs dict in `tasks`.
+
+        Args:
+            func (callable): A module-level function taking the dataframe first.
+            tasks (list): Keyword arguments of each call.
+            chunksize (int): Tasks sent to a worker at a time. Defaults to about four chunks per worker.
+
+        Returns:
+            list: The results, in the order of `tasks`.
+        """
+        tasks = list(tasks)
+        if self._executor is None:
+            df = self.df if self.columns is None else self.df[self.columns]
+            return [func(df, **kwargs) for kwargs in tasks]
+        chunksize = chunksize or max(1, len(tasks) // (4 * self.max_workers))
+        return list(self._executor.map(_run_task, repeat(func), tasks, chunksize=chunksize))
+
+    def map_categories(self, func, categories, argument: str = 'product_category', **kwargs):
+        """
+        Calls func(df, product_category=category, **kwargs) for every category.
+
+        Returns:
+            dict: Category -> result.
+        """
+        categories = list(categories)
+        results = self.map(func, [{argument: category, **kwargs} for category in categories])
+        return dict(zip(categories, results))
+
+    def map_category_pairs(self, func, pairs, arguments=('demand_category', 'price_category'), **kwargs):
+        """
+        Calls func(df, demand_category=a, price_category=b, **kwargs) for every (a, b) pair.
+
+        Returns:
+            dict: (a, b) -> result.
+        """
+        pairs = [tuple(pair) for pair in pairs]
+        results = self.map(func, [{arguments[0]: a, arguments[1]: b, **kwargs} for a, b in pairs])
+        return dict(zip(pairs, results))
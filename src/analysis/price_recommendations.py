@@ -0,0 +1,71 @@
+# src/analysis/price_recommendations.py
+
+import pandas as pd
+import numpy as np
+
+from src.analysis.product_elasticity import _log_log_sums
+from src.analysis.vectorized_ols import simple_ols_from_sums
+
+RECOMMENDATION_COLUMNS = [
+    'level', 'product_category_name_english', 'product_id', 'n_price_points', 'elasticity', 'intercept',
+    'min_price', 'max_price', 'avg_price', 'demand', 'recommended_price', 'predicted_demand', 'projected_revenue'
+]
+
+def revenue_maximizing_price(elasticity, min_price, max_price):
+    """
+    Revenue-maximizing price within [min_price, max_price] under the log-log demand model.
+
+    Revenue is price * exp(intercept) * price^elasticity, i.e. proportional to price^(1 + elasticity),
+    so it is monotonic in price and the optimum is always one end of the range: the lower end for
+    elastic demand (elasticity < -1) and the upper end otherwise.
+    """
+    return np.where(np.asarray(elasticity) < -1, min_price, max_price)
+
+def _category_price_models(df: pd.DataFrame, min_price_points: int):
+    # Same model as calculate_elasticity_and_model(): OLS of log demand on log price over unique prices
+    points = df.groupby(['product_category_name_english', 'price']).size().rename('demand').reset_index()
+    overall = df.groupby('price').size().rename('demand').reset_index()
+    overall['product_category_name_english'] = 'all'
+    points = pd.concat([points, overall], ignore_index=True)
+
+    sums = _log_log_sums(points, ['product_category_name_english'])
+    intercept, slope = simple_ols_from_sums(sums['n'], sums['sx'], sums['sy'], sums['sxx'], sums['sxy'])
+    models = pd.DataFrame({'n_price_points': sums['n'].astype(int), 'elasticity': slope, 'intercept': intercept},
+                          index=sums.index)
+    models = models[(models['n_price_points'] >= min_price_points) & models['elasticity'].notna()]
+
+    # Like the Price Optimization Lab, categories are priced within their interquartile range
+    prices = pd.concat([df[['product_category_name_english', 'price']],
+                        df[['price']].assign(product_category_name_english='all')], ignore_index=True)
+    grouped = prices.groupby('product_category_name_english')['price']
+    quartiles = grouped.quantile([0.25, 0.75]).unstack()
+    price_stats = pd.DataFrame({'min_price': quartiles[0.25], 'max_price': quartiles[0.75],
+                                'avg_price': grouped.mean(), 'demand': grouped.size()})
+    return models.join(price_stats, how='inner').reset_index()
+
+def build_price_recommendations(df: pd.DataFrame, product_table: pd.DataFrame, min_category_price_points: int = 10):
+    """
+    Builds the lookup table served by the pricing service: one row per category (plus 'all')
+    and per product, with the demand model and its revenue-maximizing price.
+
+    Args:
+        df (pd.DataFrame): The master dataframe.
+        product_table (pd.DataFrame): Output of calculate_product_elasticities().
+        min_category_price_points (int): Distinct prices a category needs for its own model.
+
+    Returns:
+        pd.DataFrame: RECOMMENDATION_COLUMNS. 'level' is 'category' or 'product'; product_id is
+                      empty for category rows. Products are priced within their observed price range.
+    """
+    categories = _category_price_models(df, min_category_price_points)
+    categories['level'] = 'category'
+    categories['product_id'] = ''
+
+    products = product_table.copy()
+    products['level'] = 'product'
+
+    table = pd.concat([categories, products], ignore_index=True)[RECOMMENDATION_COLUMNS[:-3]]
+    table['recommended_price'] = revenue_maximizing_price(table['elasticity'], table['min_price'], table['max_price'])
+    table['predicted_demand'] = np.exp(table['intercept'] + table['elasticity'] * np.log(table['recommended_price']))
+    table['projected_revenue'] = table['recommended_price'] * table['predicted_demand']
+    return table
@@ -0,0 +1,107 @@
+# src/analysis/product_elasticity.py
+
+import pandas as pd
+import numpy as np
+
+from src.analysis.vectorized_ols import simple_ols_from_sums
+
+def _log_log_sums(agg_df: pd.DataFrame, keys):
+    """
+    Groups (price, demand) points by `keys` and returns the sufficient statistics of the
+    log-log regression of each group in one vectorized pass.
+    """
+    x = np.log(agg_df['price'])
+    y = np.log(agg_df['demand'])
+    stats = pd.DataFrame({'n': 1.0, 'sx': x, 'sy': y, 'sxx': x * x, 'sxy': x * y, 'syy': y * y})
+    for key in keys:
+        stats[key] = agg_df[key].values
+    return stats.groupby(keys, sort=False).sum()
+
+def calculate_product_elasticities(df: pd.DataFrame, min_price_points: int = 3,
+                                   min_category_price_points: int = 10, shrinkage_strength: float = None):
+    """
+    Estimates a log-log price elasticity for every product at once.
+
+    Each product's slope is shrunk toward its category's elasticity (ridge regression with the
+    category elasticity as prior mean). Products with fewer than `min_price_points` distinct prices
+    fall back to the category elasticity; categories with too few price points fall back to the
+    elasticity of the whole dataset.
+
+    Args:
+        df (pd.DataFrame): The master dataframe.
+        min_price_points (int): Distinct prices a product needs for its own fit.
+        min_category_price_points (int): Distinct prices a category needs for its own fit
+            (the same threshold as calculate_elasticity_and_model).
+        shrinkage_strength (float): Prior weight of the category elasticity, in units of log-price
+            variation. None estimates it from the data (empirical Bayes).
+
+    Returns:
+        pd.DataFrame: One row per product with its elasticity, intercept (for demand predictions),
+                      the raw (unshrunk) fit, the category elasticity and the shrinkage weight.
+    """
+    # 1. Demand at each price point, per product and per category
+    keys = ['product_category_name_english', 'product_id']
+    product_points = df.groupby(keys + ['price']).size().rename('demand').reset_index()
+    category_points = df.groupby(['product_category_name_english', 'price']).size().rename('demand').reset_index()
+    overall_points = df.groupby('price').size().rename('demand').reset_index()
+    overall_points['all'] = 'all'
+
+    # 2. Category elasticities (prior means), with the overall elasticity as fallback
+    overall = _log_log_sums(overall_points, ['all']).iloc[0]
+    _, overall_slope = simple_ols_from_sums(overall['n'], overall['sx'], overall['sy'], overall['sxx'], overall['sxy'])
+
+    cat = _log_log_sums(category_points, ['product_category_name_english'])
+    _, cat_slope = simple_ols_from_sums(cat['n'], cat['sx'], cat['sy'], cat['sxx'], cat['sxy'])
+    cat_slope = pd.Series(cat_slope, index=cat.index)
+    cat_slope[(cat['n'] < min_category_price_points) | cat_slope.isna()] = overall_slope
+
+    # 3. Per-product sufficient statistics, centered
+    prod = _log_log_sums(product_points, keys)
+    n = prod['n']
+    sxx_c = (prod['sxx'] - prod['sx'] ** 2 / n).clip(lower=0)
+    sxy_c = prod['sxy'] - prod['sx'] * prod['sy'] / n
+    syy_c = (prod['syy'] - prod['sy'] ** 2 / n).clip(lower=0)
+    prior = cat_slope.reindex(prod.index.get_level_values('product_category_name_english')).values
+
+    has_fit = (n >= min_price_points) & (sxx_c > 1e-12)
+    raw_slope = (sxy_c / sxx_c).where(has_fit)
+
+    # 4. Shrinkage strength: residual variance / variance of true product slopes around their category
+    if shrinkage_strength is None:
+        fitted = has_fit & (n > 2)
+        rss = (syy_c - raw_slope * sxy_c).clip(lower=0)[fitted]
+        sigma2 = rss.sum() / (n[fitted] - 2).sum() if fitted.any() else 1.0
+        sampling_var = (sigma2 / sxx_c[fitted]).mean() if fitted.any() else 0.0
+        tau2 = np.nanvar(raw_slope[fitted] - prior[fitted.values]) - sampling_var if fitted.sum() > 1 else 0.0
+        shrinkage_strength = sigma2 / max(tau2, 1e-3)
+
+    effective_sxx = sxx_c.where(has_fit, 0.0)
+    effective_sxy = sxy_c.where(has_fit, 0.0)
+    elasticity = (effective_sxy + shrinkage_strength * prior) / (effective_sxx + shrinkage_strength)
+    intercept = (prod['sy'] - elasticity * prod['sx']) / n
+
+    result = pd.DataFrame({
+        'n_price_points': n.astype(int),
+        'elasticity': elasticity,
+        'intercept': intercept,
+        'raw_elasticity': raw_slope,
+        'category_elasticity': prior,
+        'shrinkage_weight': effective_sxx / (effective_sxx + shrinkage_strength),
+        'estimate_source': np.where(has_fit, 'product', 'category')
+    }, index=prod.index).reset_index()
+
+    demand = df.groupby('product_id').agg(demand=('order_item_id', 'count'), avg_price=('price', 'mean'),
+                                          min_price=('price', 'min'), max_price=('price', 'max'))
+    return result.merge(demand, left_on='product_id', right_index=True, how='left')
+
+def get_product_elasticity(product_table: pd.DataFrame, product_id: str):
+    """
+    Looks up one product in the table from calculate_product_elasticities().
+
+    Returns:
+        dict: The product's row, or None if the product is unknown.
+    """
+    rows = product_table[product_table['product_id'] == product_id]
+    if rows.empty:
+        return None
+    return rows.iloc[0].to_dict()
@@ -0,0 +1,179 @@
+# src/analysis/rfm_store.py
+
+import json
+import os
+import pandas as pd
+import numpy as np
+
+from src.analysis.segmentation import aggregate_customer_orders, fit_rfm_model
+
+ITEM_KEYS = ['order_id', 'order_item_id']
+
+class RFMStateStore:
+    """
+    Persistent per-customer RFM state, so segments can be refreshed from new orders only.
+
+    The store keeps, per customer_unique_id, the last purchase time, the number of distinct
+    orders and the total spend, together with the scaler and K-Means centroids of the last
+    full fit. It lives in a directory with three files:
+        customers.parquet  - the per-customer state and current segment
+        items.parquet      - the (order_id, order_item_id) keys already counted
+        model.json         - scaler mean/scale, centroids and the newest purchase timestamp counted
+
+    Typical use:
+        store = RFMStateStore.load(store_dir)
+        changed = store.update(recent_orders_df)  # order items already counted are skipped
+        store.assign_segments(changed)            # nearest persisted centroid, no refit
+        store.save()
+    """
+
+    def __init__(self, store_dir: str, customers: pd.DataFrame = None, model: dict = None, items: pd.DataFrame = None):
+        self.store_dir = store_dir
+        self.customers = customers if customers is not None else pd.DataFrame(
+            columns=['last_purchase', 'frequency', 'monetary', 'customer_segment'],
+            index=pd.Index([], name='customer_unique_id'))
+        self.model = model or {}
+        self.items = items if items is not None else pd.DataFrame({'order_id': pd.Series(dtype=str),
+                                                                   'order_item_id': pd.Series(dtype='int64')})
+
+    @staticmethod
+    def exists(store_dir: str) -> bool:
+        return all(os.path.exists(os.path.join(store_dir, name))
+                   for name in ('customers.parquet', 'items.parquet', 'model.json'))
+
+    @classmethod
+    def load(cls, store_dir: str):
+        """Loads a store saved with save()."""
+        customers = pd.read_parquet(os.path.join(store_dir, 'customers.parquet'))
+        items = pd.read_parquet(os.path.join(store_dir, 'items.parquet'))
+        with open(os.path.join(store_dir, 'model.json')) as f:
+            model = json.load(f)
+        return cls(store_dir, customers, model, items)
+
+    @classmethod
+    def rebuild(cls, store_dir: str, df: pd.DataFrame, num_clusters: int = 4):
+        """Builds a store from the full order history and fits the segmentation model."""
+        store = cls(store_dir)
+        store.update(df)
+        store.refit(num_clusters)
+        return store
+
+    @property
+    def watermark(self):
+        """Purchase timestamp of the newest order already counted, or None for an empty store."""
+        value = self.model.get('watermark')
+        return pd.Timestamp(value) if value else None
+
+    def update(self, orders: pd.DataFrame):
+        """
+        Adds new order rows to the per-customer state.
+
+        Order items are matched on (order_id, order_item_id) against those already counted, so
+        passing an overlapping extract is safe, and items that arrive late (with a purchase
+        timestamp at or before the watermark) are still counted. A new item of an order that was
+        already counted adds to the spend but not to the number of orders.
+
+        Args:
+            orders (pd.DataFrame): Order rows with 'customer_unique_id', 'order_id',
+                'order_item_id', 'price' and 'order_purchase_timestamp'.
+
+        Returns:
+            pd.Index: The customer_unique_ids that were added or changed.
+        """
+        orders = orders.drop_duplicates(ITEM_KEYS)
+        counted = pd.MultiIndex.from_frame(self.items[ITEM_KEYS])
+        orders = orders[~pd.MultiIndex.from_frame(orders[ITEM_KEYS]).isin(counted)]
+        if orders.empty:
+            return pd.Index([], name='customer_unique_id')
+
+        delta = aggregate_customer_orders(orders)
+        # Only orders seen for the first time add to the frequency
+        new_orders = orders[~orders['order_id'].isin(self.items['order_id'])]
+        delta['frequency'] = new_orders.groupby('customer_unique_id')['order_id'].nunique() \
+            .reindex(delta.index, fill_value=0)
+        current = self.customers.reindex(delta.index)
+        # Late items can be older than a customer's last counted purchase
+        last_purchase = pd.to_datetime(current['last_purchase'])
+
+        updated = pd.DataFrame({
+            'last_purchase': delta['last_purchase'].where(~(last_purchase > delta['last_purchase']), last_purchase),
+            'frequency': current['frequency'].fillna(0).astype('int64') + delta['frequency'],
+            'monetary': current['monetary'].fillna(0.0).astype('float64') + delta['monetary'],
+            'customer_segment': current['customer_segment']
+        }, index=delta.index)
+
+        if self.customers.empty:
+            self.customers = updated
+        else:
+            self.customers = pd.concat([self.customers.drop(index=delta.index, errors='ignore'), updated])
+        new_items = orders[ITEM_KEYS].astype({'order_id': str, 'order_item_id': 'int64'})
+        self.items = pd.concat([self.items, new_items], ignore_index=True) if not self.items.empty else new_items.reset_index(drop=True)
+        newest = delta['last_purchase'].max()
+        self.model['watermark'] = str(max(newest, self.watermark) if self.watermark is not None else newest)
+        return delta.index
+
+    def _rfm_features(self, customers: pd.DataFrame):
+        # Same recency definition as the full segmentation: days since purchase, measured from one day after the newest order
+        snapshot_date = self.watermark + pd.Timedelta(days=1)
+        return pd.DataFrame({
+            'recency': (snapshot_date - customers['last_purchase']).dt.days,
+            'frequency': customers['frequency'],
+            'monetary': customers['monetary']
+        }, index=customers.index)
+
+    def assign_segments(self, customer_ids=None):
+        """
+        Assigns customers to the nearest persisted centroid, without refitting.
+
+        Args:
+            customer_ids (iterable): Customers to (re)assign. None assigns everyone.
+
+        Returns:
+            pd.DataFrame: customer_unique_id and customer_segment of the assigned customers.
+        """
+        if 'centroids' not in self.model:
+            raise RuntimeError("The store has no fitted model yet. Call refit() first.")
+        customers = self.customers if customer_ids is None else self.customers.loc[list(customer_ids)]
+
+        rfm_log = np.log1p(self._rfm_features(customers).to_numpy(dtype=np.float64))
+        scaled = (rfm_log - np.array(self.model['scaler_mean'])) / np.array(self.model['scaler_scale'])
+        centroids = np.array(self.model['centroids'])
+        distances = ((scaled[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2)
+        segments = distances.argmin(axis=1)
+
+        self.customers.loc[customers.index, 'customer_segment'] = segments
+        return pd.DataFrame({'customer_unique_id': customers.index, 'customer_segment': segments})
+
+    def refit(self, num_clusters: int = 4):
+        """
+        Refits the scaler and K-Means model on every customer in the store and reassigns all
+        segments. Same model as perform_rfm_segmentation(); run it on demand (e.g. nightly).
+        """
+        scaler, kmeans = fit_rfm_model(self._rfm_features(self.customers), num_clusters)
+        self.model.update({
+            'num_clusters': num_clusters,
+            'scaler_mean': scaler.mean_.tolist(),
+            'scaler_scale': scaler.scale_.tolist(),
+            'centroids': kmeans.cluster_centers_.tolist()
+        })
+        self.customers['customer_segment'] = pd.array(kmeans.labels_, dtype='Int64')  # as saved and assigned
+        return self.customers[['customer_segment']].reset_index()
+
+    def save(self):
+        """Writes the store to its directory, replacing the files atomically."""
+        os.makedirs(self.store_dir, exist_ok=True)
+        customers_path = os.path.join(self.store_dir, 'customers.parquet')
+        model_path = os.path.join(self.store_dir, 'model.json')
+
+        customers = self.customers.copy()
+        customers['customer_segment'] = customers['customer_segment'].astype('Int64')
+        customers.to_parquet(customers_path + '.tmp')
+        os.replace(customers_path + '.tmp', customers_path)
+
+        items_path = os.path.join(self.store_dir, 'items.parquet')
+        self.items.to_parquet(items_path + '.tmp', index=False)
+        os.replace(items_path + '.tmp', items_path)
+
+        with open(model_path + '.tmp', 'w') as f:
+            json.dump(self.model, f, indent=2)
+        os.replace(model_path + '.tmp', model_path)
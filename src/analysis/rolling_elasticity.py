@@ -0,0 +1,80 @@
+# src/analysis/rolling_elasticity.py
+
+import pandas as pd
+import numpy as np
+
+from src.analysis.vectorized_ols import simple_ols_from_sums
+
+def _weekly_sufficient_stats(df: pd.DataFrame, include_all: bool = True):
+    """
+    Builds a (categories x weeks x 5) array with the log-log regression sums
+    (n, sum x, sum y, sum x^2, sum xy) of each category in each week.
+    An observation is the demand at one price point within one week.
+    """
+    weeks = df['order_purchase_timestamp'].dt.to_period('W').dt.start_time
+    frame = pd.DataFrame({'category': df['product_category_name_english'].values, 'week': weeks.values,
+                          'price': df['price'].values})
+
+    points = frame.groupby(['category', 'week', 'price']).size().rename('demand').reset_index()
+    if include_all:
+        all_points = frame.groupby(['week', 'price']).size().rename('demand').reset_index()
+        all_points['category'] = 'all'
+        points = pd.concat([points, all_points], ignore_index=True)
+
+    x = np.log(points['price'].values)
+    y = np.log(points['demand'].values)
+    stats = pd.DataFrame({'category': points['category'], 'week': points['week'],
+                          'n': 1.0, 'sx': x, 'sy': y, 'sxx': x * x, 'sxy': x * y})
+    stats = stats.groupby(['category', 'week']).sum()
+
+    categories = stats.index.get_level_values('category').unique()
+    all_weeks = pd.date_range(weeks.min(), weeks.max(), freq='7D')
+    full_index = pd.MultiIndex.from_product([categories, all_weeks], names=['category', 'week'])
+    dense = stats.reindex(full_index, fill_value=0.0).to_numpy()
+    return dense.reshape(len(categories), len(all_weeks), 5), categories, all_weeks
+
+def calculate_rolling_elasticity(df: pd.DataFrame, window_weeks: int = 12, expanding: bool = False,
+                                 min_price_points: int = 10, include_all: bool = True):
+    """
+    Calculates a weekly time series of price elasticity for every category.
+
+    Instead of refitting each window, the regression sums of all categories are updated
+    incrementally: each step adds the entering week's sums and (for rolling windows)
+    subtracts the leaving week's sums, then solves every category at once.
+
+    Args:
+        df (pd.DataFrame): The master dataframe.
+        window_weeks (int): Length of the rolling window in weeks. Ignored if expanding=True.
+        expanding (bool): Use an expanding window (all history up to each week) instead.
+        min_price_points (int): Minimum (week, price) observations in a window to report an elasticity.
+        include_all (bool): Also compute the series for the whole dataset, as category 'all'.
+
+    Returns:
+        pd.DataFrame: Columns 'product_category_name_english', 'week' (last week of the window),
+                      'elasticity', 'n_obs' and 'window'.
+    """
+    stats, categories, weeks = _weekly_sufficient_stats(df, include_all=include_all)
+    num_categories, num_weeks, _ = stats.shape
+
+    state = np.zeros((num_categories, 5))
+    slopes = np.full((num_categories, num_weeks), np.nan)
+    counts = np.zeros((num_categories, num_weeks))
+
+    for w in range(num_weeks):
+        state += stats[:, w]
+        if not expanding and w >= window_weeks:
+            state -= stats[:, w - window_weeks]
+
+        _, slope = simple_ols_from_sums(*state.T)
+        enough = state[:, 0] >= min_price_points
+        slopes[enough, w] = slope[enough]
+        counts[:, w] = state[:, 0]
+
+    result = pd.DataFrame({
+        'product_category_name_english': np.repeat(categories.values, num_weeks),
+        'week': np.tile(weeks.values, num_categories),
+        'elasticity': slopes.ravel(),
+        'n_obs': np.rint(counts.ravel()).astype(int),
+        'window': 'expanding' if expanding else f'rolling_{window_weeks}w'
+    })
+    return result.dropna(subset=['elasticity']).reset_index(drop=True)
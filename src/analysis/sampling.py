@@ -0,0 +1,195 @@
+# src/analysis/sampling.py
+
+from statistics import NormalDist
+
+import pandas as pd
+import numpy as np
+
+# Columns added to the master dataframe by build_stratified_sample()
+SAMPLE_COLUMNS = ['stratum', 'sample_weight', 'order_share', 'customer_share',
+                  'price_point_demand', 'all_price_point_demand']
+
+def build_stratified_sample(df: pd.DataFrame, fraction: float = 0.05, min_per_stratum: int = 30,
+                            random_state: int = 42):
+    """
+    Draws a stratified random sample of order items, with product category x purchase month as strata.
+
+    Every stratum keeps `fraction` of its rows, but at least `min_per_stratum` (or all of them),
+    so small categories and months are still represented. Each sampled row carries the columns
+    the estimators below need:
+        - stratum: the stratum id.
+        - sample_weight: rows in the stratum / rows sampled from it (inverse inclusion probability).
+        - order_share, customer_share: 1 / the number of rows of the row's order (customer) in the
+          full data, so weighted sums of them estimate the number of distinct orders (customers).
+        - price_point_demand, all_price_point_demand: items sold at the row's price in its category
+          (in the whole dataset), i.e. the demand of its point in the price-point elasticity model.
+
+    Args:
+        df (pd.DataFrame): The master dataframe.
+        fraction (float): Share of each stratum to sample, in (0, 1].
+        min_per_stratum (int): Minimum rows sampled per stratum.
+        random_state (int): Seed for a reproducible sample.
+
+    Returns:
+        pd.DataFrame: The sampled rows, with the master columns plus SAMPLE_COLUMNS.
+    """
+    if not 0 < fraction <= 1:
+        raise ValueError("fraction must be in (0, 1].")
+
+    month = df['order_purchase_timestamp'].dt.to_period('M')
+    stratum = df.groupby([df['product_category_name_english'], month], sort=True).ngroup().to_numpy()
+    stratum_size = np.bincount(stratum)
+    n_sampled = np.minimum(stratum_size, np.maximum(np.ceil(fraction * stratum_size), min_per_stratum)).astype(np.int64)
+
+    # A random permutation sorted by stratum: the first n_h rows of each stratum are its sample
+    rng = np.random.default_rng(random_state)
+    order = np.lexsort((rng.random(len(df)), stratum))
+    rank = np.empty(len(df), dtype=np.int64)
+    starts = np.concatenate([[0], np.cumsum(stratum_size)[:-1]])
+    rank[order] = np.arange(len(df)) - np.repeat(starts, stratum_size)
+    keep = rank < n_sampled[stratum]
+
+    order_rows = df.groupby('order_id')['order_id'].transform('size').to_numpy()
+    customer_rows = df.groupby('customer_unique_id')['customer_unique_id'].transform('size').to_numpy()
+    point_demand = df.groupby(['product_category_name_english', 'price'])['price'].transform('size').to_numpy()
+    all_point_demand = df.groupby('price')['price'].transform('size').to_numpy()
+
+    sample = df[keep].copy()
+    sample['stratum'] = stratum[keep]
+    sample['sample_weight'] = (stratum_size / n_sampled)[stratum[keep]]
+    sample['order_share'] = 1.0 / order_rows[keep]
+    sample['customer_share'] = 1.0 / customer_rows[keep]
+    sample['price_point_demand'] = point_demand[keep]
+    sample['all_price_point_demand'] = all_point_demand[keep]
+    return sample.reset_index(drop=True)
+
+def is_sample(df: pd.DataFrame):
+    """True if the dataframe is a stratified sample from build_stratified_sample()."""
+    return 'sample_weight' in df.columns
+
+def estimate_totals(sample: pd.DataFrame, values, by=None, ci: float = 0.95):
+    """
+    Estimates population totals of `values` from a stratified sample, with normal confidence bounds.
+
+    Totals are weighted sums (Horvitz-Thompson). Their variance is the usual stratified
+    sampling variance, sum_h N_h^2 (1 - n_h / N_h) s_h^2 / n_h, where for a group (e.g. a day
+    or a category) s_h^2 is the variance over the stratum of the values zeroed outside the group.
+
+    Args:
+        sample (pd.DataFrame): A sample from build_stratified_sample().
+        values (pd.Series or str): Values to total, aligned with the sample, or a column name.
+        by (pd.Series or str): Optional grouping, aligned with the sample, or a column name.
+        ci (float): Confidence level of the bounds.
+
+    Returns:
+        pd.DataFrame: 'estimate', 'lower' and 'upper' columns, one row per group (a single
+                      row without `by`).
+    """
+    values = sample[values] if isinstance(values, str) else values
+    if by is None:
+        group = pd.Series(0, index=sample.index)
+    else:
+        group = sample[by] if isinstance(by, str) else by
+
+    values = values.astype(np.float64)
+    frame = pd.DataFrame({'stratum': sample['stratum'], 'group': group, 'v': values,
+                          'wv': sample['sample_weight'] * values, 'vv': values ** 2})
+    per_cell = frame.groupby(['group', 'stratum'], observed=True).agg(wv=('wv', 'sum'), s=('v', 'sum'), ss=('vv', 'sum'))
+
+    # Sampled (n_h) and population (N_h) rows of each cell's stratum
+    strata = sample.groupby('stratum')['sample_weight'].agg(['size', 'first'])
+    cell_strata = strata.reindex(per_cell.index.get_level_values('stratum'))
+    n = cell_strata['size'].to_numpy(dtype=np.float64)
+    N = n * cell_strata['first'].to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s2 = np.where(n > 1, (per_cell['ss'].to_numpy() - per_cell['s'].to_numpy() ** 2 / n) / (n - 1), 0.0)
+        variance = N ** 2 * (1 - n / N) * np.clip(s2, 0, None) / n
+    per_cell['variance'] = variance
+
+    totals = per_cell.groupby(level='group')[['wv', 'variance']].sum()
+    z = NormalDist().inv_cdf(0.5 + ci / 2)
+    half_width = z * np.sqrt(totals['variance'])
+    result = pd.DataFrame({'estimate': totals['wv'], 'lower': totals['wv'] - half_width,
+                           'upper': totals['wv'] + half_width})
+    return result.reset_index(drop=True) if by is None else result
+
+def estimate_ratio(sample: pd.DataFrame, numerator, denominator, ci: float = 0.95):
+    """
+    Estimates a ratio of two population totals (e.g. revenue per order) from a stratified sample.
+    The bounds use the linearized variance, Var(Y - R X) / X^2.
+
+    Args:
+        sample (pd.DataFrame): A sample from build_stratified_sample().
+        numerator, denominator (pd.Series or str): Values (or column names) whose totals form the ratio.
+        ci (float): Confidence level of the bounds.
+
+    Returns:
+        tuple: (estimate, lower, upper).
+    """
+    numerator = sample[numerator] if isinstance(numerator, str) else numerator
+    denominator = sample[denominator] if isinstance(denominator, str) else denominator
+    weight = sample['sample_weight']
+    total_x = (weight * denominator).sum()
+    if total_x == 0:
+        return np.nan, np.nan, np.nan
+    ratio = (weight * numerator).sum() / total_x
+    residual = estimate_totals(sample, numerator - ratio * denominator, ci=ci).iloc[0]
+    half_width = (residual['upper'] - residual['estimate']) / total_x
+    return ratio, ratio - half_width, ratio + half_width
+
+def estimate_kpis(sample: pd.DataFrame, ci: float = 0.95):
+    """
+    Estimates the Executive Dashboard KPIs from a stratified sample.
+
+    Returns:
+        dict: KPI name -> (estimate, lower, upper) for 'total_revenue', 'total_orders',
+              'unique_customers' and 'avg_order_value'.
+    """
+    kpis = {}
+    for name, column in [('total_revenue', 'price'), ('total_orders', 'order_share'),
+                         ('unique_customers', 'customer_share')]:
+        row = estimate_totals(sample, column, ci=ci).iloc[0]
+        kpis[name] = (row['estimate'], row['lower'], row['upper'])
+    kpis['avg_order_value'] = estimate_ratio(sample, 'price', 'order_share', ci=ci)
+    return kpis
+
+def estimate_elasticity_bounds(sample: pd.DataFrame, model, product_category: str = 'all', ci: float = 0.95):
+    """
+    Confidence bounds for the price-point elasticity that calculate_elasticity_and_model() fits on a
+    stratified sample.
+
+    On a sample that model is a weighted regression over the sampled price points, each weighted by
+    the full-data points it stands for; per row, that is sample_weight / demand of its price point.
+    The bounds linearize its slope, whose influence values are then totalled with the stratified
+    variance of estimate_totals().
+
+    Args:
+        sample (pd.DataFrame): A sample from build_stratified_sample().
+        model: The model calculate_elasticity_and_model() fitted on the same sample and category.
+        product_category (str): The category of the model. 'all' for the whole dataset.
+        ci (float): Confidence level of the bounds.
+
+    Returns:
+        tuple: (lower, upper). Returns (None, None) if the prices do not vary.
+    """
+    if product_category != 'all':
+        rows = sample[sample['product_category_name_english'] == product_category]
+        demand = rows['price_point_demand']
+    else:
+        rows = sample
+        demand = rows['all_price_point_demand']
+
+    x, y = np.log(rows['price']), np.log(demand)
+    share = 1.0 / demand
+    w = rows['sample_weight'] * share
+    x_mean = (w * x).sum() / w.sum()
+    sxx = (w * (x - x_mean) ** 2).sum()
+    if sxx <= 0:
+        return None, None
+
+    slope = model.params['log_price']
+    residual = y - model.params['const'] - slope * x
+    influence = (x - x_mean) * residual / sxx
+    bounds = estimate_totals(rows, influence * share, ci=ci).iloc[0]
+    half_width = bounds['upper'] - bounds['estimate']
+    return slope - half_width, slope + half_width
@@ -0,0 +1,157 @@
+# src/analysis/scenarios.py
+
+import pandas as pd
+import numpy as np
+
+from src.analysis.product_elasticity import _log_log_sums
+
+def _ols_slope_and_se(n, sx, sy, sxx, sxy, syy):
+    """Slope and its standard error for many simple regressions at once, from their sums."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sxx_c = sxx - sx * sx / n
+        sxy_c = sxy - sx * sy / n
+        syy_c = syy - sy * sy / n
+        slope = sxy_c / sxx_c
+        rss = np.clip(syy_c - slope * sxy_c, 0, None)
+        se = np.sqrt(rss / (n - 2) / sxx_c)
+    return slope, se
+
+def estimate_elasticity_matrix(df: pd.DataFrame, min_weeks: int = 15, min_price_points: int = 10,
+                               baseline_weeks: int = 12):
+    """
+    Estimates the full category x category price elasticity matrix, with standard errors.
+
+    Off-diagonal entries are the weekly log-log cross-price elasticities of
+    calculate_cross_price_elasticity() (demand of the row category on the average price of the
+    column category), computed for every pair at once as matrix products of weekly sums.
+    Diagonal entries are the own-price elasticities of calculate_elasticity_and_model().
+
+    Args:
+        df (pd.DataFrame): The master dataframe.
+        min_weeks (int): Overlapping weeks a pair needs; pairs with fewer get a zero cross effect.
+        min_price_points (int): Distinct prices a category needs for its own-price elasticity;
+            categories with fewer use the elasticity of the whole dataset.
+        baseline_weeks (int): Recent weeks averaged for the baseline price and weekly demand.
+
+    Returns:
+        dict: 'elasticity' and 'std_error' (DataFrames indexed by demand category, with price
+              categories as columns) and 'baseline' (avg_price and weekly_demand per category).
+    """
+    # 1. Weekly demand (items sold) and average price per category, same weeks as resample('W')
+    weeks = df['order_purchase_timestamp'].dt.to_period('W-SUN')
+    weekly = df.groupby(['product_category_name_english', weeks]).agg(
+        demand=('order_item_id', 'count'), avg_price=('price', 'mean'))
+    demand = weekly['demand'].unstack(fill_value=0)
+    avg_price = weekly['avg_price'].unstack()
+    categories = demand.index
+
+    has_demand = (demand > 0).to_numpy(dtype=np.float64)
+    has_price = (avg_price > 0).to_numpy(dtype=np.float64)
+    log_demand = np.log(demand.where(demand > 0, 1)).to_numpy()
+    log_price = np.log(avg_price.where(avg_price > 0, 1)).to_numpy()
+
+    # 2. Regression sums for every (demand category, price category) pair over their shared weeks
+    y, x = has_demand * log_demand, has_price * log_price
+    n = has_demand @ has_price.T
+    sums = dict(n=n, sx=has_demand @ x.T, sy=y @ has_price.T, sxx=has_demand @ (x * x).T,
+                sxy=y @ x.T, syy=(y * log_demand) @ has_price.T)
+    elasticity, std_error = _ols_slope_and_se(**sums)
+    too_few = (n < min_weeks) | ~np.isfinite(elasticity) | ~np.isfinite(std_error)
+    elasticity[too_few], std_error[too_few] = 0.0, 0.0
+
+    # 3. Own-price elasticities on the diagonal (price-point model of the Price Optimization Lab)
+    points = df.groupby(['product_category_name_english', 'price']).size().rename('demand').reset_index()
+    overall = df.groupby('price').size().rename('demand').reset_index()
+    overall['product_category_name_english'] = 'all'
+    own = _log_log_sums(pd.concat([points, overall], ignore_index=True), ['product_category_name_english'])
+    own_slope, own_se = _ols_slope_and_se(own['n'], own['sx'], own['sy'], own['sxx'], own['sxy'], own['syy'])
+    own = pd.DataFrame({'elasticity': own_slope, 'std_error': own_se, 'n': own['n']}, index=own.index)
+    fallback = own.loc['all']
+    own = own.reindex(categories)
+    use_fallback = (own['n'] < min_price_points) | own['elasticity'].isna() | own['std_error'].isna()
+    own.loc[use_fallback, ['elasticity', 'std_error']] = fallback[['elasticity', 'std_error']].values
+    np.fill_diagonal(elasticity, own['elasticity'].to_numpy())
+    np.fill_diagonal(std_error, own['std_error'].to_numpy())
+
+    # 4. Baseline: recent average price and weekly demand
+    recent = demand.columns[-baseline_weeks:]
+    baseline = pd.DataFrame({
+        'avg_price': avg_price[recent].mean(axis=1).fillna(avg_price.mean(axis=1)),
+        'weekly_demand': demand[recent].mean(axis=1)
+    })
+
+    return {
+        'elasticity': pd.DataFrame(elasticity, index=categories, columns=categories),
+        'std_error': pd.DataFrame(std_error, index=categories, columns=categories),
+        'baseline': baseline
+    }
+
+def simulate_price_scenario(elasticity_model: dict, price_changes: dict, n_draws: int = 10000,
+                            include_cross: bool = True, min_cross_t: float = 2.0, random_state: int = 42):
+    """
+    Monte Carlo simulation of weekly demand and revenue under price changes for many categories.
+
+    The log demand change of category i is sum_j E[i, j] * log(1 + change_j). Parameter
+    uncertainty treats every elasticity as an independent normal around its estimate, so each
+    category's log demand change is itself normal, with variance sum_j SE[i, j]^2 * log(1 + change_j)^2.
+    All draws are therefore a single (n_draws x categories) array, whatever the number of price changes.
+
+    Args:
+        elasticity_model (dict): Output of estimate_elasticity_matrix().
+        price_changes (dict): Category -> relative price change (e.g. {'toys': 0.10} for +10%).
+        n_draws (int): Monte Carlo draws.
+        include_cross (bool): Propagate cross-price effects (False keeps own-price effects only).
+        min_cross_t (float): Cross elasticities with |estimate / std_error| below this are treated
+            as zero, so noise from unrelated pairs does not add up across many categories.
+        random_state (int): Seed for reproducible draws.
+
+    Returns:
+        tuple: (category_summary, total_revenue_draws). category_summary has one row per category
+               with its price change, baseline and simulated weekly demand and revenue (mean and
+               5th/95th percentiles); total_revenue_draws is the simulated total weekly revenue.
+    """
+    E = elasticity_model['elasticity']
+    categories = E.index
+    unknown = set(price_changes) - set(categories)
+    if unknown:
+        raise ValueError(f"Unknown categories in the scenario: {sorted(unknown)}")
+
+    change = pd.Series(price_changes, dtype=np.float64).reindex(categories, fill_value=0.0)
+    if (change <= -1).any():
+        raise ValueError("Price changes must be greater than -100%.")
+    log_change = np.log1p(change.to_numpy())
+
+    elasticity = E.to_numpy().copy()
+    std_error = elasticity_model['std_error'].to_numpy().copy()
+    off_diagonal = ~np.eye(len(categories), dtype=bool)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weak = off_diagonal & ~(np.abs(elasticity / std_error) >= min_cross_t)
+    if not include_cross:
+        weak = off_diagonal
+    elasticity[weak], std_error[weak] = 0.0, 0.0
+
+    mean_log_effect = elasticity @ log_change
+    sd_log_effect = np.sqrt((std_error ** 2) @ (log_change ** 2))
+    rng = np.random.default_rng(random_state)
+    log_effect = mean_log_effect + sd_log_effect * rng.standard_normal((n_draws, len(categories)))
+
+    baseline = elasticity_model['baseline']
+    base_demand = baseline['weekly_demand'].to_numpy()
+    new_price = baseline['avg_price'].to_numpy() * (1 + change.to_numpy())
+    demand_draws = base_demand * np.exp(log_effect)                                   # n_draws x C
+    revenue_draws = demand_draws * new_price
+
+    summary = pd.DataFrame({
+        'price_change': change.to_numpy(),
+        'baseline_price': baseline['avg_price'].to_numpy(),
+        'new_price': new_price,
+        'baseline_weekly_demand': base_demand,
+        'weekly_demand_mean': demand_draws.mean(axis=0),
+        'weekly_demand_p5': np.percentile(demand_draws, 5, axis=0),
+        'weekly_demand_p95': np.percentile(demand_draws, 95, axis=0),
+        'baseline_weekly_revenue': base_demand * baseline['avg_price'].to_numpy(),
+        'weekly_revenue_mean': revenue_draws.mean(axis=0),
+        'weekly_revenue_p5': np.percentile(revenue_draws, 5, axis=0),
+        'weekly_revenue_p95': np.percentile(revenue_draws, 95, axis=0)
+    }, index=categories).reset_index()
+    return summary, revenue_draws.sum(axis=1)
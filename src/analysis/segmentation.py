@@ -1,55 +1,159 @@
 # src/analysis/segmentation.py
 
+import time
 import pandas as pd
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
 import numpy as np
 
-def perform_rfm_segmentation(df: pd.DataFrame, num_clusters: int = 4):
+# scikit-learn and joblib are imported inside the functions that use them, so importing this
+# module (e.g. from a Streamlit page) does not pay for them until a model is actually fitted.
+
+def aggregate_customer_orders(df: pd.DataFrame):
     """
-    Performs customer segmentation using RFM analysis and K-Means clustering.
+    Aggregates order rows per customer: last purchase time, distinct orders and total spend.
+
+    Returns:
+        pd.DataFrame: Indexed by customer_unique_id with 'last_purchase', 'frequency' and 'monetary' columns.
+    """
+    # Convert timestamp to datetime if not already (without mutating the caller's frame,
+    # which the pipeline shares between concurrently running stages)
+    timestamps = pd.to_datetime(df['order_purchase_timestamp'])
+
+    return df.assign(order_purchase_timestamp=timestamps).groupby('customer_unique_id').agg(
+        last_purchase=('order_purchase_timestamp', 'max'),
+        frequency=('order_id', 'nunique'), # Frequency
+        monetary=('price', 'sum') # Monetary Value
+    )
+
+def calculate_rfm_features(df: pd.DataFrame):
+    """
+    Calculates Recency, Frequency and Monetary value for every customer.
 
     Args:
         df (pd.DataFrame): The master dataframe.
-        num_clusters (int): The number of customer segments to create.
 
     Returns:
-        pd.DataFrame: A dataframe with customer_unique_id and their assigned segment.
+        pd.DataFrame: Indexed by customer_unique_id with 'recency', 'frequency' and 'monetary' columns.
     """
-    # 1. Calculate RFM Features
-    # Convert timestamp to datetime if not already
-    df['order_purchase_timestamp'] = pd.to_datetime(df['order_purchase_timestamp'])
+    # Aggregate data at the customer level
+    rfm_df = aggregate_customer_orders(df)
 
     # Set the 'snapshot date' for recency calculation (one day after the last order)
-    snapshot_date = df['order_purchase_timestamp'].max() + pd.Timedelta(days=1)
-    
-    # Aggregate data at the customer level
-    rfm_df = df.groupby('customer_unique_id').agg({
-        'order_purchase_timestamp': lambda date: (snapshot_date - date.max()).days, # Recency
-        'order_id': 'nunique', # Frequency
-        'price': 'sum' # Monetary Value
-    })
-
-    # Rename the columns
-    rfm_df.rename(columns={
-        'order_purchase_timestamp': 'recency',
-        'order_id': 'frequency',
-        'price': 'monetary'
-    }, inplace=True)
-
-    # 2. Handle potential skew in the data (log transform) and scale features
+    snapshot_date = rfm_df['last_purchase'].max() + pd.Timedelta(days=1)
+    rfm_df.insert(0, 'recency', (snapshot_date - rfm_df.pop('last_purchase')).dt.days) # Recency
+    return rfm_df
+
+def scale_rfm_features(rfm_df: pd.DataFrame):
+    """
+    Log-transforms and standardizes RFM features.
+
+    Returns:
+        tuple: (rfm_scaled, fitted StandardScaler).
+    """
+    from sklearn.preprocessing import StandardScaler
+
     # Log transform helps normalize data with a wide range of values
-    rfm_log = np.log1p(rfm_df) # log1p is log(1+x) to handle zero values
-    
+    rfm_log = np.log1p(rfm_df[['recency', 'frequency', 'monetary']]) # log1p is log(1+x) to handle zero values
+
     scaler = StandardScaler()
     rfm_scaled = scaler.fit_transform(rfm_log)
+    return rfm_scaled, scaler
+
+def fit_rfm_model(rfm_df: pd.DataFrame, num_clusters: int = 4):
+    """
+    Fits the scaler and K-Means model used for RFM segmentation.
+
+    Returns:
+        tuple: (fitted StandardScaler, fitted KMeans).
+    """
+    from sklearn.cluster import KMeans
+
+    # Handle potential skew in the data (log transform) and scale features
+    rfm_scaled, scaler = scale_rfm_features(rfm_df)
 
-    # 3. Apply K-Means Clustering
     kmeans = KMeans(n_clusters=num_clusters, init='k-means++', random_state=42, n_init=10)
     kmeans.fit(rfm_scaled)
-    
+    return scaler, kmeans
+
+def perform_rfm_segmentation(df: pd.DataFrame, num_clusters: int = 4):
+    """
+    Performs customer segmentation using RFM analysis and K-Means clustering.
+
+    Args:
+        df (pd.DataFrame): The master dataframe.
+        num_clusters (int): The number of customer segments to create.
+
+    Returns:
+        pd.DataFrame: A dataframe with customer_unique_id and their assigned segment.
+    """
+    # 1. Calculate RFM Features
+    rfm_df = calculate_rfm_features(df)
+
+    # 2. Scale features and apply K-Means Clustering
+    _, kmeans = fit_rfm_model(rfm_df, num_clusters)
+
     # Assign the cluster label back to the original RFM dataframe
     rfm_df['customer_segment'] = kmeans.labels_
-    
+
     # Return only the customer ID and their segment
-    return rfm_df[['customer_segment']].reset_index()
\ No newline at end of file
+    return rfm_df[['customer_segment']].reset_index()
+
+def _stratified_sample(labels: np.ndarray, sample_size: int, rng, min_per_cluster: int = 50):
+    """Samples row indices proportionally from every cluster, with a floor so small clusters are represented."""
+    indices = []
+    clusters, sizes = np.unique(labels, return_counts=True)
+    for cluster, size in zip(clusters, sizes):
+        take = min(size, max(min_per_cluster, int(round(sample_size * size / len(labels)))))
+        indices.append(rng.choice(np.flatnonzero(labels == cluster), size=take, replace=False))
+    return np.concatenate(indices)
+
+def _score_num_clusters(X: np.ndarray, k: int, fit_sample_size: int, silhouette_sample_size: int, random_state: int):
+    from sklearn.cluster import KMeans
+    from sklearn.metrics import davies_bouldin_score, silhouette_score
+
+    start = time.perf_counter()
+    rng = np.random.default_rng(random_state + k)
+
+    # Fit on a sample for very large customer bases, then assign every customer
+    fit_rows = rng.choice(len(X), size=fit_sample_size, replace=False) if len(X) > fit_sample_size else slice(None)
+    kmeans = KMeans(n_clusters=k, init='k-means++', random_state=random_state, n_init=3).fit(X[fit_rows])
+    labels = kmeans.predict(X)
+    inertia = ((X - kmeans.cluster_centers_[labels]) ** 2).sum()
+
+    sample = _stratified_sample(labels, silhouette_sample_size, rng)
+    return {
+        'k': k,
+        'inertia': inertia,
+        'davies_bouldin': davies_bouldin_score(X, labels),
+        'silhouette': silhouette_score(X[sample], labels[sample]),
+        'fit_seconds': time.perf_counter() - start
+    }
+
+def select_num_clusters(df: pd.DataFrame, k_values=range(2, 11), silhouette_sample_size: int = 5000,
+                        fit_sample_size: int = 200000, n_jobs: int = -1, random_state: int = 42):
+    """
+    Compares K-Means fits over a range of cluster counts, in parallel across cores.
+
+    The O(n^2) silhouette is computed on a sample stratified by cluster; inertia and
+    Davies-Bouldin are computed on every customer.
+
+    Args:
+        df (pd.DataFrame): The master dataframe.
+        k_values (iterable): Cluster counts to try.
+        silhouette_sample_size (int): Customers sampled for the silhouette score.
+        fit_sample_size (int): Maximum customers used to fit each K-Means model.
+        n_jobs (int): Parallel workers (-1 uses all cores).
+        random_state (int): Seed for the fits and samples.
+
+    Returns:
+        pd.DataFrame: One row per k with 'inertia', 'davies_bouldin' (lower is better),
+                      'silhouette' (higher is better) and 'fit_seconds'.
+    """
+    from joblib import Parallel, delayed
+
+    rfm_scaled, _ = scale_rfm_features(calculate_rfm_features(df))
+
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_score_num_clusters)(rfm_scaled, k, fit_sample_size, silhouette_sample_size, random_state)
+        for k in k_values
+    )
+    return pd.DataFrame(results).sort_values('k').reset_index(drop=True)
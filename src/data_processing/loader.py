@@ -3,6 +3,64 @@
 import pandas as pd
 import os
 
+# Raw Olist CSVs read by the loader
+RAW_DATA_FILES = {
+    'customers': 'olist_customers_dataset.csv',
+    'orders': 'olist_orders_dataset.csv',
+    'order_items': 'olist_order_items_dataset.csv',
+    'products': 'olist_products_dataset.csv',
+    'translation': 'product_category_name_translation.csv'
+}
+
+# Column order and dtypes of the final dataset used by the app. Both the MySQL path
+# (scripts 1-3) and the database-free pipeline path export exactly this schema.
+MASTER_SCHEMA = {
+    'order_id': str,
+    'order_item_id': 'int64',
+    'product_id': str,
+    'price': 'float64',
+    'freight_value': 'float64',
+    'customer_id': str,
+    'order_purchase_timestamp': 'datetime64[ns]',
+    'customer_unique_id': str,
+    'customer_zip_code_prefix': 'int64',
+    'customer_city': str,
+    'customer_state': str,
+    'product_category_name_english': str,
+    'customer_segment': 'Int64'  # nullable: customers loaded after the last segmentation have none yet
+}
+
+def enforce_master_schema(df):
+    """
+    Selects and casts the columns of a segmented master dataframe to MASTER_SCHEMA.
+
+    Prices are rounded to cents to match the DECIMAL(10, 2) columns of the MySQL master_table.
+
+    Args:
+        df (pandas.DataFrame): The segmented master dataframe.
+
+    Returns:
+        pandas.DataFrame: The dataframe with the canonical column order and dtypes.
+    """
+    df = df[list(MASTER_SCHEMA)].astype(MASTER_SCHEMA)
+    df[['price', 'freight_value']] = df[['price', 'freight_value']].round(2)
+    return df.reset_index(drop=True)
+
+def load_app_data(file_path):
+    """
+    Reads the app's Parquet export and restores the dtypes the dashboard pages expect.
+
+    Args:
+        file_path (str): Path to master_data.parquet.
+
+    Returns:
+        pandas.DataFrame: The master dataframe, with customer_segment as a category.
+    """
+    df = pd.read_parquet(file_path)
+    df['order_purchase_timestamp'] = pd.to_datetime(df['order_purchase_timestamp'])
+    df['customer_segment'] = df['customer_segment'].astype('category')
+    return df
+
 def load_and_prepare_data(data_path):
     """
     Loads all Olist CSVs, merges them into a single master dataframe,
@@ -15,16 +73,8 @@ def load_and_prepare_data(data_path):
         pandas.DataFrame: The cleaned and merged master dataframe.
     """
     # 1. Load all necessary CSVs into pandas DataFrames
-    files = {
-        'customers': 'olist_customers_dataset.csv',
-        'orders': 'olist_orders_dataset.csv',
-        'order_items': 'olist_order_items_dataset.csv',
-        'products': 'olist_products_dataset.csv',
-        'translation': 'product_category_name_translation.csv'
-    }
-
     data = {}
-    for name, filename in files.items():
+    for name, filename in RAW_DATA_FILES.items():
         data[name] = pd.read_csv(os.path.join(data_path, filename))
 
     # 2. Merge the dataframes
@@ -0,0 +1,191 @@
+# src/data_processing/partitions.py
+
+import glob
+import hashlib
+import json
+import os
+import threading
+
+import pandas as pd
+
+from src.data_processing.loader import load_app_data
+
+MANIFEST_NAME = '_manifest.json'
+PARTITION_COLUMN = 'order_purchase_timestamp'
+CATEGORY_COLUMN = 'product_category_name_english'
+
+# ========================= WRITER =========================
+# The app dataset is stored as one Parquet file per purchase month plus a manifest listing them.
+# Every manifest entry carries a content hash of its partition and of each category's rows in
+# it, so a reader can tell which partitions to reload and which categories they touch.
+# Partition files are never modified in place: changed content gets a new file name, and the
+# manifest is swapped in atomically once all new files exist.
+
+def _row_hash_digest(row_hashes):
+    return hashlib.sha1(row_hashes.tobytes()).hexdigest()
+
+def _partition_entry(file_name: str, part: pd.DataFrame, row_hashes):
+    categories = part[CATEGORY_COLUMN].to_numpy()
+    category_rows = pd.Series(range(len(part))).groupby(categories, sort=True).indices
+    return {
+        'file': file_name,
+        'rows': len(part),
+        'hash': _row_hash_digest(row_hashes),
+        'categories': {str(category): _row_hash_digest(row_hashes[rows]) for category, rows in category_rows.items()}
+    }
+
+def read_manifest(directory: str):
+    """The partition manifest of a dataset directory, or None if there is none."""
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def write_partitioned_dataset(df: pd.DataFrame, directory: str):
+    """
+    Writes the app dataset as monthly Parquet partitions with a manifest, rewriting only the
+    partitions whose content changed since the last export.
+
+    Args:
+        df (pd.DataFrame): The master dataframe, with the MASTER_SCHEMA columns.
+        directory (str): The dataset directory (created if needed).
+
+    Returns:
+        dict: Partition keys ('YYYY-MM') that were 'added', 'changed' and 'removed'.
+    """
+    os.makedirs(directory, exist_ok=True)
+    previous = (read_manifest(directory) or {}).get('partitions', {})
+    schema = [f"{column}:{dtype}" for column, dtype in df.dtypes.astype(str).items()]
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    months = df[PARTITION_COLUMN].dt.strftime('%Y-%m').to_numpy()
+
+    partitions, changes = {}, {'added': [], 'changed': [], 'removed': []}
+    for month, rows in sorted(pd.Series(range(len(df))).groupby(months).indices.items()):
+        part = df.iloc[rows].reset_index(drop=True)
+        content_hash = _row_hash_digest(row_hashes[rows])
+        old = previous.get(month)
+        if old is not None and old['hash'] == content_hash and old.get('schema') == schema \
+                and os.path.exists(os.path.join(directory, old['file'])):
+            partitions[month] = old
+            continue
+
+        file_name = f"month={month}.{content_hash[:12]}.parquet"
+        path = os.path.join(directory, file_name)
+        part.to_parquet(path + '.tmp', index=False)
+        os.replace(path + '.tmp', path)
+        partitions[month] = dict(_partition_entry(file_name, part, row_hashes[rows]), schema=schema)
+        changes['changed' if old is not None else 'added'].append(month)
+    changes['removed'] = sorted(set(previous) - set(partitions))
+
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump({'partition_column': PARTITION_COLUMN, 'partition_by': 'month', 'partitions': partitions}, f, indent=1)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+    # Files no longer listed are removed only after the new manifest is in place
+    current = {entry['file'] for entry in partitions.values()}
+    for path in glob.glob(os.path.join(directory, 'month=*.parquet')):
+        if os.path.basename(path) not in current:
+            os.remove(path)
+    return changes
+
+# ========================= INCREMENTAL READER =========================
+
+class IncrementalDataset:
+    """
+    The partitioned app dataset in memory, kept current by reloading only the partitions whose
+    manifest entry changed.
+
+    Besides the master dataframe (`df`), the dataset maintains rollups: aggregates computed per
+    partition and concatenated, such as the daily revenue of every category. Rollup functions
+    must aggregate within months (e.g. by day or by month), so the partial results never overlap.
+
+    Versions are content hashes taken from the manifest. `version` changes with any change to
+    the data; category_version() changes only when that category's rows change, so caches keyed
+    on it survive refreshes that do not touch the category.
+
+    Args:
+        directory (str): The dataset directory written by write_partitioned_dataset().
+        rollups (dict): Rollup name -> function taking a partition's dataframe.
+    """
+
+    def __init__(self, directory: str, rollups: dict = None):
+        self.directory = directory
+        self.rollup_functions = dict(rollups or {})
+        self.df = pd.DataFrame()
+        self.rollups = {}
+        self.version = None
+        self.category_versions = {}
+        self._entries, self._frames = {}, {}
+        self._rollup_parts = {name: {} for name in self.rollup_functions}
+        self._manifest_stat = None
+        self._lock = threading.Lock()  # sessions (and job threads) may refresh concurrently
+
+    def category_version(self, category: str):
+        """The version of one category's rows; the dataset version for 'all' or 'All Products'."""
+        if category in ('all', 'All Products'):
+            return self.version
+        return self.category_versions.get(category)
+
+    def refresh(self):
+        """
+        Loads new and changed partitions, drops removed ones, and rebuilds `df` and the rollups
+        from the partitions in memory. Only the manifest is checked when nothing changed.
+
+        Returns:
+            set: The categories whose rows changed (empty if the data did not change).
+        """
+        manifest_path = os.path.join(self.directory, MANIFEST_NAME)
+        with self._lock:
+            try:
+                stat = os.stat(manifest_path)
+            except FileNotFoundError:
+                return set()
+            if (stat.st_size, stat.st_mtime_ns) == self._manifest_stat:
+                return set()
+
+            entries = (read_manifest(self.directory) or {}).get('partitions', {})
+            changed = [key for key, entry in entries.items()
+                       if self._entries.get(key, {}).get('hash') != entry['hash']]
+            removed = [key for key in self._entries if key not in entries]
+            try:
+                loaded = {key: load_app_data(os.path.join(self.directory, entries[key]['file'])) for key in changed}
+            except FileNotFoundError:
+                # A newer export replaced the manifest while we read it; pick that up on the next refresh
+                return set()
+
+            affected = set()
+            for key in changed + removed:
+                old = self._entries.get(key, {}).get('categories', {})
+                new = entries[key]['categories'] if key in entries else {}
+                affected |= {category for category in old.keys() | new.keys() if old.get(category) != new.get(category)}
+
+            for key in removed:
+                del self._frames[key]
+                for parts in self._rollup_parts.values():
+                    parts.pop(key, None)
+            for key, frame in loaded.items():
+                self._frames[key] = frame
+                for name, func in self.rollup_functions.items():
+                    self._rollup_parts[name][key] = func(frame)
+
+            if changed or removed:
+                keys = sorted(self._frames)
+                self.df = pd.concat([self._frames[key] for key in keys], ignore_index=True) if keys else pd.DataFrame()
+                if keys:
+                    # Categories must be unioned, or partitions with different segments would concat to object
+                    self.df['customer_segment'] = self.df['customer_segment'].astype('category')
+                self.rollups = {name: pd.concat([parts[key] for key in keys], ignore_index=True) if keys else pd.DataFrame()
+                                for name, parts in self._rollup_parts.items()}
+
+            self._entries = entries
+            self._manifest_stat = (stat.st_size, stat.st_mtime_ns)
+            self.version = hashlib.sha1(''.join(f"{key}:{entries[key]['hash']}" for key in sorted(entries)).encode()).hexdigest()
+            category_hashes = {}
+            for key in sorted(entries):
+                for category, digest in entries[key]['categories'].items():
+                    category_hashes.setdefault(category, []).append(f"{key}:{digest}")
+            self.category_versions = {category: hashlib.sha1(''.join(hashes).encode()).hexdigest()
+                                      for category, hashes in category_hashes.items()}
+            return affected
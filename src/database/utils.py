@@ -1,19 +1,24 @@
 # src/database/utils.py
 
 import configparser
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, types, text
+from sqlalchemy.dialects import mysql
 import os
+import pandas as pd
 from urllib.parse import quote_plus # <-- IMPORT THIS
 
+def _read_config():
+    config_path = os.path.join(os.path.dirname(__file__), '..', '..', 'config', 'config.ini')
+    config = configparser.ConfigParser()
+    config.read(config_path)
+    return config
+
 def get_db_engine():
     """
     Creates and returns a SQLAlchemy engine for connecting to the MySQL database.
     It reads credentials from the config.ini file and URL-encodes the password.
     """
-    config_path = os.path.join(os.path.dirname(__file__), '..', '..', 'config', 'config.ini')
-    
-    config = configparser.ConfigParser()
-    config.read(config_path)
+    config = _read_config()
 
     try:
         host = config['mysql']['host']
@@ -41,4 +46,238 @@ def get_db_engine():
     except Exception as e:
         print(f"Error creating database engine: {e}")
         print("Please check your database credentials and settings in config/config.ini")
-        return None
\ No newline at end of file
+        return None
+
+
+# Column types of the master_table in MySQL
+MASTER_TABLE_DTYPES = {
+    'order_id': types.VARCHAR(length=255),
+    'order_item_id': types.INTEGER,
+    'product_id': types.VARCHAR(length=255),
+    'price': types.DECIMAL(10, 2),
+    'freight_value': types.DECIMAL(10, 2),
+    'customer_id': types.VARCHAR(length=255),
+    'order_purchase_timestamp': types.DATETIME,
+    'customer_unique_id': types.VARCHAR(length=255),
+    'customer_zip_code_prefix': types.INTEGER,
+    'customer_city': types.VARCHAR(length=255),
+    'customer_state': types.VARCHAR(length=50),
+    'product_category_name_english': types.VARCHAR(length=255),
+    'customer_segment': types.INTEGER
+}
+
+
+# --- Compact schema ---
+# With `compact_schema = true` in [mysql], the 32-character hex IDs are stored as BINARY(16),
+# category, city and state as small integer keys into lookup tables, and the remaining integers
+# in the narrowest type that fits. The primary key shrinks from two wide strings to 18 bytes,
+# so joins and the segment UPDATE compare fixed-size binary keys and more of the table fits in
+# the buffer pool. read_master_table() and update_customer_segments() detect the schema, so
+# callers always see the original columns.
+
+ID_COLUMNS = ['order_id', 'product_id', 'customer_id', 'customer_unique_id']
+
+# Column -> (lookup table, key column, key type)
+LOOKUP_COLUMNS = {
+    'product_category_name_english': ('dim_category', 'category_id', mysql.SMALLINT(unsigned=True)),
+    'customer_city': ('dim_city', 'city_id', mysql.MEDIUMINT(unsigned=True)),
+    'customer_state': ('dim_state', 'state_id', mysql.TINYINT(unsigned=True))
+}
+
+# Column types of the compact master_table (lookup columns are replaced by their keys)
+COMPACT_MASTER_TABLE_DTYPES = {
+    'order_id': types.BINARY(16),
+    'order_item_id': mysql.SMALLINT(unsigned=True),
+    'product_id': types.BINARY(16),
+    'price': types.DECIMAL(10, 2),
+    'freight_value': types.DECIMAL(10, 2),
+    'customer_id': types.BINARY(16),
+    'order_purchase_timestamp': types.DATETIME,
+    'customer_unique_id': types.BINARY(16),
+    'customer_zip_code_prefix': mysql.MEDIUMINT(unsigned=True),
+    'customer_city': LOOKUP_COLUMNS['customer_city'][2],
+    'customer_state': LOOKUP_COLUMNS['customer_state'][2],
+    'product_category_name_english': LOOKUP_COLUMNS['product_category_name_english'][2],
+    'customer_segment': mysql.TINYINT
+}
+
+def use_compact_schema():
+    """True if config.ini asks for the compact master_table schema ([mysql] compact_schema)."""
+    return _read_config().getboolean('mysql', 'compact_schema', fallback=False)
+
+def encode_ids(values):
+    """Converts 32-character hex IDs to 16-byte binary values (None stays None)."""
+    try:
+        encoded = values.map(bytes.fromhex, na_action='ignore').astype(object)
+    except ValueError as e:
+        raise ValueError(f"'{values.name}' has IDs that are not 32-character hex strings: {e}") from e
+    # BINARY(16) would silently pad shorter IDs, so they would not decode back to the original
+    if (encoded.dropna().map(len) != 16).any():
+        raise ValueError(f"'{values.name}' has IDs that are not 32-character hex strings.")
+    return encoded
+
+def decode_ids(values):
+    """Converts 16-byte binary IDs back to lowercase hex strings."""
+    return values.map(bytes.hex, na_action='ignore')
+
+def build_lookup(values):
+    """
+    Assigns integer keys (1, 2, ...) to the distinct values of a column, in sorted order.
+
+    Returns:
+        tuple: (keys, lookup). keys is aligned with `values` (nullable integers); lookup has
+               one row per distinct value.
+    """
+    codes, uniques = pd.factorize(values, sort=True)
+    keys = pd.Series(codes + 1, index=values.index, dtype='Int64').mask(codes < 0)
+    return keys, pd.DataFrame({'key': range(1, len(uniques) + 1), 'value': uniques})
+
+def is_compact_master_table(engine):
+    """True if the master_table in the database uses the compact schema (binary order IDs)."""
+    with engine.connect() as conn:
+        data_type = conn.execute(text(
+            "SELECT DATA_TYPE FROM information_schema.COLUMNS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'master_table' AND COLUMN_NAME = 'order_id'"
+        )).scalar()
+    return data_type == 'binary'
+
+def _write_compact_master_table(df, engine):
+    compact = df.copy()
+    for column in ID_COLUMNS:
+        compact[column] = encode_ids(compact[column])
+
+    for column, (table, key, key_type) in LOOKUP_COLUMNS.items():
+        compact[column], lookup = build_lookup(compact[column])
+        lookup.columns = [key, column]
+        # Binary collation: build_lookup() keys values that differ only in case or accents apart,
+        # and the default collation would treat them as duplicates under the UNIQUE KEY
+        value_type = mysql.VARCHAR(length=MASTER_TABLE_DTYPES[column].length, collation='utf8mb4_bin')
+        lookup.to_sql(table, engine, if_exists='replace', index=False,
+                      dtype={key: key_type, column: value_type})
+        with engine.connect() as conn:
+            conn.execute(text(f'ALTER TABLE {table} ADD PRIMARY KEY ({key}), ADD UNIQUE KEY ({column});'))
+            conn.commit()
+    compact = compact.rename(columns={column: key for column, (_, key, _) in LOOKUP_COLUMNS.items()})
+
+    dtypes = {LOOKUP_COLUMNS[c][1] if c in LOOKUP_COLUMNS else c: t for c, t in COMPACT_MASTER_TABLE_DTYPES.items()}
+    compact.to_sql(
+        name='master_table',
+        con=engine,
+        if_exists='replace',
+        index=False,
+        dtype=dtypes,
+        chunksize=1000
+    )
+    with engine.connect() as conn:
+        conn.execute(text('ALTER TABLE master_table ADD PRIMARY KEY (order_id, order_item_id);'))
+        conn.execute(text('CREATE INDEX idx_master_purchase_ts ON master_table (order_purchase_timestamp);'))
+        conn.execute(text('CREATE INDEX idx_master_customer ON master_table (customer_unique_id);'))
+        # The original wide columns, for ad-hoc SQL and BI tools
+        conn.execute(text(f'CREATE OR REPLACE VIEW master_table_readable AS {_master_select_sql(list(MASTER_TABLE_DTYPES), compact=True, decode_in_sql=True)};'))
+        conn.commit()
+
+def write_master_table(df, engine, compact: bool = None):
+    """
+    Replaces the master_table with the given dataframe and sets its primary key.
+
+    Args:
+        df (pd.DataFrame): The master dataframe, including the 'customer_segment' column.
+        engine: A SQLAlchemy engine from get_db_engine().
+        compact (bool): Use the compact schema (binary IDs and lookup tables). Defaults to
+            [mysql] compact_schema in config.ini.
+    """
+    if compact is None:
+        compact = use_compact_schema()
+    if compact:
+        _write_compact_master_table(df, engine)
+        return
+    df.to_sql(
+        name='master_table',
+        con=engine,
+        if_exists='replace',
+        index=False,
+        dtype=MASTER_TABLE_DTYPES,
+        chunksize=1000
+    )
+    with engine.connect() as conn:
+        conn.execute(text('ALTER TABLE master_table ADD PRIMARY KEY (order_id, order_item_id);'))
+        # Used by incremental segment refreshes (new orders since a watermark, updates per customer)
+        conn.execute(text('CREATE INDEX idx_master_purchase_ts ON master_table (order_purchase_timestamp);'))
+        conn.execute(text('CREATE INDEX idx_master_customer ON master_table (customer_unique_id);'))
+        conn.execute(text('DROP VIEW IF EXISTS master_table_readable;'))  # left over from a compact load
+        conn.commit()
+
+def _master_select_sql(columns, compact: bool, where: str = None, decode_in_sql: bool = False):
+    """SELECT statement returning `columns` of master_table under their original names."""
+    if not compact:
+        sql = f"SELECT {', '.join(columns)} FROM master_table"
+    else:
+        select, joins = [], []
+        for column in columns:
+            if column in LOOKUP_COLUMNS:
+                table, key, _ = LOOKUP_COLUMNS[column]
+                select.append(f"{table}.{column} AS {column}")
+                joins.append(f"LEFT JOIN {table} ON {table}.{key} = m.{key}")
+            elif column in ID_COLUMNS and decode_in_sql:
+                select.append(f"LOWER(HEX(m.{column})) AS {column}")
+            else:
+                select.append(f"m.{column} AS {column}")
+        sql = f"SELECT {', '.join(select)} FROM master_table AS m {' '.join(joins)}".rstrip()
+    return f"{sql} WHERE {where}" if where else sql
+
+def read_master_table(engine, columns=None, where: str = None, params: dict = None):
+    """
+    Reads master_table with its original columns, whichever schema it is stored in.
+    On the compact schema, lookup columns are joined back in and IDs decoded to hex strings.
+
+    Args:
+        engine: A SQLAlchemy engine from get_db_engine().
+        columns (list): Columns to read. Defaults to all of them.
+        where (str): Optional SQL condition, e.g. 'order_purchase_timestamp > :watermark'.
+            On the compact schema, conditions on ID columns must compare binary values.
+        params (dict): Bound parameters of the condition.
+
+    Returns:
+        pd.DataFrame: The requested columns.
+    """
+    columns = list(columns) if columns is not None else list(MASTER_TABLE_DTYPES)
+    compact = is_compact_master_table(engine)
+    df = pd.read_sql(text(_master_select_sql(columns, compact, where)), engine, params=params)
+    if compact:
+        for column in ID_COLUMNS:
+            if column in df.columns:
+                df[column] = decode_ids(df[column])
+    return df
+
+
+def update_customer_segments(engine, segments_df):
+    """
+    Writes segment labels into master_table for the given customers only.
+
+    Args:
+        engine: A SQLAlchemy engine from get_db_engine().
+        segments_df (pd.DataFrame): 'customer_unique_id' and 'customer_segment' columns.
+    """
+    segments = segments_df[['customer_unique_id', 'customer_segment']]
+    id_type = MASTER_TABLE_DTYPES['customer_unique_id']
+    if is_compact_master_table(engine):
+        # Join on the 16-byte binary keys of the compact schema
+        segments = segments.assign(customer_unique_id=encode_ids(segments['customer_unique_id']))
+        id_type = COMPACT_MASTER_TABLE_DTYPES['customer_unique_id']
+    segments.to_sql(
+        'temp_customer_segments', engine, if_exists='replace', index=False,
+        dtype={'customer_unique_id': id_type, 'customer_segment': types.INTEGER},
+        chunksize=1000
+    )
+    with engine.connect() as conn:
+        with conn.begin():
+            conn.execute(text('ALTER TABLE temp_customer_segments ADD PRIMARY KEY (customer_unique_id);'))
+            conn.execute(text(
+                """
+                UPDATE master_table AS m
+                JOIN temp_customer_segments AS t
+                ON m.customer_unique_id = t.customer_unique_id
+                SET m.customer_segment = t.customer_segment;
+                """
+            ))
+            conn.execute(text('DROP TABLE temp_customer_segments;'))
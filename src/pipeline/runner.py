@@ -0,0 +1,229 @@
+# src/pipeline/runner.py
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import pandas as pd
+
+
+class Stage:
+    """
+    A single step of the pipeline with declared inputs and outputs.
+
+    Args:
+        name (str): Unique name of the stage.
+        func (callable): Called with the input frames as keyword arguments. Must return a
+            dict mapping each name in `outputs` to a DataFrame (or None if there are no outputs).
+        inputs (list): Names of in-memory frames produced by upstream stages.
+        outputs (list): Names of in-memory frames this stage produces.
+        file_inputs (list): Paths of files read by this stage. Their content is hashed.
+        file_outputs (list): Paths of files written by this stage. The stage re-runs if any is missing.
+        version (str): Bump this when the stage logic changes to invalidate its cache.
+        params (dict): Settings that change the stage's output (e.g. config values). Part of its cache key.
+    """
+
+    def __init__(self, name, func, inputs=(), outputs=(), file_inputs=(), file_outputs=(), version='1', params=None):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.file_inputs = list(file_inputs)
+        self.file_outputs = list(file_outputs)
+        self.version = version
+        self.params = params or {}
+
+
+def hash_file(path: str, chunk_size: int = 1 << 20) -> str:
+    """Returns the SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_frame(df: pd.DataFrame) -> str:
+    """
+    Returns a content hash of a DataFrame: column names, dtypes and every row.
+    Uses pandas' vectorized row hashing, so it is cheap even for the full master table.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([[str(c), str(t)] for c, t in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+class Pipeline:
+    """
+    Runs a set of stages in dependency order.
+
+    - A stage is skipped when the content hashes of all its inputs match the last successful run
+      and its output files still exist.
+    - Stages whose dependencies are satisfied run concurrently on a thread pool, so frames are
+      shared in memory between stages instead of being written to and re-read from the database.
+    - Every produced frame is also cached as Parquet in `cache_dir`, so a stage can still run
+      when its upstream stage was skipped.
+    """
+
+    def __init__(self, stages, cache_dir: str, max_workers: int = 4):
+        self.stages = {stage.name: stage for stage in stages}
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.manifest_path = os.path.join(cache_dir, 'manifest.json')
+
+        self._producers = {}
+        for stage in stages:
+            for output in stage.outputs:
+                if output in self._producers:
+                    raise ValueError(f"Frame '{output}' is produced by both '{self._producers[output]}' and '{stage.name}'.")
+                self._producers[output] = stage.name
+        for stage in stages:
+            missing = [i for i in stage.inputs if i not in self._producers]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown frames: {missing}")
+
+        self._lock = threading.Lock()
+        self._frames = {}
+        self._frame_hashes = {}
+        self._manifest = {}
+
+    def _dependencies(self, stage):
+        return {self._producers[i] for i in stage.inputs}
+
+    def _load_manifest(self):
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        return {}
+
+    def _save_manifest(self):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self._manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _frame_cache_path(self, name):
+        return os.path.join(self.cache_dir, f"{name}.parquet")
+
+    def _get_frame(self, name):
+        # Frames of skipped stages are only read back from the cache when a downstream stage needs them
+        with self._lock:
+            if name not in self._frames:
+                self._frames[name] = pd.read_parquet(self._frame_cache_path(name))
+            return self._frames[name]
+
+    def _input_hash(self, stage):
+        digest = hashlib.sha256()
+        digest.update(f"{stage.name}:{stage.version}".encode())
+        digest.update(json.dumps(stage.params, sort_keys=True, default=str).encode())
+        for name in stage.inputs:
+            digest.update(f"frame:{name}:{self._frame_hashes[name]}".encode())
+        for path in stage.file_inputs:
+            digest.update(f"file:{path}:{hash_file(path)}".encode())
+        return digest.hexdigest()
+
+    def _is_fresh(self, stage, input_hash):
+        previous = self._manifest.get(stage.name)
+        if not previous or previous.get('input_hash') != input_hash:
+            return False
+        if not all(os.path.exists(path) for path in stage.file_outputs):
+            return False
+        return all(os.path.exists(self._frame_cache_path(name)) for name in stage.outputs)
+
+    def _run_stage(self, stage, force):
+        input_hash = self._input_hash(stage)
+
+        if not force and self._is_fresh(stage, input_hash):
+            with self._lock:
+                self._frame_hashes.update(self._manifest[stage.name]['output_hashes'])
+            return 'skipped', 0.0
+
+        start = time.perf_counter()
+        frames = {name: self._get_frame(name) for name in stage.inputs}
+        results = stage.func(**frames) or {}
+
+        output_hashes = {}
+        for name in stage.outputs:
+            if name not in results:
+                raise RuntimeError(f"Stage '{stage.name}' did not return declared output '{name}'.")
+            df = results[name]
+            output_hashes[name] = hash_frame(df)
+            df.to_parquet(self._frame_cache_path(name), index=False)
+
+        with self._lock:
+            self._frames.update({name: results[name] for name in stage.outputs})
+            self._frame_hashes.update(output_hashes)
+            self._manifest[stage.name] = {'input_hash': input_hash, 'output_hashes': output_hashes}
+            self._save_manifest()
+        return 'ran', time.perf_counter() - start
+
+    def _with_upstream(self, targets):
+        selected, stack = set(), list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage '{name}'. Available stages: {sorted(self.stages)}")
+            if name not in selected:
+                selected.add(name)
+                stack.extend(self._dependencies(self.stages[name]))
+        return selected
+
+    def run(self, force: bool = False, targets=None):
+        """
+        Executes the pipeline.
+
+        Args:
+            force (bool): Re-run every stage even if its inputs are unchanged.
+            targets (list): Only run these stages and the stages they depend on. None runs everything.
+
+        Returns:
+            dict: Stage name -> 'ran', 'skipped', 'failed' or 'blocked'.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._manifest = self._load_manifest()
+        self._frames, self._frame_hashes = {}, {}
+
+        selected = self._with_upstream(targets) if targets else set(self.stages)
+
+        status = {}
+        pending = {name: stage for name, stage in self.stages.items() if name in selected}
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                # Submit every stage whose upstream stages have all finished successfully
+                for name, stage in list(pending.items()):
+                    deps = self._dependencies(stage)
+                    if any(status.get(d) in ('failed', 'blocked') for d in deps):
+                        status[name] = 'blocked'
+                        print(f"[{name}] Not run: an upstream stage failed.")
+                        del pending[name]
+                    elif all(status.get(d) in ('ran', 'skipped') for d in deps):
+                        print(f"[{name}] Starting...")
+                        running[executor.submit(self._run_stage, stage, force)] = name
+                        del pending[name]
+
+                if not running:
+                    if pending:
+                        raise ValueError(f"Dependency cycle between stages: {sorted(pending)}")
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        outcome, elapsed = future.result()
+                        status[name] = outcome
+                        if outcome == 'skipped':
+                            print(f"[{name}] Skipped (inputs unchanged).")
+                        else:
+                            print(f"[{name}] Done in {elapsed:.1f}s.")
+                    except Exception as e:
+                        status[name] = 'failed'
+                        print(f"[{name}] Failed: {e}")
+
+        return status
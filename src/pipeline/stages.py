@@ -0,0 +1,217 @@
+# src/pipeline/stages.py
+
+import os
+import pandas as pd
+
+from src.data_processing.loader import load_and_prepare_data, enforce_master_schema, RAW_DATA_FILES
+from src.data_processing.partitions import write_partitioned_dataset, MANIFEST_NAME
+from src.analysis.segmentation import perform_rfm_segmentation, select_num_clusters
+from src.analysis.elasticity import calculate_elasticity_and_model
+from src.analysis.forecasting import generate_forecast, generate_global_forecast
+from src.analysis.product_elasticity import calculate_product_elasticities
+from src.analysis.price_recommendations import build_price_recommendations
+from src.analysis.rolling_elasticity import calculate_rolling_elasticity
+from src.analysis.geography import build_geo_hierarchy
+from src.analysis.sampling import build_stratified_sample
+from src.analysis.parallel import ParallelAnalysisRunner
+from src.database.utils import get_db_engine, write_master_table
+from src.pipeline.runner import Stage, Pipeline
+
+
+def _category_elasticity(df: pd.DataFrame, product_category: str):
+    """Own-price elasticity of one category, without the model (only the score is sent back from workers)."""
+    return calculate_elasticity_and_model(df, product_category=product_category)[0]
+
+# Columns read by calculate_elasticity_and_model(), shared with the elasticity workers
+ELASTICITY_COLUMNS = ['product_category_name_english', 'price', 'order_item_id']
+
+def create_tableau_summaries(df: pd.DataFrame, max_workers: int = 1):
+    """
+    Builds the aggregated summaries used by the Tableau dashboard.
+
+    Args:
+        df (pd.DataFrame): The segmented master dataframe.
+        max_workers (int): Worker processes for the per-category elasticities (see src/analysis/parallel.py).
+
+    Returns:
+        tuple: (segment_summary, category_summary) dataframes.
+    """
+    segment_summary = df.groupby('customer_segment').agg(
+        num_customers=('customer_unique_id', 'nunique'),
+        num_orders=('order_id', 'nunique'),
+        total_revenue=('price', 'sum')
+    ).reset_index()
+    segment_summary['avg_order_value'] = segment_summary['total_revenue'] / segment_summary['num_orders']
+
+    category_summary = df.groupby('product_category_name_english').agg(
+        num_orders=('order_id', 'nunique'),
+        num_items=('order_item_id', 'count'),
+        total_revenue=('price', 'sum'),
+        avg_price=('price', 'mean')
+    ).reset_index()
+    # One elasticity fit per category, spread over worker processes that share one copy of the data
+    with ParallelAnalysisRunner(df, columns=ELASTICITY_COLUMNS, max_workers=max_workers) as runner:
+        elasticities = runner.map_categories(_category_elasticity, category_summary['product_category_name_english'])
+    category_summary['price_elasticity'] = category_summary['product_category_name_english'].map(elasticities)
+
+    return segment_summary, category_summary
+
+
+def _category_forecast(df: pd.DataFrame, product_category: str, periods: int = 90):
+    """Prophet forecast of one category, without the model (Prophet models should not be pickled)."""
+    _, forecast = generate_forecast(df, periods=periods, product_category=product_category)
+    return None if forecast is None else forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
+
+# Columns read by generate_forecast(), shared with the forecast workers
+FORECAST_COLUMNS = ['product_category_name_english', 'order_purchase_timestamp', 'price']
+
+
+def build_pipeline(config, use_database: bool = True) -> Pipeline:
+    """
+    Declares the full data pipeline: ETL, segmentation, the MySQL load and all exports.
+
+    Args:
+        config (configparser.ConfigParser): The parsed config/config.ini.
+        use_database (bool): If False, the MySQL stage is left out and the pipeline runs
+            entirely in memory from the raw CSVs (no database server needed).
+
+    Returns:
+        Pipeline: The pipeline, ready to run.
+    """
+    raw_data_path = config['data_paths']['raw_data_dir']
+    export_path = config['data_paths']['tableau_exports_dir']
+    cache_dir = config.get('pipeline', 'cache_dir', fallback='data/.pipeline_cache')
+    app_data_path = config.get('pipeline', 'app_data_path', fallback='streamlit_app/data/master_data.parquet')
+    max_workers = config.getint('pipeline', 'max_workers', fallback=4)
+    num_clusters = config.get('pipeline', 'num_clusters', fallback='4')
+    forecast_top_n = config.getint('pipeline', 'forecast_top_n', fallback=5)
+    forecast_mode = config.get('pipeline', 'forecast_mode', fallback='prophet')
+    sample_fraction = config.getfloat('pipeline', 'sample_fraction', fallback=0.05)
+    analysis_workers = config.getint('pipeline', 'analysis_workers', fallback=1)
+
+    segment_summary_path = os.path.join(export_path, 'segment_summary.csv')
+    category_summary_path = os.path.join(export_path, 'category_summary.csv')
+    forecasts_path = os.path.join(export_path, 'forecasts.csv')
+    rolling_elasticity_path = os.path.join(export_path, 'rolling_elasticity.csv')
+    app_data_dir = os.path.dirname(app_data_path)
+    product_elasticity_path = os.path.join(app_data_dir, 'product_elasticity.parquet')
+    geo_hierarchy_path = os.path.join(app_data_dir, 'geo_hierarchy.parquet')
+    app_sample_path = os.path.join(app_data_dir, 'master_sample.parquet')
+    app_partitions_dir = os.path.join(app_data_dir, 'master_partitions')
+    price_recommendations_path = config.get('serving', 'table_path', fallback=os.path.join(app_data_dir, 'price_recommendations.parquet'))
+
+    def run_etl():
+        master = load_and_prepare_data(raw_data_path)
+        if master.empty:
+            raise RuntimeError("Data loading produced an empty dataframe.")
+        return {'master': master.reset_index(drop=True)}
+
+    def run_segmentation(master):
+        k = int(num_clusters) if num_clusters != 'auto' else None
+        if k is None:
+            # Pick the cluster count with the best (sampled) silhouette score
+            comparison = select_num_clusters(master)
+            print(comparison.to_string(index=False))
+            k = int(comparison.loc[comparison['silhouette'].idxmax(), 'k'])
+            print(f"Selected {k} customer segments.")
+        segments_df = perform_rfm_segmentation(master, num_clusters=k)
+        segmented = pd.merge(master, segments_df, on='customer_unique_id', how='left')
+        return {'segmented': segmented}
+
+    def load_mysql(segmented):
+        engine = get_db_engine()
+        if not engine:
+            raise RuntimeError("DB engine creation failed.")
+        try:
+            write_master_table(segmented, engine)
+        finally:
+            engine.dispose()
+
+    def export_tableau(segmented):
+        os.makedirs(export_path, exist_ok=True)
+        segment_summary, category_summary = create_tableau_summaries(segmented, max_workers=analysis_workers)
+        segment_summary.to_csv(segment_summary_path, index=False)
+        category_summary.to_csv(category_summary_path, index=False)
+
+    def export_parquet(segmented):
+        os.makedirs(app_data_dir, exist_ok=True)
+        app_df = enforce_master_schema(segmented)
+        app_df.to_parquet(app_data_path, index=False)
+        # Monthly partitions the running app refreshes incrementally; unchanged months are not rewritten
+        changes = write_partitioned_dataset(app_df, app_partitions_dir)
+        print(f"Partitioned app dataset: {len(changes['added'])} added, {len(changes['changed'])} changed, "
+              f"{len(changes['removed'])} removed month(s).")
+
+    def export_parquet_sample(segmented):
+        os.makedirs(app_data_dir, exist_ok=True)
+        sample = build_stratified_sample(enforce_master_schema(segmented), fraction=sample_fraction)
+        sample.to_parquet(app_sample_path, index=False)
+
+    def export_forecasts(master):
+        os.makedirs(export_path, exist_ok=True)
+        if forecast_mode == 'global':
+            # One fit for every category, reconciled to the 'all' forecast
+            forecast = generate_global_forecast(master, periods=90)
+            forecast[['product_category', 'ds', 'yhat', 'yhat_lower', 'yhat_upper']].to_csv(forecasts_path, index=False)
+            return
+        top_categories = master['product_category_name_english'].value_counts().nlargest(forecast_top_n).index
+        # One Prophet fit per category, spread over worker processes that share one copy of the data
+        with ParallelAnalysisRunner(master, columns=FORECAST_COLUMNS, max_workers=analysis_workers) as runner:
+            results = runner.map_categories(_category_forecast, ['all'] + top_categories.tolist(), periods=90)
+        forecasts = []
+        for category, forecast in results.items():
+            if forecast is not None:
+                forecast = forecast.copy()
+                forecast.insert(0, 'product_category', category)
+                forecasts.append(forecast)
+        if forecasts:
+            pd.concat(forecasts, ignore_index=True).to_csv(forecasts_path, index=False)
+
+    def export_product_elasticity(master):
+        os.makedirs(app_data_dir, exist_ok=True)
+        product_elasticity = calculate_product_elasticities(master)
+        product_elasticity.to_parquet(product_elasticity_path, index=False)
+        return {'product_elasticity': product_elasticity}
+
+    def export_price_recommendations(master, product_elasticity):
+        # Written to a temporary file and swapped in, so the pricing service never reads a partial table
+        os.makedirs(os.path.dirname(price_recommendations_path) or '.', exist_ok=True)
+        build_price_recommendations(master, product_elasticity).to_parquet(price_recommendations_path + '.tmp', index=False)
+        os.replace(price_recommendations_path + '.tmp', price_recommendations_path)
+
+    def export_rolling_elasticity(master):
+        os.makedirs(export_path, exist_ok=True)
+        rolling = pd.concat([
+            calculate_rolling_elasticity(master, window_weeks=12),
+            calculate_rolling_elasticity(master, expanding=True)
+        ], ignore_index=True)
+        rolling.to_csv(rolling_elasticity_path, index=False)
+
+    def export_geo_hierarchy(master):
+        os.makedirs(app_data_dir, exist_ok=True)
+        build_geo_hierarchy(master).to_parquet(geo_hierarchy_path, index=False)
+
+    stages = [
+        Stage('etl', run_etl, outputs=['master'],
+              file_inputs=[os.path.join(raw_data_path, f) for f in RAW_DATA_FILES.values()]),
+        Stage('segmentation', run_segmentation, inputs=['master'], outputs=['segmented'],
+              params={'num_clusters': num_clusters}),
+        Stage('tableau_exports', export_tableau, inputs=['segmented'],
+              file_outputs=[segment_summary_path, category_summary_path]),
+        Stage('parquet_export', export_parquet, inputs=['segmented'],
+              file_outputs=[app_data_path, os.path.join(app_partitions_dir, MANIFEST_NAME)]),
+        Stage('parquet_sample', export_parquet_sample, inputs=['segmented'], file_outputs=[app_sample_path],
+              params={'sample_fraction': sample_fraction}),
+        Stage('forecasts', export_forecasts, inputs=['master'], file_outputs=[forecasts_path],
+              params={'forecast_top_n': forecast_top_n, 'forecast_mode': forecast_mode}),
+        Stage('product_elasticity', export_product_elasticity, inputs=['master'], outputs=['product_elasticity'],
+              file_outputs=[product_elasticity_path]),
+        Stage('price_recommendations', export_price_recommendations, inputs=['master', 'product_elasticity'],
+              file_outputs=[price_recommendations_path]),
+        Stage('rolling_elasticity', export_rolling_elasticity, inputs=['master'],
+              file_outputs=[rolling_elasticity_path]),
+        Stage('geo_hierarchy', export_geo_hierarchy, inputs=['master'], file_outputs=[geo_hierarchy_path]),
+    ]
+    if use_database:
+        stages.append(Stage('mysql_load', load_mysql, inputs=['segmented']))
+    return Pipeline(stages, cache_dir=cache_dir, max_workers=max_workers)
@@ -0,0 +1,225 @@
+# src/serving/pricing_service.py
+
+import json
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+import pandas as pd
+
+# Fields returned for every category or product
+RECORD_FIELDS = ['level', 'product_category_name_english', 'product_id', 'elasticity', 'intercept',
+                 'min_price', 'max_price', 'recommended_price', 'predicted_demand', 'projected_revenue']
+
+class PricingIndex:
+    """
+    In-memory index over the price recommendations table (see src/analysis/price_recommendations.py).
+
+    Categories and products are held in plain dicts, and the JSON body of every plain lookup is
+    encoded once when the index is built, so a lookup is a dict access. Indexes are immutable:
+    a reload builds a new one and the server swaps the reference.
+    """
+
+    def __init__(self, table: pd.DataFrame, source_mtime: float = None):
+        self.source_mtime = source_mtime
+        self.loaded_at = time.time()
+        self.categories, self.products = {}, {}
+        self._encoded_categories, self._encoded_products = {}, {}
+
+        for record in table[RECORD_FIELDS].to_dict('records'):
+            if record['level'] == 'category':
+                self.categories[record['product_category_name_english']] = record
+                self._encoded_categories[record['product_category_name_english']] = json.dumps(record, allow_nan=False).encode()
+            else:
+                self.products[record['product_id']] = record
+                self._encoded_products[record['product_id']] = json.dumps(record, allow_nan=False).encode()
+
+    @classmethod
+    def from_parquet(cls, table_path: str):
+        mtime = os.path.getmtime(table_path)
+        return cls(pd.read_parquet(table_path), source_mtime=mtime)
+
+    def find(self, product_id: str = None, category: str = None):
+        """The product's record if it is known, else its category's record, else None."""
+        if product_id and product_id in self.products:
+            return self.products[product_id]
+        return self.categories.get(category) if category else None
+
+    def find_encoded(self, product_id: str = None, category: str = None):
+        """Same as find(), returning the pre-encoded JSON body."""
+        if product_id and product_id in self._encoded_products:
+            return self._encoded_products[product_id]
+        return self._encoded_categories.get(category) if category else None
+
+    @staticmethod
+    def predict(record: dict, price: float):
+        """
+        Demand and revenue at `price` under the record's log-log model.
+
+        Raises:
+            ValueError: If the model has no finite prediction at this price (e.g. a tiny price
+                with an elastic model).
+        """
+        try:
+            demand = math.exp(record['intercept'] + record['elasticity'] * math.log(price))
+        except OverflowError:
+            demand = math.inf
+        if not math.isfinite(price * demand):
+            raise ValueError(f"The model has no finite prediction at price {price}.")
+        return {
+            'level': record['level'],
+            'product_category_name_english': record['product_category_name_english'],
+            'product_id': record['product_id'],
+            'price': price,
+            'elasticity': record['elasticity'],
+            'predicted_demand': demand,
+            'projected_revenue': price * demand,
+            'recommended_price': record['recommended_price']
+        }
+
+class PricingRequestHandler(BaseHTTPRequestHandler):
+    """
+    Endpoints:
+        GET  /health
+        GET  /v1/recommendation?product_id=...&category=...
+        GET  /v1/predict?product_id=...&category=...&price=...
+        POST /v1/batch   {"items": [{"product_id": ..., "category": ..., "price": ...}, ...]}
+
+    A product lookup falls back to the given category when the product is unknown. In a batch,
+    items with a price get a prediction and items without one get the recommendation.
+    """
+    protocol_version = 'HTTP/1.1'  # keep-alive, so clients can reuse connections
+    disable_nagle_algorithm = True  # headers and body are written separately; don't wait for delayed ACKs
+
+    def log_message(self, format, *args):
+        pass  # per-request logging would dominate the cost of a lookup
+
+    def _send(self, status: int, body: bytes):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload):
+        self._send(status, json.dumps(payload, allow_nan=False).encode())
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        index = self.server.index
+
+        if url.path == '/health':
+            self._send_json(200, {'status': 'ok', 'categories': len(index.categories), 'products': len(index.products),
+                                  'loaded_at': index.loaded_at})
+        elif url.path == '/v1/recommendation':
+            body = index.find_encoded(query.get('product_id'), query.get('category'))
+            if body is None:
+                self._send_json(404, {'error': 'Unknown product_id and category.'})
+            else:
+                self._send(200, body)
+        elif url.path == '/v1/predict':
+            price = _parse_price(query.get('price'))
+            record = index.find(query.get('product_id'), query.get('category'))
+            if price is None:
+                self._send_json(400, {'error': "'price' must be a positive number."})
+            elif record is None:
+                self._send_json(404, {'error': 'Unknown product_id and category.'})
+            else:
+                try:
+                    self._send_json(200, PricingIndex.predict(record, price))
+                except ValueError as e:
+                    self._send_json(400, {'error': str(e)})
+        else:
+            self._send_json(404, {'error': f'Unknown endpoint {url.path}.'})
+
+    def do_POST(self):
+        if urlsplit(self.path).path != '/v1/batch':
+            self._send_json(404, {'error': 'Unknown endpoint.'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            items = json.loads(self.rfile.read(length))['items']
+            if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+                raise TypeError
+        except (ValueError, KeyError, TypeError):
+            self._send_json(400, {'error': 'Expected a JSON body {"items": [...]}.'})
+            return
+        invalid = [i for i, item in enumerate(items)
+                   if not all(isinstance(item.get(key), (str, type(None))) for key in ('product_id', 'category'))]
+        if invalid:
+            self._send_json(400, {'error': f"'product_id' and 'category' must be strings (items {invalid[:10]})."})
+            return
+        if len(items) > self.server.max_batch_size:
+            self._send_json(413, {'error': f'At most {self.server.max_batch_size} items per batch.'})
+            return
+
+        index = self.server.index  # one index for the whole batch, even if a reload happens meanwhile
+        results = []
+        for item in items:
+            record = index.find(item.get('product_id'), item.get('category'))
+            if record is None:
+                results.append({'error': 'Unknown product_id and category.'})
+            elif item.get('price') is None:
+                results.append(record)
+            else:
+                price = _parse_price(item['price'])
+                if price is None:
+                    results.append({'error': "'price' must be a positive number."})
+                    continue
+                try:
+                    results.append(PricingIndex.predict(record, price))
+                except ValueError as e:
+                    results.append({'error': str(e)})
+        self._send_json(200, {'results': results})
+
+def _parse_price(value):
+    try:
+        price = float(value)
+    except (TypeError, ValueError):
+        return None
+    return price if price > 0 and math.isfinite(price) else None
+
+class PricingServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server holding the current PricingIndex. A watcher thread reloads the index
+    whenever the table file changes; the swap is a single reference assignment, so in-flight
+    requests finish on the index they started with.
+    """
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, table_path: str, reload_interval: float = 5.0, max_batch_size: int = 1000):
+        self.table_path = table_path
+        self.reload_interval = reload_interval
+        self.max_batch_size = max_batch_size
+        self.index = PricingIndex.from_parquet(table_path)
+        self._stop_watching = threading.Event()
+        super().__init__(address, PricingRequestHandler)
+
+    def reload_if_changed(self):
+        """Rebuilds the index if the table file was replaced. A failed load keeps the current index."""
+        try:
+            if os.path.getmtime(self.table_path) == self.index.source_mtime:
+                return False
+            self.index = PricingIndex.from_parquet(self.table_path)
+        except Exception as e:
+            print(f"Warning: Could not reload '{self.table_path}', keeping the current table: {e}")
+            return False
+        print(f"Reloaded {len(self.index.products):,} products and {len(self.index.categories):,} categories.")
+        return True
+
+    def _watch(self):
+        while not self._stop_watching.wait(self.reload_interval):
+            self.reload_if_changed()
+
+    def serve_forever(self, poll_interval=0.5):
+        if self.reload_interval:
+            threading.Thread(target=self._watch, daemon=True).start()
+        try:
+            super().serve_forever(poll_interval)
+        finally:
+            self._stop_watching.set()
@@ -0,0 +1,71 @@
+# streamlit_app/components/app_dataset.py
+
+import threading
+
+import pandas as pd
+import streamlit as st
+
+from src.analysis.forecasting import aggregate_daily_sales
+from src.data_processing.partitions import IncrementalDataset
+from streamlit_app.components.figure_cache import data_fingerprint, file_fingerprint, get_figure_cache, stamp_fingerprint
+
+APP_DATA_PATH = "streamlit_app/data/master_data.parquet"
+APP_PARTITIONS_DIR = "streamlit_app/data/master_partitions"
+
+# Rollups maintained next to the master dataframe, one partial result per monthly partition
+APP_ROLLUPS = {'daily_sales': aggregate_daily_sales}
+
+_refresh_lock = threading.Lock()
+
+@st.cache_resource
+def get_app_dataset():
+    """The partitioned app dataset shared by all sessions of this server process."""
+    return IncrementalDataset(APP_PARTITIONS_DIR, rollups=APP_ROLLUPS)
+
+def refresh_app_dataset():
+    """
+    Picks up a new export of the partitioned dataset, reading only its new or changed partitions.
+
+    Called on every rerun; when nothing changed it only checks the manifest. Derived caches do
+    not need clearing: they key on data_version(), which changes only for affected categories.
+    Figures built from the previous version are dropped from the figure cache.
+
+    Returns:
+        IncrementalDataset: The dataset, or None if the app data has not been exported as partitions.
+    """
+    dataset = get_app_dataset()
+    with _refresh_lock:
+        previous = dataset.version
+        affected = dataset.refresh()
+        if dataset.version is None:
+            return None
+        if dataset.version != previous:
+            stamp_fingerprint(dataset.df, f"partitions:{dataset.version}")
+            if previous is not None:
+                get_figure_cache().discard(f"partitions:{previous}")
+                print(f"App dataset refreshed: {len(dataset.df):,} rows, {len(affected)} categories changed.")
+    return dataset
+
+def data_version(*categories):
+    """
+    Version of the data behind one or more categories ('all' or 'All Products' for the whole
+    dataset), for keying cached analyses. Without the partitioned dataset, every category has
+    the version of master_data.parquet (its fingerprint); None if there is no export at all.
+    """
+    dataset = get_app_dataset()
+    if dataset.version is None:
+        try:
+            return f"file:{file_fingerprint(APP_DATA_PATH)}"
+        except FileNotFoundError:
+            return None
+    return ':'.join(str(dataset.category_version(category)) for category in categories or ('all',))
+
+def fetch_daily_sales(df: pd.DataFrame):
+    """
+    Daily revenue per category (aggregate_daily_sales()): the dataset's rollup, if `df` is (a copy
+    of) the current partitioned dataset, recognized by its fingerprint stamp.
+    """
+    dataset = get_app_dataset()
+    if dataset.version is not None and data_fingerprint(df) == f"partitions:{dataset.version}":
+        return dataset.rollups['daily_sales']
+    return aggregate_daily_sales(df)
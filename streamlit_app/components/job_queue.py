@@ -0,0 +1,285 @@
+# streamlit_app/components/job_queue.py
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from src.data_processing.loader import load_app_data
+from src.data_processing.partitions import IncrementalDataset, read_manifest
+from streamlit_app.components.app_dataset import APP_DATA_PATH, APP_PARTITIONS_DIR
+from streamlit_app.components.figure_cache import file_fingerprint
+
+# ========================= WORKER SIDE =========================
+# Each worker process loads the app dataset once, when it starts, so jobs only ship
+# their (small) arguments and results between processes, never the dataframe.
+# A job submitted with a `data_version` first makes the worker pick up any export made since:
+# new or changed partitions of the partitioned dataset, or a new master_data.parquet. The
+# worker also switches to the partitioned dataset if it was first exported after the pool started.
+_worker_paths = None
+_worker_df, _worker_dataset, _worker_fingerprint = None, None, None
+
+def _load_worker_data():
+    global _worker_df, _worker_dataset, _worker_fingerprint
+    data_path, partitions_dir = _worker_paths
+    if read_manifest(partitions_dir) is not None:
+        if _worker_dataset is None:
+            _worker_dataset, _worker_df, _worker_fingerprint = IncrementalDataset(partitions_dir), None, None
+        _worker_dataset.refresh()
+        return
+    fingerprint = file_fingerprint(data_path)
+    if fingerprint != _worker_fingerprint:
+        _worker_df, _worker_dataset, _worker_fingerprint = load_app_data(data_path), None, fingerprint
+
+def _init_worker(data_path, partitions_dir):
+    global _worker_paths
+    _worker_paths = (data_path, partitions_dir)
+    _load_worker_data()
+
+def _run_job(func, kwargs):
+    kwargs = dict(kwargs)
+    if kwargs.pop('data_version', None) is not None:
+        _load_worker_data()  # only stats the manifest or file when nothing changed
+    return func(_worker_dataset.df if _worker_dataset is not None else _worker_df, **kwargs)
+
+# --- Jobs: module-level functions taking the dataset first, so they can be sent to workers ---
+
+def forecast_job(df: pd.DataFrame, periods: int, product_category: str):
+    """Fits Prophet for one category. The model is returned as JSON, since Prophet models should not be pickled."""
+    from src.analysis.forecasting import generate_forecast
+    from prophet.serialize import model_to_json
+
+    model, forecast = generate_forecast(df, periods=periods, product_category=product_category)
+    if model is None:
+        return None, None
+    return model_to_json(model), forecast
+
+def cross_price_elasticity_job(df: pd.DataFrame, demand_category: str, price_category: str, n_boot: int = 0):
+    """Cross-price elasticity score, plus its bootstrap interval when n_boot > 0."""
+    from src.analysis.cross_elasticity import calculate_cross_price_elasticity, bootstrap_cross_price_elasticity
+
+    score = calculate_cross_price_elasticity(df, demand_category=demand_category, price_category=price_category)
+    interval = None
+    if score is not None and n_boot:
+        interval = bootstrap_cross_price_elasticity(df, demand_category=demand_category,
+                                                    price_category=price_category, n_boot=n_boot)
+    return {'score': score, 'interval': interval}
+
+def revenue_maximizing_price_job(df: pd.DataFrame, category: str, n_boot: int = 0):
+    """
+    Simulates revenue over the category's interquartile price range.
+
+    Returns:
+        tuple: (sim_df, optimal_price_range) from simulate_revenue_curve(), or (None, None)
+               if no elasticity model can be built.
+    """
+    from src.analysis.elasticity import calculate_elasticity_and_model, bootstrap_elasticity, simulate_revenue_curve
+
+    model_category = category if category != 'All Products' else 'all'
+    _, model = calculate_elasticity_and_model(df, product_category=model_category)
+    if model is None:
+        return None, None
+    bootstrap = bootstrap_elasticity(df, product_category=model_category, n_boot=n_boot) if n_boot else None
+
+    price_stats = df[df['product_category_name_english'] == category]['price'].describe()
+    min_realistic_price = price_stats.get('25%', price_stats.get('mean', 1) * 0.7)
+    max_realistic_price = price_stats.get('75%', price_stats.get('mean', 1) * 1.3)
+    price_range = np.linspace(min_realistic_price, max_realistic_price, 100)
+    return simulate_revenue_curve(
+        price_range, model.params['const'], model.params['log_price'],
+        boot_intercepts=bootstrap['intercepts'] if bootstrap else None,
+        boot_slopes=bootstrap['slopes'] if bootstrap else None
+    )
+
+# ========================= APP SIDE =========================
+
+class Job:
+    """A submitted analysis. 'state' is 'queued', 'running', 'done' or 'failed'."""
+
+    def __init__(self, key, name, future):
+        self.key = key
+        self.name = name
+        self.future = future
+        self.submitted_at = time.monotonic()
+        self.finished_at = None
+
+    @property
+    def state(self):
+        if not self.future.done():
+            return 'running' if self.future.running() else 'queued'
+        return 'failed' if self.future.exception() is not None else 'done'
+
+    @property
+    def elapsed(self):
+        return (self.finished_at or time.monotonic()) - self.submitted_at
+
+    @property
+    def elapsed_since_finished(self):
+        return time.monotonic() - self.finished_at if self.finished_at is not None else 0.0
+
+class JobQueue:
+    """
+    Runs long analyses (Prophet fits, bootstraps, revenue simulations) on a process pool, so
+    they do not block the Streamlit script thread.
+
+    Jobs are keyed by function name and arguments. Submitting a job that is already queued,
+    running or finished returns the existing one, so concurrent sessions asking for the same
+    analysis share a single computation. Finished results are kept in a bounded LRU.
+
+    A failed job is kept too, so pages show its error instead of re-running it on every rerun.
+    It is only re-run after `failed_ttl` seconds, or when retry() discards it.
+    """
+
+    def __init__(self, data_path: str = APP_DATA_PATH, partitions_dir: str = APP_PARTITIONS_DIR,
+                 max_workers: int = 2, max_results: int = 64, failed_ttl: float = 300.0):
+        self.data_path = data_path
+        self.partitions_dir = partitions_dir
+        self.max_workers = max_workers
+        self.max_results = max_results
+        self.failed_ttl = failed_ttl
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self._durations = {}  # typical run time per job name, for the progress estimate
+        self._executor = self._new_executor()
+
+    def _new_executor(self):
+        # The platform's default start method is used on purpose: Streamlit runs each page as a
+        # '__main__' module without an import guard, so 'spawn' workers would re-execute the page.
+        return ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker, initargs=(self.data_path, self.partitions_dir))
+
+    @staticmethod
+    def job_key(func, kwargs):
+        return f"{func.__name__}:{json.dumps(kwargs, sort_keys=True, default=str)}"
+
+    def submit(self, func, **kwargs):
+        """
+        Queues func(df, **kwargs) unless an identical job is already queued, running or done, or
+        failed less than `failed_ttl` seconds ago.
+
+        Args:
+            func (callable): A module-level job function taking the dataset as its first argument.
+            **kwargs: JSON-serializable job arguments. A `data_version` argument (see
+                app_dataset.data_version()) is not passed to func: it only keys the job, and makes
+                the worker pick up a newer export first.
+
+        Returns:
+            str: The job key, for get().
+        """
+        key = self.job_key(func, kwargs)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and (job.state != 'failed' or job.elapsed_since_finished < self.failed_ttl):
+                self._jobs.move_to_end(key)
+                return key
+
+            try:
+                future = self._executor.submit(_run_job, func, kwargs)
+            except BrokenProcessPool:
+                # A worker died (e.g. out of memory); start a fresh pool and retry once
+                self._executor = self._new_executor()
+                future = self._executor.submit(_run_job, func, kwargs)
+
+            job = Job(key, func.__name__, future)
+            self._jobs[key] = job
+            self._evict()
+        # Outside the lock: a future that has already finished runs the callback right here
+        future.add_done_callback(lambda _, job=job: self._on_done(job))
+        return key
+
+    def retry(self, key):
+        """Discards a failed job, so the next submit() of the same job runs it again."""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.state == 'failed':
+                del self._jobs[key]
+
+    def _on_done(self, job):
+        with self._lock:
+            job.finished_at = time.monotonic()
+            if job.future.exception() is None:
+                previous = self._durations.get(job.name, job.elapsed)
+                self._durations[job.name] = 0.7 * previous + 0.3 * job.elapsed
+
+    def _evict(self):
+        finished = [key for key, job in self._jobs.items() if job.future.done()]
+        for key in finished[:max(0, len(self._jobs) - self.max_results)]:
+            del self._jobs[key]
+
+    def get(self, key):
+        """Returns the Job for a key, or None if it was never submitted or has been evicted."""
+        with self._lock:
+            return self._jobs.get(key)
+
+    def progress(self, job):
+        """Estimated completion (0-1) from the typical run time of jobs with the same name."""
+        if job.future.done():
+            return 1.0
+        typical = self._durations.get(job.name)
+        return min(job.elapsed / typical, 0.95) if typical else None
+
+    def queue_position(self, job):
+        """Number of unfinished jobs submitted before this one."""
+        with self._lock:
+            ahead = 0
+            for other in sorted(self._jobs.values(), key=lambda j: j.submitted_at):
+                if other is job:
+                    return ahead
+                ahead += not other.future.done()
+        return ahead
+
+@st.cache_resource
+def get_job_queue():
+    """The job queue shared by all sessions of this server process."""
+    return JobQueue()
+
+def run_in_background(func, message: str, **kwargs):
+    """
+    Submits a job (or joins an identical one) and shows its progress until it finishes.
+    Call it on every rerun while the result is wanted, and end the page with
+    rerun_while_jobs_pending() so the page polls until the job is done.
+
+    Args:
+        func (callable): A job function from this module.
+        message (str): What the job is doing, shown while it runs.
+        **kwargs: Job arguments.
+
+    Returns:
+        The job's result once it has finished, otherwise None.
+    """
+    queue = get_job_queue()
+    key = queue.submit(func, **kwargs)
+    job = queue.get(key)
+
+    if job.state == 'done':
+        return job.future.result()
+    if job.state == 'failed':
+        # The failure is kept (see JobQueue), so this shows until the user retries
+        st.error(f"{message} failed: {job.future.exception()}")
+        if st.button("Retry", key=f"retry_{key}"):
+            queue.retry(key)
+            st.rerun()
+        return None
+
+    st.session_state['_jobs_pending'] = True
+    progress = queue.progress(job)
+    if job.state == 'queued':
+        status = f"{message} (queued behind {queue.queue_position(job)} job(s), {job.elapsed:.0f}s)"
+    else:
+        status = f"{message} ({job.elapsed:.0f}s)"
+    if progress is None:
+        st.info(f"⏳ {status}")
+    else:
+        st.progress(progress, text=f"⏳ {status}")
+    return None
+
+def rerun_while_jobs_pending(poll_seconds: float = 1.0):
+    """Reruns the page after a short wait if run_in_background() showed an unfinished job in this run."""
+    if st.session_state.pop('_jobs_pending', False):
+        time.sleep(poll_seconds)
+        st.rerun()
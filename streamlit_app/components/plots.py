@@ -6,46 +6,122 @@ import plotly.graph_objects as go
 import streamlit as st
 import numpy as np
 
-@st.cache_data
-def fetch_data_from_parquet():
+from src.analysis.geography import index_geo_hierarchy
+from src.data_processing.loader import load_app_data
+from src.analysis.sampling import is_sample, estimate_totals
+from streamlit_app.components.figure_cache import file_fingerprint, stamp_fingerprint
+from streamlit_app.components.app_dataset import APP_DATA_PATH, refresh_app_dataset
+
+@st.cache_data(max_entries=4)
+def _read_app_parquet(file_path, fingerprint):
+    # The fingerprint (path, size, mtime) is part of the cache key, so a new export is read again.
+    # It also lets the figure cache recognize this dataset without hashing it.
+    return stamp_fingerprint(load_app_data(file_path), fingerprint)
+
+def fetch_data_from_parquet(sample=False):
     """
-    Fetches the pre-processed data from the Parquet file.
+    Fetches the pre-processed data from the Parquet export.
     This makes the app self-contained and removes the database dependency.
+
+    When the export includes the partitioned dataset (streamlit_app/data/master_partitions),
+    the app keeps it in memory and each call only loads partitions added or changed since the
+    last one (see components/app_dataset.py). Otherwise master_data.parquet is read, again
+    whenever the file changes.
+
+    With sample=True, returns the stratified sample exported next to it (see
+    src/analysis/sampling.py) instead; the chart functions below weight it automatically.
+
+    The partitioned dataset is shared by every session, so each call gets a shallow copy: with
+    copy-on-write, a page adding or changing columns (or attrs) only changes its own copy.
     """
-    file_path = "streamlit_app/data/master_data.parquet"
+    if not sample:
+        dataset = refresh_app_dataset()
+        if dataset is not None:
+            return dataset.df.copy(deep=False)
+    file_path = "streamlit_app/data/master_sample.parquet" if sample else APP_DATA_PATH
     try:
-        df = pd.read_parquet(file_path)
-        df['order_purchase_timestamp'] = pd.to_datetime(df['order_purchase_timestamp'])
-        df['customer_segment'] = df['customer_segment'].astype('category')
-        return df
+        return _read_app_parquet(file_path, file_fingerprint(file_path))
     except FileNotFoundError:
         st.error(f"Data file not found at {file_path}. Please run `scripts/3_create_parquet_export.py` first.")
         return pd.DataFrame()
 
+@st.cache_data
+def fetch_product_elasticity_table():
+    """
+    Fetches the precomputed product-level elasticity table (see src/analysis/product_elasticity.py).
+    Returns an empty dataframe if it has not been exported yet.
+    """
+    file_path = "streamlit_app/data/product_elasticity.parquet"
+    try:
+        return pd.read_parquet(file_path)
+    except FileNotFoundError:
+        return pd.DataFrame()
+
+@st.cache_resource(max_entries=2)
+def _read_geo_hierarchy(file_path, fingerprint):
+    # Keyed on the file fingerprint like _read_app_parquet(), so a new export replaces the cached index
+    return index_geo_hierarchy(pd.read_parquet(file_path))
+
+def fetch_geo_hierarchy():
+    """
+    Fetches the pre-aggregated state/city/zip hierarchy, indexed by parent node so a drill-down
+    only reads the child rows of the selected node. Returns None if it has not been exported yet.
+    """
+    file_path = "streamlit_app/data/geo_hierarchy.parquet"
+    try:
+        return _read_geo_hierarchy(file_path, file_fingerprint(file_path))
+    except FileNotFoundError:
+        return None
+
+def create_geo_children_bar_chart(children, level_label):
+    """Creates a bar chart of revenue for the child nodes of the selected region."""
+    top = children.nlargest(20, 'revenue').sort_values('revenue')
+    fig = px.bar(top, x='revenue', y='name', orientation='h',
+                 title=f'Top {len(top)} {level_label} by Revenue',
+                 hover_data={'orders': ':,', 'customers': ':,', 'avg_order_value': ':.2f'},
+                 labels={'revenue': 'Total Revenue (R$)', 'name': level_label, 'orders': 'Orders',
+                         'customers': 'Customers', 'avg_order_value': 'Avg. Order Value (R$)'})
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig
+
 def create_sales_overview_line_chart(df):
-    """Creates a line chart of daily total sales."""
-    daily_sales = df.set_index('order_purchase_timestamp').groupby(pd.Grouper(freq='D'))['price'].sum().reset_index()
+    """Creates a line chart of daily total sales. On a sample, adds the 95% confidence band."""
+    if is_sample(df):
+        daily_sales = estimate_totals(df, 'price', by=df['order_purchase_timestamp'].dt.floor('D'))
+        daily_sales = daily_sales.rename(columns={'estimate': 'price'}).rename_axis('order_purchase_timestamp').reset_index()
+    else:
+        daily_sales = df.set_index('order_purchase_timestamp').groupby(pd.Grouper(freq='D'))['price'].sum().reset_index()
     fig = px.line(daily_sales, x='order_purchase_timestamp', y='price', title='Daily Sales Revenue Over Time',
                   labels={'order_purchase_timestamp': 'Date', 'price': 'Total Revenue (R$)'})
+    if is_sample(df):
+        fig.add_trace(go.Scatter(x=daily_sales['order_purchase_timestamp'], y=daily_sales['upper'], mode='lines',
+                                 line=dict(width=0), showlegend=False, hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=daily_sales['order_purchase_timestamp'], y=daily_sales['lower'], mode='lines',
+                                 line=dict(width=0), fill='tonexty', fillcolor='rgba(99,110,250,0.2)',
+                                 name='95% interval', hoverinfo='skip'))
     fig.update_layout(
         plot_bgcolor='rgba(0,0,0,0)',
         paper_bgcolor='rgba(0,0,0,0)'
     )
     return fig
 
-# (Keep the other functions in plots.py, just replace this one)
 def create_segment_distribution_pie_chart(df):
     """Creates a pie chart showing the distribution of customer segments."""
-    # Convert segment numbers to string type FIRST to avoid categorical errors
-    df_copy = df.copy()
-    df_copy['customer_segment'] = df_copy['customer_segment'].astype(str)
+    # Count on the (categorical) column itself and only convert the few segment labels to strings
+    if is_sample(df):
+        counts = df['sample_weight'].groupby(df['customer_segment'], observed=True, dropna=False).sum()
+    else:
+        counts = df['customer_segment'].value_counts(dropna=False)
+    counts = counts[counts > 0]
+    segment_counts = pd.DataFrame({'customer_segment': counts.index.astype(str), 'count': counts.to_numpy()})
 
-    segment_counts = df_copy['customer_segment'].value_counts().reset_index()
-    segment_counts.columns = ['customer_segment', 'count']
-    
-    # Map using string keys, now that the column is string-based
+    # Map using string keys, now that the labels are strings
     segment_names = {'0': 'Best Customers', '1': 'Loyal Customers', '2': 'At-Risk Customers', '3': 'New/Infrequent'}
-    segment_counts['customer_segment'] = segment_counts['customer_segment'].map(segment_names).fillna('Unknown/NaN')
+    segment_counts['customer_segment'] = segment_counts['customer_segment'].map(
+        lambda seg: segment_names.get(seg, f'Segment {seg}' if not pd.isna(seg) and seg != 'nan' else 'Unknown/NaN'))
     
     fig = px.pie(segment_counts, names='customer_segment', values='count', 
                  title='Customer Segment Distribution',
@@ -59,17 +135,36 @@ def create_segment_distribution_pie_chart(df):
     return fig
 
 def create_category_sales_bar_chart(df):
-    """Creates a bar chart for sales by product category."""
-    category_sales = df.groupby('product_category_name_english')['price'].sum().nlargest(15).sort_values(ascending=True).reset_index()
+    """Creates a bar chart for sales by product category. On a sample, adds 95% error bars."""
+    if is_sample(df):
+        category_sales = estimate_totals(df, 'price', by='product_category_name_english').rename(columns={'estimate': 'price'})
+        category_sales = category_sales.nlargest(15, 'price').sort_values('price').rename_axis('product_category_name_english').reset_index()
+        error_x = dict(type='data', symmetric=False, array=category_sales['upper'] - category_sales['price'],
+                       arrayminus=category_sales['price'] - category_sales['lower'])
+    else:
+        category_sales = df.groupby('product_category_name_english')['price'].sum().nlargest(15).sort_values(ascending=True).reset_index()
+        error_x = None
     fig = px.bar(category_sales, y='product_category_name_english', x='price', orientation='h',
                  title='Top 15 Product Categories by Sales Revenue',
                  labels={'product_category_name_english': 'Product Category', 'price': 'Total Revenue (R$)'})
+    if error_x is not None:
+        fig.update_traces(error_x=error_x)
     fig.update_layout(
         plot_bgcolor='rgba(0,0,0,0)',
         paper_bgcolor='rgba(0,0,0,0)'
     )
     return fig
 
+def create_segment_top_categories_bar_chart(df, segment_id, segment_name):
+    """Creates a bar chart of the 5 most purchased product categories of one customer segment."""
+    categories = df.loc[df['customer_segment'] == segment_id, 'product_category_name_english']
+    top_products = categories.value_counts().nlargest(5).reset_index()
+    top_products.columns = ['Product Category', 'Number of Purchases']
+    fig = px.bar(top_products, x='Number of Purchases', y='Product Category', orientation='h',
+                 title=f"Most Popular Categories for {segment_name}")
+    fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
+    return fig
+
 def create_price_elasticity_scatter_plot(df, category):
     """
     Creates an interactive scatter plot showing price vs. demand, with a regression line.
@@ -79,10 +174,14 @@ def create_price_elasticity_scatter_plot(df, category):
     else:
         df_filtered = df
 
-    # Aggregate demand at each price point
-    agg_df = df_filtered.groupby('price').agg(
-        demand=('order_item_id', 'count')
-    ).reset_index()
+    # Aggregate demand at each price point (a sample carries the full-data demand of its points)
+    if is_sample(df_filtered):
+        demand_column = 'price_point_demand' if category != 'All Products' else 'all_price_point_demand'
+        agg_df = df_filtered.groupby('price').agg(demand=(demand_column, 'first')).reset_index()
+    else:
+        agg_df = df_filtered.groupby('price').agg(
+            demand=('order_item_id', 'count')
+        ).reset_index()
 
     if len(agg_df) < 5:
         return go.Figure().update_layout(
@@ -150,7 +249,46 @@ def create_elasticity_comparison_bar_chart(df, elasticity_func):
     
     return fig
 
-import plotly.graph_objects as go
+def create_revenue_curve_chart(sim_df, optimal_price, optimal_price_range=None):
+    """
+    Creates the projected revenue curve, with a shaded confidence band when the simulation
+    includes bootstrap bounds ('Revenue_Lower'/'Revenue_Upper').
+    """
+    fig = go.Figure()
+    if 'Revenue_Lower' in sim_df.columns:
+        fig.add_trace(go.Scatter(x=sim_df['Price'], y=sim_df['Revenue_Upper'], mode='lines',
+                                 line=dict(width=0), showlegend=False, hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=sim_df['Price'], y=sim_df['Revenue_Lower'], mode='lines',
+                                 line=dict(width=0), fill='tonexty', fillcolor='rgba(79, 139, 249, 0.2)',
+                                 name='95% Confidence Band'))
+    fig.add_trace(go.Scatter(x=sim_df['Price'], y=sim_df['Projected_Revenue'], mode='lines',
+                             line=dict(color='#4F8BF9'), name='Projected Revenue'))
+
+    if optimal_price_range is not None:
+        fig.add_vrect(x0=optimal_price_range[0], x1=optimal_price_range[1],
+                      fillcolor='red', opacity=0.1, line_width=0)
+    fig.add_vline(x=optimal_price, line_dash="dash", line_color="red")
+
+    fig.update_layout(
+        title="Projected Revenue Curve",
+        xaxis_title='Price', yaxis_title='Projected Revenue',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig
+
+def create_rolling_elasticity_line_chart(rolling_df, categories):
+    """Creates a line chart of elasticity over time for the selected categories."""
+    plot_df = rolling_df[rolling_df['product_category_name_english'].isin(categories)]
+    fig = px.line(plot_df, x='week', y='elasticity', color='product_category_name_english',
+                  title='Price Elasticity Over Time',
+                  labels={'week': 'Week', 'elasticity': 'Price Elasticity', 'product_category_name_english': 'Category'})
+    fig.add_hline(y=-1, line_dash="dash", line_color="white", annotation_text="Unit Elasticity")
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig
 
 def create_rfm_summary_df(df):
     """
@@ -188,6 +326,35 @@ def create_rfm_summary_df(df):
 
     return segment_summary
 
+def create_scenario_revenue_histogram(total_revenue_draws, baseline_revenue):
+    """
+    Creates a histogram of simulated total weekly revenue, with the current (baseline) revenue marked.
+    """
+    fig = px.histogram(x=total_revenue_draws, nbins=60, title='Simulated Total Weekly Revenue',
+                       labels={'x': 'Total Weekly Revenue (R$)'}, color_discrete_sequence=['#4F8BF9'])
+    fig.add_vline(x=baseline_revenue, line_dash="dash", line_color="white", annotation_text="Current")
+    fig.update_layout(yaxis_title='Draws', bargap=0.02, plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
+    return fig
+
+def create_global_forecast_chart(series_forecast):
+    """
+    Creates a forecast chart (recorded revenue, forecast and interval band) for one series
+    of generate_global_forecast().
+    """
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=series_forecast['ds'], y=series_forecast['yhat_upper'], mode='lines',
+                             line=dict(width=0), showlegend=False, hoverinfo='skip'))
+    fig.add_trace(go.Scatter(x=series_forecast['ds'], y=series_forecast['yhat_lower'], mode='lines',
+                             line=dict(width=0), fill='tonexty', fillcolor='rgba(79, 139, 249, 0.2)',
+                             name='95% interval'))
+    fig.add_trace(go.Scatter(x=series_forecast['ds'], y=series_forecast['y'], mode='markers',
+                             marker=dict(size=3, color='black'), name='Actual'))
+    fig.add_trace(go.Scatter(x=series_forecast['ds'], y=series_forecast['yhat'], mode='lines',
+                             line=dict(color='#4F8BF9'), name='Forecast'))
+    fig.update_layout(xaxis_title='Date', yaxis_title='Predicted Revenue (R$)',
+                      plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
+    return fig
+
 def create_forecast_plot(model, forecast):
     """
     Creates a detailed forecast plot from a Prophet model and forecast dataframe.
@@ -15,6 +15,8 @@ from streamlit_app.components.plots import (
     create_category_sales_bar_chart
 )
 from streamlit_app.components.kpi_cards import create_kpi_card
+from streamlit_app.components.figure_cache import cached_figure
+from src.analysis.sampling import estimate_kpis
 
 st.set_page_config(page_title="Executive Dashboard", layout="wide")
 
@@ -27,8 +29,14 @@ local_css(css_path)
 st.title("📈 Executive Dashboard")
 st.markdown("A high-level overview of key business metrics and performance indicators.")
 
+# --- Sidebar ---
+st.sidebar.header("Dashboard Options")
+approximate = st.sidebar.toggle("Approximate mode (stratified sample)", value=False,
+                                help="Computes KPIs and charts on a category x month sample, with 95% confidence bounds. "
+                                     "Turn off for exact results on the full dataset.")
+
 # --- Corrected Data Fetching ---
-df = fetch_data_from_parquet()
+df = fetch_data_from_parquet(sample=approximate)
 
 if df.empty:
     st.warning("Data file not found. Please run the `scripts/3_create_parquet_export.py` script.")
@@ -36,23 +44,34 @@ if df.empty:
 
 # --- Display KPIs ---
 st.markdown("### Key Performance Indicators")
-total_revenue = df['price'].sum()
-total_orders = df['order_id'].nunique()
-unique_customers = df['customer_unique_id'].nunique()
-avg_order_value = total_revenue / total_orders if total_orders > 0 else 0
-
 col1, col2, col3, col4 = st.columns(4)
-with col1: create_kpi_card("Total Revenue", f"R${total_revenue:,.2f}")
-with col2: create_kpi_card("Total Orders", f"{total_orders:,}")
-with col3: create_kpi_card("Unique Customers", f"{unique_customers:,}")
-with col4: create_kpi_card("Avg. Order Value", f"R${avg_order_value:,.2f}")
+if approximate:
+    st.caption(f"Approximate results from a {len(df):,}-row stratified sample; ± gives the 95% confidence bounds.")
+    kpis = estimate_kpis(df)
+    def bounds(name, fmt):
+        estimate, lower, upper = kpis[name]
+        return f"{fmt.format(estimate)} ± {fmt.format((upper - lower) / 2)}"
+    with col1: create_kpi_card("Total Revenue", bounds('total_revenue', "R${:,.0f}"))
+    with col2: create_kpi_card("Total Orders", bounds('total_orders', "{:,.0f}"))
+    with col3: create_kpi_card("Unique Customers", bounds('unique_customers', "{:,.0f}"))
+    with col4: create_kpi_card("Avg. Order Value", bounds('avg_order_value', "R${:,.2f}"))
+else:
+    total_revenue = df['price'].sum()
+    total_orders = df['order_id'].nunique()
+    unique_customers = df['customer_unique_id'].nunique()
+    avg_order_value = total_revenue / total_orders if total_orders > 0 else 0
+
+    with col1: create_kpi_card("Total Revenue", f"R${total_revenue:,.2f}")
+    with col2: create_kpi_card("Total Orders", f"{total_orders:,}")
+    with col3: create_kpi_card("Unique Customers", f"{unique_customers:,}")
+    with col4: create_kpi_card("Avg. Order Value", f"R${avg_order_value:,.2f}")
 
 st.markdown("<hr>", unsafe_allow_html=True)
 
-# --- Display Charts ---
+# --- Display Charts (rebuilt only when the data changes) ---
 col_left, col_right = st.columns(2, gap="large")
 with col_left:
-    st.plotly_chart(create_sales_overview_line_chart(df), use_container_width=True)
-    st.plotly_chart(create_category_sales_bar_chart(df), use_container_width=True)
+    st.plotly_chart(cached_figure(create_sales_overview_line_chart, df), use_container_width=True)
+    st.plotly_chart(cached_figure(create_category_sales_bar_chart, df), use_container_width=True)
 with col_right:
-    st.plotly_chart(create_segment_distribution_pie_chart(df), use_container_width=True)
\ No newline at end of file
+    st.plotly_chart(cached_figure(create_segment_distribution_pie_chart, df), use_container_width=True)
\ No newline at end of file
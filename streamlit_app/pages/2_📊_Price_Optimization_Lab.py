@@ -1,15 +1,32 @@
 # streamlit_app/pages/2_📊_Price_Optimization_Lab.py
 
 import streamlit as st
-import sys, os, numpy as np, pandas as pd, plotly.express as px
+import sys, os, numpy as np, pandas as pd
 
 # --- Path setup ---
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
 # --- Corrected Imports (Reads from Parquet file, NO database) ---
-from src.analysis.elasticity import calculate_elasticity_and_model
-from src.analysis.cross_elasticity import calculate_cross_price_elasticity
-from streamlit_app.components.plots import fetch_data_from_parquet, create_price_elasticity_scatter_plot
+from src.analysis.elasticity import calculate_elasticity_and_model, bootstrap_elasticity, simulate_revenue_curve
+from src.analysis.sampling import estimate_elasticity_bounds
+from src.analysis.product_elasticity import get_product_elasticity
+from src.analysis.rolling_elasticity import calculate_rolling_elasticity
+from src.analysis.scenarios import estimate_elasticity_matrix, simulate_price_scenario
+from streamlit_app.components.plots import (
+    fetch_data_from_parquet,
+    fetch_product_elasticity_table,
+    create_price_elasticity_scatter_plot,
+    create_revenue_curve_chart,
+    create_rolling_elasticity_line_chart,
+    create_scenario_revenue_histogram
+)
+from streamlit_app.components.job_queue import (
+    run_in_background,
+    rerun_while_jobs_pending,
+    revenue_maximizing_price_job,
+    cross_price_elasticity_job
+)
+from streamlit_app.components.app_dataset import data_version
 
 st.set_page_config(page_title="Price Optimization Lab", layout="wide")
 st.title("📊 Price Optimization Lab")
@@ -21,8 +38,35 @@ if df.empty:
     st.warning("Data file not found. Please run the `scripts/3_create_parquet_export.py` script.")
     st.stop()
 
+# --- Cached bootstrap runs (the leading underscore tells Streamlit not to hash the dataframe) ---
+# `version` is the data_version() of the data each result depends on, so new data only
+# recomputes the analyses of the categories it changed.
+@st.cache_data(show_spinner=False, max_entries=64)
+def get_bootstrap_elasticity(_df, category, n_boot, version):
+    return bootstrap_elasticity(_df, product_category=category, n_boot=n_boot)
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def get_rolling_elasticity(_df, window_weeks, expanding, version):
+    return calculate_rolling_elasticity(_df, window_weeks=window_weeks, expanding=expanding)
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def get_elasticity_matrix(_df, version):
+    return estimate_elasticity_matrix(_df)
+
+# --- Uncertainty options ---
+st.sidebar.header("Uncertainty")
+show_intervals = st.sidebar.checkbox("Show 95% bootstrap confidence intervals", value=True)
+n_boot = st.sidebar.select_slider("Bootstrap resamples", options=[500, 1000, 2000, 5000], value=2000, disabled=not show_intervals)
+approximate = st.sidebar.toggle("Approximate elasticity fits (stratified sample)", value=False,
+                                help="Fits the own-price model on a category x month sample with weighted demand. "
+                                     "Turn off for exact fits on the full dataset.")
+fit_df = fetch_data_from_parquet(sample=True) if approximate else df
+if fit_df.empty:
+    st.stop()
+
 # --- Create Tabs ---
-tab1, tab2 = st.tabs(["📈 Own-Price Elasticity & Profit Simulation", "🔄 Cross-Price Elasticity Analysis"])
+tab1, tab2, tab3, tab4 = st.tabs(["📈 Own-Price Elasticity & Profit Simulation", "🔄 Cross-Price Elasticity Analysis",
+                                  "⏱️ Elasticity Over Time", "🎲 Multi-Category Scenarios"])
 
 # ========================= TAB 1: OWN-PRICE ELASTICITY =========================
 with tab1:
@@ -31,18 +75,27 @@ with tab1:
     cat_list = ['All Products'] + sorted(df['product_category_name_english'].unique().tolist())
     selected_category_own = st.selectbox("Select a Product Category to Analyze", cat_list, key="own_price_cat")
 
-    elasticity, model = calculate_elasticity_and_model(df, product_category=selected_category_own if selected_category_own != 'All Products' else 'all')
+    model_category = selected_category_own if selected_category_own != 'All Products' else 'all'
+    elasticity, model = calculate_elasticity_and_model(fit_df, product_category=model_category)
+    # On the sample, the interval comes from the sampling design instead of a bootstrap
+    bootstrap = get_bootstrap_elasticity(df, model_category, n_boot, data_version(model_category)) if show_intervals and model is not None and not approximate else None
 
     if model is None:
         st.error(f"Could not build a model for '{selected_category_own}'. Insufficient data.")
     else:
-        fig_scatter = create_price_elasticity_scatter_plot(df, selected_category_own if selected_category_own != 'All Products' else 'All Products')
+        fig_scatter = create_price_elasticity_scatter_plot(fit_df, selected_category_own if selected_category_own != 'All Products' else 'All Products')
         st.plotly_chart(fig_scatter, use_container_width=True)
         st.markdown("---")
         
         sim_col1, sim_col2 = st.columns([1, 2])
         with sim_col1:
             st.metric(label="Calculated Price Elasticity", value=f"{elasticity:.2f}")
+            if bootstrap is not None:
+                st.caption(f"95% CI: [{bootstrap['lower']:.2f}, {bootstrap['upper']:.2f}] from {n_boot:,} bootstrap resamples")
+            if approximate:
+                lower, upper = estimate_elasticity_bounds(fit_df, model, product_category=model_category)
+                st.caption(f"Approximate fit on a {len(fit_df):,}-row stratified sample, 95% CI: [{lower:.2f}, {upper:.2f}]. "
+                           "The recommended price below always uses the full dataset.")
 
             default_price = df[df['product_category_name_english'] == selected_category_own]['price'].mean()
             if pd.isna(default_price): default_price = 1.0
@@ -60,27 +113,61 @@ with tab1:
         
         with sim_col2:
             st.subheader("Automated Price Recommendation")
+            # The simulation runs in the background job queue; identical requests from other sessions share one run
+            optimal_request = {'category': selected_category_own, 'n_boot': n_boot if show_intervals else 0}
             if st.button("Find Revenue-Maximizing Price", key="find_optimal"):
-                with st.spinner("Simulating..."):
-                    price_stats = df[df['product_category_name_english'] == selected_category_own]['price'].describe()
-                    min_realistic_price = price_stats.get('25%', price_stats.get('mean', 1) * 0.7)
-                    max_realistic_price = price_stats.get('75%', price_stats.get('mean', 1) * 1.3)
-                    price_range = np.linspace(min_realistic_price, max_realistic_price, 100)
-                    revenues = [p * np.exp(intercept + log_price_coeff * np.log(p)) for p in price_range]
-                    sim_df = pd.DataFrame({'Price': price_range, 'Projected_Revenue': revenues})
-
-                    if sim_df['Projected_Revenue'].isnull().all():
+                st.session_state['optimal_price_request'] = optimal_request
+
+            if st.session_state.get('optimal_price_request') == optimal_request:
+                result = run_in_background(revenue_maximizing_price_job, "Simulating...", **optimal_request,
+                                           data_version=data_version(selected_category_own))
+                if result is not None:
+                    sim_df, optimal_range = result
+
+                    if sim_df is None or sim_df['Projected_Revenue'].isnull().all():
                         st.error("Model failed to produce valid revenue predictions.")
                     else:
                         optimal_idx = sim_df['Projected_Revenue'].idxmax()
                         optimal_price = sim_df.loc[optimal_idx, 'Price']
                         max_revenue = sim_df.loc[optimal_idx, 'Projected_Revenue']
                         st.success(f"💡 Recommended Price: R${optimal_price:.2f}")
+                        if optimal_range is not None:
+                            st.caption(f"95% range of the recommended price: R${optimal_range[0]:.2f} – R${optimal_range[1]:.2f}")
                         st.info(f"Projected Max Revenue: R${max_revenue:,.2f}")
-                        fig_rev = px.line(sim_df, x='Price', y='Projected_Revenue', title="Projected Revenue Curve")
-                        fig_rev.add_vline(x=optimal_price, line_dash="dash", line_color="red")
+                        if 'Revenue_Lower' in sim_df.columns:
+                            st.caption(f"95% band at this price: R${sim_df.loc[optimal_idx, 'Revenue_Lower']:,.2f} – R${sim_df.loc[optimal_idx, 'Revenue_Upper']:,.2f}")
+                        fig_rev = create_revenue_curve_chart(sim_df, optimal_price, optimal_range)
                         st.plotly_chart(fig_rev, use_container_width=True)
 
+    # --- Product-level lookup from the precomputed elasticity table ---
+    st.markdown("---")
+    st.subheader("🔎 Product-Level Elasticity")
+    product_table = fetch_product_elasticity_table()
+    if product_table.empty:
+        st.info("Product elasticity table not found. Run `scripts/run_pipeline.py` or `scripts/3_create_parquet_export.py` to create it.")
+    else:
+        products = product_table if selected_category_own == 'All Products' else \
+            product_table[product_table['product_category_name_english'] == selected_category_own]
+        top_products = products.nlargest(1000, 'demand')['product_id']
+        product_id = st.selectbox("Select a product (top 1,000 by units sold)", top_products, key="product_lookup")
+        product = get_product_elasticity(product_table, product_id) if product_id else None
+
+        if product is not None:
+            p_col1, p_col2, p_col3 = st.columns(3)
+            p_col1.metric("Product Elasticity", f"{product['elasticity']:.2f}")
+            p_col2.metric("Category Elasticity", f"{product['category_elasticity']:.2f}")
+            p_col3.metric("Units Sold", f"{product['demand']:,}")
+            if product['estimate_source'] == 'product':
+                st.caption(f"Fitted on {product['n_price_points']} price points, "
+                           f"shrunk {1 - product['shrinkage_weight']:.0%} toward the category elasticity.")
+            else:
+                st.caption("Too little price variation for this product; using its category's elasticity.")
+
+            product_prices = np.linspace(product['min_price'], product['max_price'], 100)
+            product_sim, _ = simulate_revenue_curve(product_prices, product['intercept'], product['elasticity'])
+            best = product_sim.loc[product_sim['Projected_Revenue'].idxmax()]
+            st.success(f"💡 Revenue-maximizing price within its observed range: R${best['Price']:.2f}")
+
 # ========================= TAB 2: CROSS-PRICE ELASTICITY =========================
 with tab2:
     st.header("Discover Product Relationships")
@@ -94,14 +181,22 @@ with tab2:
     with col2:
         price_cat = st.selectbox("Product B (Price changes)", cat_list_no_all, index=1)
         
+    cross_request = {'demand_category': demand_cat, 'price_category': price_cat, 'n_boot': n_boot if show_intervals else 0}
     if st.button("Calculate Cross-Price Elasticity", key="calc_cross"):
+        st.session_state['cross_request'] = cross_request
+
+    if st.session_state.get('cross_request') == cross_request:
         if demand_cat == price_cat:
             st.error("Please select two different product categories to analyze.")
         else:
-            with st.spinner(f"Analyzing relationship between '{demand_cat}' and '{price_cat}'..."):
-                score = calculate_cross_price_elasticity(df, demand_category=demand_cat, price_category=price_cat)
-                
+            result = run_in_background(cross_price_elasticity_job, f"Analyzing relationship between '{demand_cat}' and '{price_cat}'...",
+                                       **cross_request, data_version=data_version(demand_cat, price_cat))
+            if result is not None:
+                score, interval = result['score'], result['interval']
+
                 st.metric("Cross-Price Elasticity Score", value=f"{score:.2f}" if score is not None else "N/A")
+                if interval is not None:
+                    st.caption(f"95% CI: [{interval[0]:.2f}, {interval[1]:.2f}] from {n_boot:,} bootstrap resamples")
 
                 if score is not None:
                     if score > 0.1:
@@ -111,4 +206,76 @@ with tab2:
                     else:
                         st.info(f"**Conclusion: These products are UNRELATED.**\n\nChanging the price of '{price_cat}' has little to no effect on the demand for '{demand_cat}'.")
                 else:
-                    st.error("Could not calculate a reliable score due to insufficient overlapping sales data.")
\ No newline at end of file
+                    st.error("Could not calculate a reliable score due to insufficient overlapping sales data.")
+
+# ========================= TAB 3: ELASTICITY OVER TIME =========================
+with tab3:
+    st.header("How Price Sensitivity Changes Over Time")
+    st.markdown("Weekly elasticity estimates over a rolling or expanding window of order history.")
+
+    t_col1, t_col2 = st.columns(2)
+    with t_col1:
+        window_type = st.radio("Window", ["Rolling", "Expanding"], horizontal=True, key="window_type")
+    with t_col2:
+        window_weeks = st.slider("Rolling window (weeks)", 4, 52, 12, 4, disabled=window_type == "Expanding")
+
+    rolling_df = get_rolling_elasticity(df, window_weeks, window_type == "Expanding", data_version())
+    top_cats = df['product_category_name_english'].value_counts().nlargest(3).index.tolist()
+    trend_cats = st.multiselect("Categories to compare", ['all'] + cat_list_no_all, default=['all'] + top_cats[:2])
+
+    if rolling_df.empty or not trend_cats:
+        st.info("Not enough weekly price variation to estimate elasticity over time.")
+    else:
+        st.plotly_chart(create_rolling_elasticity_line_chart(rolling_df, trend_cats), use_container_width=True)
+
+# ========================= TAB 4: MULTI-CATEGORY SCENARIOS =========================
+with tab4:
+    st.header("Price Scenario Simulator")
+    st.markdown("Change the prices of several categories at once. Effects are propagated through own- and "
+                "cross-price elasticities, and parameter uncertainty is sampled with Monte Carlo draws.")
+
+    elasticity_model = get_elasticity_matrix(df, data_version())
+    scenario_cats = elasticity_model['elasticity'].index.tolist()
+
+    s_col1, s_col2 = st.columns([1, 2])
+    with s_col1:
+        scenario_input = st.data_editor(
+            pd.DataFrame({'Category': [scenario_cats[0]], 'Price Change (%)': [10.0]}),
+            num_rows="dynamic", hide_index=True, key="scenario_editor",
+            column_config={
+                'Category': st.column_config.SelectboxColumn(options=scenario_cats, required=True),
+                'Price Change (%)': st.column_config.NumberColumn(min_value=-90.0, max_value=200.0, step=1.0, required=True)
+            })
+        include_cross = st.checkbox("Include cross-price effects", value=True, key="scenario_cross")
+        n_draws = st.select_slider("Monte Carlo draws", options=[1000, 5000, 10000, 50000], value=10000, key="scenario_draws")
+
+    scenario = scenario_input.dropna().groupby('Category')['Price Change (%)'].last() / 100
+    summary, total_draws = simulate_price_scenario(elasticity_model, scenario.to_dict(), n_draws=n_draws,
+                                                   include_cross=include_cross)
+    baseline_total = summary['baseline_weekly_revenue'].sum()
+    low, median, high = np.percentile(total_draws, [5, 50, 95])
+
+    with s_col2:
+        m_col1, m_col2, m_col3 = st.columns(3)
+        m_col1.metric("Current Weekly Revenue", f"R${baseline_total:,.0f}")
+        m_col2.metric("Simulated Weekly Revenue (median)", f"R${median:,.0f}", f"{median / baseline_total - 1:+.1%}")
+        m_col3.metric("Chance Revenue Increases", f"{(total_draws > baseline_total).mean():.0%}")
+        st.caption(f"90% interval: R${low:,.0f} – R${high:,.0f} from {n_draws:,} draws")
+        st.plotly_chart(create_scenario_revenue_histogram(total_draws, baseline_total), use_container_width=True)
+
+    # Categories whose demand moves the most (changed directly or through cross effects)
+    summary['demand_change'] = summary['weekly_demand_mean'] / summary['baseline_weekly_demand'] - 1
+    affected = summary[(summary['price_change'] != 0) | (summary['demand_change'].abs() > 1e-9)]
+    affected = affected.reindex(affected['demand_change'].abs().sort_values(ascending=False).index)
+    st.markdown("#### Affected Categories")
+    st.dataframe(affected.rename(columns={
+        'product_category_name_english': 'Category', 'price_change': 'Price Change', 'demand_change': 'Demand Change',
+        'baseline_weekly_demand': 'Weekly Demand (now)', 'weekly_demand_mean': 'Weekly Demand (simulated)',
+        'baseline_weekly_revenue': 'Weekly Revenue (now)', 'weekly_revenue_mean': 'Weekly Revenue (simulated)',
+        'weekly_revenue_p5': 'Revenue p5', 'weekly_revenue_p95': 'Revenue p95'
+    })[['Category', 'Price Change', 'Demand Change', 'Weekly Demand (now)', 'Weekly Demand (simulated)',
+        'Weekly Revenue (now)', 'Weekly Revenue (simulated)', 'Revenue p5', 'Revenue p95']].round(3),
+        use_container_width=True, hide_index=True)
+
+# Keep polling while a background job shown on this page is still running
+rerun_while_jobs_pending()
@@ -4,14 +4,15 @@ import streamlit as st
 import pandas as pd
 import sys
 import os
-import plotly.express as px
 
 # --- Path setup ---
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
 # --- Corrected Imports (Reads from Parquet file, NO database) ---
-from streamlit_app.components.plots import fetch_data_from_parquet
+from streamlit_app.components.plots import fetch_data_from_parquet, create_segment_top_categories_bar_chart
 from streamlit_app.components.kpi_cards import create_kpi_card
+from streamlit_app.components.figure_cache import cached_figure
+from src.analysis.segmentation import select_num_clusters
 
 st.set_page_config(page_title="Customer Intelligence", layout="wide")
 
@@ -41,11 +42,17 @@ segment_descriptions = {
     2: "Customers at risk of churning. Haven't purchased recently. Re-engage with targeted marketing and special discounts.",
     3: "New or one-time buyers. The goal is to encourage a second purchase with follow-up engagement."
 }
-tab_names = [segment_names[i] for i in sorted(segment_names.keys())]
+# Segments beyond the four named ones (when the pipeline picks the cluster count automatically)
+segment_ids = sorted(int(s) for s in df['customer_segment'].dropna().unique())
+for segment_id in segment_ids:
+    segment_names.setdefault(segment_id, f"Segment {segment_id}")
+    segment_descriptions.setdefault(segment_id, "An additional customer segment found by K-Means clustering.")
+
+tab_names = [segment_names[i] for i in segment_ids]
 tabs = st.tabs(tab_names)
 
 for i, tab in enumerate(tabs):
-    segment_id = sorted(segment_names.keys())[i]
+    segment_id = segment_ids[i]
     with tab:
         st.subheader(f"Profile: {segment_names[segment_id]}")
         st.markdown(f"*{segment_descriptions[segment_id]}*")
@@ -64,10 +71,20 @@ for i, tab in enumerate(tabs):
             
         st.markdown("#### Top 5 Products Purchased")
         if not segment_df.empty:
-            top_products = segment_df['product_category_name_english'].value_counts().nlargest(5).reset_index()
-            top_products.columns = ['Product Category', 'Number of Purchases']
-            fig_bar = px.bar(top_products, x='Number of Purchases', y='Product Category', orientation='h', title=f"Most Popular Categories for {segment_names[segment_id]}")
-            fig_bar.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
+            # Keyed on the full dataset and the segment, so the cache recognizes the data without hashing it
+            fig_bar = cached_figure(create_segment_top_categories_bar_chart, df,
+                                    segment_id=segment_id, segment_name=segment_names[segment_id])
             st.plotly_chart(fig_bar, use_container_width=True)
         else:
-            st.info("No data available for this segment.")
\ No newline at end of file
+            st.info("No data available for this segment.")
+
+# --- Cluster count diagnostics ---
+st.markdown("<hr>", unsafe_allow_html=True)
+with st.expander("How many segments? Cluster count diagnostics"):
+    st.markdown("Compares K-Means fits for 2–10 segments. Lower inertia and Davies-Bouldin, and higher silhouette, indicate better-separated segments.")
+    if st.button("Compare Cluster Counts", key="compare_k"):
+        with st.spinner("Fitting K-Means for each cluster count in parallel..."):
+            comparison = select_num_clusters(df)
+        best_k = int(comparison.loc[comparison['silhouette'].idxmax(), 'k'])
+        st.dataframe(comparison.round(3), use_container_width=True, hide_index=True)
+        st.info(f"Best silhouette score at **{best_k}** segments. Set `num_clusters` in config.ini (or `auto`) and re-run the pipeline to apply it.")
@@ -9,9 +9,10 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
 # --- Corrected Imports (Reads from Parquet file, NO database) ---
-from src.analysis.forecasting import generate_forecast
-from streamlit_app.components.plots import fetch_data_from_parquet
-from prophet.plot import plot_plotly, plot_components_plotly
+from src.analysis.forecasting import generate_global_forecast
+from streamlit_app.components.plots import fetch_data_from_parquet, create_global_forecast_chart
+from streamlit_app.components.job_queue import run_in_background, rerun_while_jobs_pending, forecast_job
+from streamlit_app.components.app_dataset import data_version, fetch_daily_sales
 
 st.set_page_config(page_title="Demand Forecast", layout="wide")
 st.title("🔮 Demand Forecast Dashboard")
@@ -29,17 +30,62 @@ st.sidebar.header("Forecast Options")
 forecast_days = st.sidebar.slider("Days to Forecast:", 30, 365, 90, 30)
 categories = ['All Products'] + sorted(df['product_category_name_english'].unique().tolist())
 selected_category = st.sidebar.selectbox("Select Product Category", categories)
+forecast_model = st.sidebar.radio("Forecast Model", ["Prophet (selected category)", "Global (all categories)"],
+                                  help="The global model forecasts every category in one fit, with shared seasonality, "
+                                       "and reconciles category forecasts so they add up to the total.")
+
+# --- Global model: one cached fit covers every category, from the pre-aggregated daily series ---
+@st.cache_data(show_spinner=False, max_entries=8)
+def get_global_forecast(_daily_sales, periods, version):
+    return generate_global_forecast(None, periods=periods, daily_sales=_daily_sales)
+
+if forecast_model.startswith("Global"):
+    title_category = "All Products" if selected_category == 'All Products' else selected_category
+    with st.spinner("Fitting the global forecast model..."):
+        global_forecast = get_global_forecast(fetch_daily_sales(df), forecast_days, data_version())
+    series_forecast = global_forecast[global_forecast['product_category'] == ('all' if selected_category == 'All Products' else selected_category)]
+    if series_forecast.empty:
+        st.error(f"Could not generate a forecast for '{title_category}'. It has too little sales history.")
+        st.stop()
+
+    st.header(f"Revenue Forecast: {title_category}")
+    st.success(f"Global forecast generated for {global_forecast['product_category'].nunique() - 1} categories "
+               f"for the next {forecast_days} days (category forecasts add up to the total).")
+    st.plotly_chart(create_global_forecast_chart(series_forecast), use_container_width=True)
+
+    st.header("Forecasted Metrics")
+    history = series_forecast[series_forecast['y'].notna()]
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Last Recorded Daily Revenue", f"R${history['y'].iloc[-1]:,.2f}",
+                  f"on {history['ds'].iloc[-1].strftime('%Y-%m-%d')}")
+    with col2:
+        st.metric(f"Projected Revenue in {forecast_days} Days", f"R${series_forecast['yhat'].iloc[-1]:,.2f}",
+                  f"for {series_forecast['ds'].iloc[-1].strftime('%Y-%m-%d')}")
+    st.stop()
 
-# --- Generate Forecast ---
+# --- Generate Forecast (fitted in the background job queue; the page polls until it is ready) ---
 title_category = "All Products" if selected_category == 'All Products' else selected_category
-with st.spinner(f"Generating a forecast for '{title_category}'..."):
-    model, forecast = generate_forecast(df, periods=forecast_days, product_category=selected_category)
+result = run_in_background(forecast_job, f"Generating a forecast for '{title_category}'...",
+                           periods=forecast_days, product_category='all' if selected_category == 'All Products' else selected_category,
+                           data_version=data_version(selected_category))
+if result is None:
+    rerun_while_jobs_pending()
+    st.stop()
 
-if model is None or forecast is None:
+model_json, forecast = result
+if model_json is None or forecast is None:
     st.error(f"Could not generate a forecast for '{title_category}'. The dataset may not have enough consistent sales data (at least 60 days required).")
     st.stop()
 
 # --- Display Forecast Plot ---
+# Prophet is imported here, after the sidebar and progress have rendered, because loading it
+# dominates this page's start-up time.
+from prophet.plot import plot_plotly, plot_components_plotly
+from prophet.serialize import model_from_json
+
+model = model_from_json(model_json)
+
 st.header(f"Revenue Forecast: {title_category}")
 st.success(f"Forecast generated successfully for the next {forecast_days} days.")
 fig_forecast = plot_plotly(model, forecast)
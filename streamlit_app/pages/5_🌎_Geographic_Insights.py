@@ -0,0 +1,71 @@
+# streamlit_app/pages/5_🌎_Geographic_Insights.py
+
+import streamlit as st
+import sys
+import os
+
+# --- Path setup ---
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+# --- Imports (reads the pre-aggregated hierarchy, NOT the raw order rows) ---
+from src.analysis.geography import ROOT_NODE, get_geo_children, get_geo_node
+from streamlit_app.components.plots import fetch_geo_hierarchy, create_geo_children_bar_chart
+from streamlit_app.components.kpi_cards import create_kpi_card
+
+st.set_page_config(page_title="Geographic Insights", layout="wide")
+
+def local_css(file_name):
+    with open(file_name) as f:
+        st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+css_path = os.path.join(os.path.dirname(__file__), '..', 'assets', 'style.css')
+local_css(css_path)
+
+st.title("🌎 Geographic Insights")
+st.markdown("Drill down from state to city to zip code prefix to see where revenue and customers come from.")
+
+hierarchy = fetch_geo_hierarchy()
+if hierarchy is None:
+    st.warning("Geographic data not found. Please run `scripts/run_pipeline.py` or `scripts/3_create_parquet_export.py` to generate it.")
+    st.stop()
+
+# --- Drill-down selection: each step only reads the children of the selected node ---
+states = get_geo_children(hierarchy, ROOT_NODE)
+col_state, col_city = st.columns(2)
+with col_state:
+    state = st.selectbox("State", ['All States'] + states['name'].tolist(), key="geo_state")
+
+selected_id, parent_id, children, child_label = ROOT_NODE, '', states, 'States'
+if state != 'All States':
+    state_id = states.loc[states['name'] == state, 'node_id'].iloc[0]
+    cities = get_geo_children(hierarchy, state_id)
+    selected_id, parent_id, children, child_label = state_id, ROOT_NODE, cities, 'Cities'
+    with col_city:
+        city = st.selectbox("City", ['All Cities'] + cities['name'].tolist(), key="geo_city")
+    if city != 'All Cities':
+        city_id = cities.loc[cities['name'] == city, 'node_id'].iloc[0]
+        selected_id, parent_id = city_id, state_id
+        children, child_label = get_geo_children(hierarchy, city_id), 'Zip Code Prefixes'
+
+node = get_geo_node(hierarchy, selected_id, parent_id)
+
+# --- KPIs for the selected region ---
+st.markdown(f"### {node['name']}")
+col1, col2, col3, col4 = st.columns(4)
+with col1: create_kpi_card("Total Revenue", f"R${node['revenue']:,.2f}")
+with col2: create_kpi_card("Total Orders", f"{node['orders']:,}")
+with col3: create_kpi_card("Unique Customers", f"{node['customers']:,}")
+with col4: create_kpi_card("Avg. Order Value", f"R${node['avg_order_value']:,.2f}")
+
+st.markdown("<hr>", unsafe_allow_html=True)
+
+# --- Breakdown of the next level down ---
+col_left, col_right = st.columns([3, 2], gap="large")
+with col_left:
+    st.plotly_chart(create_geo_children_bar_chart(children, child_label), use_container_width=True)
+with col_right:
+    st.markdown(f"#### {child_label}")
+    table = children[['name', 'revenue', 'orders', 'customers', 'avg_order_value']].rename(columns={
+        'name': child_label, 'revenue': 'Revenue (R$)', 'orders': 'Orders',
+        'customers': 'Customers', 'avg_order_value': 'Avg. Order Value (R$)'
+    })
+    st.dataframe(table.round(2), use_container_width=True, hide_index=True)
@@ -0,0 +1,59 @@
+# tests/conftest.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_processing.loader import enforce_master_schema
+
+def make_master_df(n_orders: int = 3000, n_categories: int = 4, products_per_category: int = 25,
+                   start: str = '2017-01-01', days: int = 540, seed: int = 0):
+    """
+    A small synthetic master dataframe with the MASTER_SCHEMA columns. Products sell at up to five
+    discount levels of their base price, and deeper discounts sell more often, so the log-log models
+    have a negative slope. Every fifth product only ever sells at two prices.
+    """
+    rng = np.random.default_rng(seed)
+    categories = [f"cat_{i}" for i in range(n_categories)]
+    products = pd.DataFrame({
+        'product_id': [f"{i:032x}" for i in range(n_categories * products_per_category)],
+        'product_category_name_english': np.repeat(categories, products_per_category),
+        'base_price': np.round(rng.uniform(10, 200, n_categories * products_per_category), 2)
+    })
+    customers = pd.DataFrame({
+        'customer_unique_id': [f"{i:032x}" for i in range(n_orders // 2)],
+        'customer_zip_code_prefix': rng.integers(1000, 99999, n_orders // 2),
+        'customer_state': rng.choice(['SP', 'RJ', 'MG', 'RS'], n_orders // 2)
+    })
+    customers['customer_city'] = customers['customer_state'].str.lower() + '_city_' + \
+        (customers['customer_zip_code_prefix'] % 5).astype(str)
+
+    rows = []
+    timestamps = pd.Timestamp(start) + pd.to_timedelta(rng.uniform(0, days, n_orders), unit='D')
+    for order, timestamp in enumerate(timestamps.round('s')):
+        customer = rng.integers(len(customers))
+        for item in range(1, rng.choice([1, 1, 1, 2, 3]) + 1):
+            product = rng.integers(len(products))
+            discount = rng.choice([1.0, 0.9, 0.8, 0.7, 0.6], p=[0.1, 0.15, 0.2, 0.25, 0.3])
+            if product % 5 == 0:
+                discount = 1.0 if discount >= 0.8 else 0.9
+            rows.append((order, item, product, customer, timestamp, discount))
+
+    order, item, product, customer, timestamp, discount = map(np.array, zip(*rows))
+    df = pd.DataFrame({
+        'order_id': [f"{o + 10**6:032x}" for o in order],
+        'order_item_id': item,
+        'product_id': products['product_id'].to_numpy()[product],
+        'price': np.round(products['base_price'].to_numpy()[product] * discount, 2),
+        'freight_value': np.round(rng.uniform(5, 30, len(rows)), 2),
+        'customer_id': [f"{o + 2 * 10**6:032x}" for o in order],
+        'order_purchase_timestamp': pd.to_datetime(timestamp),
+        'product_category_name_english': products['product_category_name_english'].to_numpy()[product],
+        'customer_segment': customer % 4
+    })
+    df = df.join(customers.iloc[customer].reset_index(drop=True))
+    return enforce_master_schema(df)
+
+@pytest.fixture(scope='session')
+def master_df():
+    return make_master_df()
@@ -0,0 +1,331 @@
+# tests/test_analysis.py
+
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.api as sm
+
+from src.analysis.cross_elasticity import calculate_cross_price_elasticity
+from src.analysis.elasticity import _aggregate_price_demand, bootstrap_elasticity, calculate_elasticity_and_model
+from src.analysis.product_elasticity import calculate_product_elasticities
+from src.analysis.rfm_store import RFMStateStore
+from src.analysis.rolling_elasticity import calculate_rolling_elasticity
+from src.analysis.sampling import (build_stratified_sample, estimate_elasticity_bounds, estimate_kpis,
+                                   estimate_totals)
+from src.analysis.scenarios import _ols_slope_and_se, estimate_elasticity_matrix, simulate_price_scenario
+from src.analysis.segmentation import (_stratified_sample, calculate_rfm_features, scale_rfm_features,
+                                       select_num_clusters)
+from src.analysis.vectorized_ols import bootstrap_simple_ols, percentile_interval, simple_ols_from_sums
+
+def _ols(x, y):
+    """(intercept, slope) of a plain statsmodels OLS fit."""
+    params = sm.OLS(y, sm.add_constant(x)).fit().params
+    return params[0], params[1]
+
+# ========================= VECTORIZED OLS (BOOTSTRAP) =========================
+
+def test_simple_ols_from_sums_matches_statsmodels():
+    rng = np.random.default_rng(1)
+    x = rng.normal(size=(8, 40))
+    y = 1.5 - 0.7 * x + rng.normal(size=(8, 40))
+
+    intercepts, slopes = simple_ols_from_sums(40, x.sum(axis=1), y.sum(axis=1), (x * x).sum(axis=1), (x * y).sum(axis=1))
+
+    expected = np.array([_ols(x[i], y[i]) for i in range(8)])
+    np.testing.assert_allclose(intercepts, expected[:, 0], rtol=1e-10)
+    np.testing.assert_allclose(slopes, expected[:, 1], rtol=1e-10)
+
+def test_simple_ols_from_sums_without_x_variation_is_nan():
+    x = np.full(5, 2.0)
+    intercept, slope = simple_ols_from_sums(5, x.sum(), 10.0, (x * x).sum(), (x * 3).sum())
+    assert np.isnan(slope) and np.isnan(intercept)
+
+def test_bootstrap_matches_ols_on_the_same_resamples():
+    rng = np.random.default_rng(2)
+    x = rng.uniform(1, 5, 30)
+    y = 4 - 1.2 * x + rng.normal(scale=0.5, size=30)
+    n_boot, chunk_size = 120, 50
+
+    intercepts, slopes = bootstrap_simple_ols(x, y, n_boot=n_boot, random_state=7, chunk_size=chunk_size)
+
+    # Rebuild the resamples: one generator per chunk, spawned from the seed
+    sizes = [min(chunk_size, n_boot - start) for start in range(0, n_boot, chunk_size)]
+    resamples = np.vstack([np.random.default_rng(seed).integers(0, len(x), size=(size, len(x)))
+                           for size, seed in zip(sizes, np.random.SeedSequence(7).spawn(len(sizes)))])
+    expected = np.array([_ols(x[rows], y[rows]) for rows in resamples])
+
+    assert intercepts.shape == slopes.shape == (n_boot,)
+    np.testing.assert_allclose(intercepts, expected[:, 0], rtol=1e-8)
+    np.testing.assert_allclose(slopes, expected[:, 1], rtol=1e-8)
+
+def test_bootstrap_does_not_depend_on_n_jobs():
+    rng = np.random.default_rng(3)
+    x, y = rng.normal(size=25), rng.normal(size=25)
+    serial = bootstrap_simple_ols(x, y, n_boot=300, chunk_size=100, n_jobs=1)
+    parallel = bootstrap_simple_ols(x, y, n_boot=300, chunk_size=100, n_jobs=2)
+    np.testing.assert_array_equal(serial[0], parallel[0])
+    np.testing.assert_array_equal(serial[1], parallel[1])
+
+def test_percentile_interval_ignores_nan():
+    samples = np.concatenate([np.arange(101, dtype=np.float64), [np.nan] * 10])
+    assert percentile_interval(samples, ci=0.9) == pytest.approx((5.0, 95.0))
+
+def test_bootstrap_elasticity_brackets_the_point_estimate(master_df):
+    elasticity, _ = calculate_elasticity_and_model(master_df, 'cat_1')
+    result = bootstrap_elasticity(master_df, 'cat_1', n_boot=500)
+    assert result['lower'] < elasticity < result['upper']
+
+    # Same resampling of the price points as bootstrap_simple_ols() on the model's data
+    agg_df = _aggregate_price_demand(master_df, 'cat_1')
+    _, slopes = bootstrap_simple_ols(agg_df['log_price'], agg_df['log_demand'], n_boot=500)
+    np.testing.assert_array_equal(result['slopes'], slopes)
+
+# ========================= PRODUCT ELASTICITIES =========================
+
+def _product_ols_slopes(df):
+    """Log-log OLS slope of every product with at least two prices, fitted one product at a time."""
+    points = df.groupby(['product_id', 'price']).size().rename('demand').reset_index()
+    slopes = {}
+    for product_id, group in points.groupby('product_id'):
+        if len(group) >= 2:
+            slopes[product_id] = _ols(np.log(group['price'].to_numpy()), np.log(group['demand'].to_numpy()))[1]
+    return pd.Series(slopes)
+
+def test_product_elasticities_without_shrinkage_match_per_product_ols(master_df):
+    table = calculate_product_elasticities(master_df, min_price_points=2, shrinkage_strength=0.0).set_index('product_id')
+    expected = _product_ols_slopes(master_df)
+
+    assert (table['estimate_source'] == 'product').all()
+    np.testing.assert_allclose(table.loc[expected.index, 'raw_elasticity'], expected, rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(table.loc[expected.index, 'elasticity'], expected, rtol=1e-9, atol=1e-12)
+
+def test_category_elasticities_match_the_category_model(master_df):
+    table = calculate_product_elasticities(master_df)
+    for category, prior in table.groupby('product_category_name_english')['category_elasticity'].first().items():
+        assert prior == pytest.approx(calculate_elasticity_and_model(master_df, category)[0], rel=1e-9)
+
+def test_products_with_few_prices_are_pulled_toward_their_category(master_df):
+    table = calculate_product_elasticities(master_df, min_price_points=3, shrinkage_strength=0.5)
+    few_prices = table['n_price_points'] < 3
+    assert few_prices.any() and (~few_prices).any()
+
+    # Too few prices for an own fit: the category elasticity
+    assert (table.loc[few_prices, 'estimate_source'] == 'category').all()
+    np.testing.assert_allclose(table.loc[few_prices, 'elasticity'], table.loc[few_prices, 'category_elasticity'])
+
+    # Fitted products land between their own fit and the category elasticity...
+    fitted = table[~few_prices]
+    weight = fitted['shrinkage_weight']
+    assert ((weight > 0) & (weight < 1)).all()
+    expected = weight * fitted['raw_elasticity'] + (1 - weight) * fitted['category_elasticity']
+    np.testing.assert_allclose(fitted['elasticity'], expected, rtol=1e-9)
+
+    # ...with a weight that grows with the product's own price variation (centered sum of squares
+    # of its log prices), so products with few price points are pulled further toward the category
+    log_prices = np.log(master_df.groupby(['product_id', 'price']).size().reset_index(level='price')['price'])
+    sxx = ((log_prices - log_prices.groupby(level='product_id').transform('mean')) ** 2).groupby(level='product_id').sum()
+    two_points = calculate_product_elasticities(master_df, min_price_points=2, shrinkage_strength=0.5)
+    two_points['sxx'] = two_points['product_id'].map(sxx)
+    np.testing.assert_allclose(two_points['shrinkage_weight'], two_points['sxx'] / (two_points['sxx'] + 0.5))
+
+    few = two_points['n_price_points'] < 3
+    assert two_points.loc[few, 'shrinkage_weight'].max() < two_points.loc[~few, 'shrinkage_weight'].min()
+    pulled = (two_points['elasticity'] - two_points['category_elasticity']).abs()
+    unshrunk = (two_points['raw_elasticity'] - two_points['category_elasticity']).abs()
+    assert (pulled[few] < 0.5 * unshrunk[few]).all()
+
+# ========================= ROLLING ELASTICITY =========================
+
+def _refit_windows(df, window_weeks, expanding, min_price_points):
+    """Refits the weekly price-point OLS on every window, one category and window at a time."""
+    weeks = df['order_purchase_timestamp'].dt.to_period('W').dt.start_time
+    points = pd.concat([
+        df.groupby(['product_category_name_english', weeks, 'price']).size().reset_index(),
+        df.groupby([weeks, 'price']).size().reset_index().assign(product_category_name_english='all')
+    ], ignore_index=True).rename(columns={0: 'demand', 'order_purchase_timestamp': 'week'})
+
+    rows = []
+    for week in pd.date_range(weeks.min(), weeks.max(), freq='7D'):
+        start = weeks.min() if expanding else week - pd.Timedelta(weeks=window_weeks - 1)
+        window = points[(points['week'] >= start) & (points['week'] <= week)]
+        for category, group in window.groupby('product_category_name_english'):
+            if len(group) >= min_price_points:
+                _, slope = _ols(np.log(group['price'].to_numpy()), np.log(group['demand'].to_numpy()))
+                rows.append((category, week, slope, len(group)))
+    return pd.DataFrame(rows, columns=['product_category_name_english', 'week', 'elasticity', 'n_obs'])
+
+@pytest.mark.parametrize('expanding', [False, True])
+def test_incremental_windows_match_refitting_each_window(master_df, expanding):
+    result = calculate_rolling_elasticity(master_df, window_weeks=8, expanding=expanding, min_price_points=10)
+    expected = _refit_windows(master_df, window_weeks=8, expanding=expanding, min_price_points=10)
+
+    keys = ['product_category_name_english', 'week']
+    merged = expected.merge(result, on=keys, how='outer', suffixes=('_refit', ''), indicator=True)
+    assert (merged['_merge'] == 'both').all()
+    assert (merged['n_obs'] == merged['n_obs_refit']).all()
+    np.testing.assert_allclose(merged['elasticity'], merged['elasticity_refit'], rtol=1e-7, atol=1e-9)
+    assert set(result['window']) == {'expanding' if expanding else 'rolling_8w'}
+
+# ========================= CLUSTER-COUNT SELECTION =========================
+
+def test_cluster_scores_match_sklearn_on_the_full_data(master_df):
+    from sklearn.cluster import KMeans
+    from sklearn.metrics import davies_bouldin_score, silhouette_score
+
+    # Samples larger than the customer base: every score is computed on all customers
+    scores = select_num_clusters(master_df, k_values=[2, 3, 4], silhouette_sample_size=10**6,
+                                 fit_sample_size=10**6, n_jobs=1).set_index('k')
+    X, _ = scale_rfm_features(calculate_rfm_features(master_df))
+
+    assert list(scores.index) == [2, 3, 4]
+    for k in scores.index:
+        kmeans = KMeans(n_clusters=k, init='k-means++', random_state=42, n_init=3).fit(X)
+        assert scores.loc[k, 'inertia'] == pytest.approx(kmeans.inertia_, rel=1e-9)
+        assert scores.loc[k, 'davies_bouldin'] == pytest.approx(davies_bouldin_score(X, kmeans.labels_), rel=1e-9)
+        assert scores.loc[k, 'silhouette'] == pytest.approx(silhouette_score(X, kmeans.labels_), rel=1e-9)
+
+def test_silhouette_sample_is_proportional_with_a_floor_per_cluster():
+    labels = np.repeat([0, 1, 2], [9000, 900, 20])
+    sample = _stratified_sample(labels, sample_size=1000, rng=np.random.default_rng(0), min_per_cluster=50)
+
+    counts = np.bincount(labels[sample])
+    assert list(counts) == [907, 91, 20]  # proportional shares; the small cluster is taken whole
+    assert len(np.unique(sample)) == len(sample)
+
+# ========================= RFM STATE STORE =========================
+
+RFM_COLUMNS = ['customer_unique_id', 'order_id', 'order_item_id', 'price', 'order_purchase_timestamp']
+
+def test_rfm_store_batches_match_a_full_recompute(master_df, tmp_path):
+    orders = master_df[RFM_COLUMNS]
+    timestamps = orders['order_purchase_timestamp']
+    first = orders[timestamps < timestamps.quantile(0.6)]
+    held_back = first.sample(frac=0.1, random_state=0)  # loaded late, backdated before the watermark
+    rest = orders.drop(first.index)
+
+    store = RFMStateStore.rebuild(str(tmp_path), first.drop(held_back.index))
+    store.save()
+    # Overlapping, out-of-order batches, each run on a freshly loaded store
+    batches = [rest.iloc[:len(rest) // 2], pd.concat([held_back, rest.iloc[len(rest) // 3:]]), orders.tail(200)]
+    for batch in batches:
+        store = RFMStateStore.load(str(tmp_path))
+        store.assign_segments(store.update(batch))
+        store.save()
+
+    store = RFMStateStore.load(str(tmp_path))
+    expected = calculate_rfm_features(master_df)
+    actual = store._rfm_features(store.customers).loc[expected.index]
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+    assert len(store.items) == len(master_df)
+    assert store.update(orders).empty
+
+def test_rfm_store_assigns_the_segments_of_its_fit(master_df, tmp_path):
+    store = RFMStateStore.rebuild(str(tmp_path), master_df[RFM_COLUMNS])
+    fitted = store.customers['customer_segment'].copy()
+    assigned = store.assign_segments().set_index('customer_unique_id')['customer_segment']
+    assert (assigned.loc[fitted.index].to_numpy() == fitted.to_numpy()).all()
+
+# ========================= PRICE SCENARIOS =========================
+
+def test_slope_and_standard_error_match_statsmodels():
+    rng = np.random.default_rng(4)
+    x = rng.normal(size=(5, 30))
+    y = 2 - 0.8 * x + rng.normal(size=(5, 30))
+
+    slope, se = _ols_slope_and_se(30, x.sum(axis=1), y.sum(axis=1), (x * x).sum(axis=1), (x * y).sum(axis=1),
+                                  (y * y).sum(axis=1))
+
+    fits = [sm.OLS(y[i], sm.add_constant(x[i])).fit() for i in range(5)]
+    np.testing.assert_allclose(slope, [fit.params[1] for fit in fits], rtol=1e-9)
+    np.testing.assert_allclose(se, [fit.bse[1] for fit in fits], rtol=1e-9)
+
+def test_elasticity_matrix_matches_the_pairwise_models(master_df):
+    model = estimate_elasticity_matrix(master_df, min_weeks=15)
+    E = model['elasticity']
+    categories = list(E.index)
+
+    for demand_category in categories:
+        own, _ = calculate_elasticity_and_model(master_df, demand_category)
+        assert E.loc[demand_category, demand_category] == pytest.approx(own, rel=1e-9)
+        for price_category in categories:
+            if price_category != demand_category:
+                cross = calculate_cross_price_elasticity(master_df, demand_category, price_category)
+                assert E.loc[demand_category, price_category] == pytest.approx(cross, rel=1e-7)
+
+def _scenario_model():
+    categories = pd.Index(['a', 'b'])
+    return {
+        'elasticity': pd.DataFrame([[-1.5, 0.4], [0.2, -0.8]], index=categories, columns=categories),
+        'std_error': pd.DataFrame([[0.1, 0.1], [0.1, 0.2]], index=categories, columns=categories),
+        'baseline': pd.DataFrame({'avg_price': [10.0, 20.0], 'weekly_demand': [100.0, 50.0]}, index=categories)
+    }
+
+def test_scenario_without_uncertainty_is_the_log_log_prediction():
+    model = _scenario_model()
+    model['std_error'] *= 0.0
+    summary, total = simulate_price_scenario(model, {'a': 0.1}, n_draws=100, min_cross_t=0.0)
+
+    demand = np.array([100 * 1.1 ** -1.5, 50 * 1.1 ** 0.2])
+    np.testing.assert_allclose(summary['weekly_demand_mean'], demand)
+    np.testing.assert_allclose(summary['weekly_demand_p5'], demand)
+    np.testing.assert_allclose(total, (demand * [11.0, 20.0]).sum())
+
+def test_scenario_draws_follow_the_elasticity_uncertainty():
+    model = _scenario_model()
+    summary, _ = simulate_price_scenario(model, {'a': 0.1, 'b': -0.2}, n_draws=200000, min_cross_t=0.0, random_state=1)
+
+    # log demand change ~ N(E @ log(1 + change), SE^2 @ log(1 + change)^2), so demand is log-normal
+    log_change = np.log1p([0.1, -0.2])
+    mean = model['elasticity'].to_numpy() @ log_change
+    var = (model['std_error'].to_numpy() ** 2) @ (log_change ** 2)
+    expected = model['baseline']['weekly_demand'].to_numpy() * np.exp(mean + var / 2)
+    np.testing.assert_allclose(summary['weekly_demand_mean'], expected, rtol=2e-3)
+
+def test_scenario_drops_weak_cross_effects():
+    summary, _ = simulate_price_scenario(_scenario_model(), {'a': 0.1}, n_draws=10, min_cross_t=3.0)
+    # b's cross elasticity on a's price has t = 2: b's demand does not move
+    assert summary.loc[1, 'weekly_demand_p5'] == summary.loc[1, 'weekly_demand_p95'] == pytest.approx(50.0)
+
+# ========================= STRATIFIED SAMPLES =========================
+
+def test_sample_weights_add_up_to_every_stratum(master_df):
+    sample = build_stratified_sample(master_df, fraction=0.1, min_per_stratum=5)
+    month = master_df['order_purchase_timestamp'].dt.to_period('M')
+    sizes = master_df.groupby([master_df['product_category_name_english'], month]).size().to_numpy()
+
+    np.testing.assert_allclose(sample.groupby('stratum')['sample_weight'].sum().to_numpy(), sizes)
+    assert (sample.groupby('stratum').size().to_numpy() >= np.minimum(sizes, 5)).all()
+
+def test_full_sample_gives_exact_estimates(master_df):
+    sample = build_stratified_sample(master_df, fraction=1.0)
+    kpis = estimate_kpis(sample)
+
+    exact = {'total_revenue': master_df['price'].sum(), 'total_orders': master_df['order_id'].nunique(),
+             'unique_customers': master_df['customer_unique_id'].nunique()}
+    exact['avg_order_value'] = exact['total_revenue'] / exact['total_orders']
+    for name, value in exact.items():
+        assert kpis[name] == pytest.approx((value, value, value), rel=1e-9)
+
+    elasticity, model = calculate_elasticity_and_model(sample, 'cat_2')
+    assert elasticity == pytest.approx(calculate_elasticity_and_model(master_df, 'cat_2')[0], rel=1e-9)
+    assert estimate_elasticity_bounds(sample, model, 'cat_2') == pytest.approx((elasticity, elasticity), abs=1e-9)
+
+def test_estimates_are_unbiased_and_their_bounds_cover(master_df):
+    true_revenue = master_df.groupby('product_category_name_english')['price'].sum()
+    true_elasticity = calculate_elasticity_and_model(master_df)[0]
+
+    revenue, covered, slopes, slope_covered = [], [], [], []
+    for seed in range(200):
+        sample = build_stratified_sample(master_df, fraction=0.2, min_per_stratum=5, random_state=seed)
+        totals = estimate_totals(sample, 'price', by='product_category_name_english').reindex(true_revenue.index)
+        revenue.append(totals['estimate'])
+        covered.append((totals['lower'] <= true_revenue) & (true_revenue <= totals['upper']))
+        elasticity, model = calculate_elasticity_and_model(sample)
+        lower, upper = estimate_elasticity_bounds(sample, model)
+        slopes.append(elasticity)
+        slope_covered.append(lower <= true_elasticity <= upper)
+
+    np.testing.assert_allclose(pd.concat(revenue, axis=1).mean(axis=1), true_revenue, rtol=0.01)
+    assert 0.9 <= pd.concat(covered, axis=1).to_numpy().mean() <= 0.99
+    assert np.mean(slopes) == pytest.approx(true_elasticity, abs=0.01)
+    assert 0.9 <= np.mean(slope_covered) <= 0.99
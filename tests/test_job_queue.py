@@ -0,0 +1,43 @@
+# tests/test_job_queue.py
+
+import threading
+from concurrent.futures import Future
+
+from streamlit_app.components.job_queue import JobQueue
+
+def _double(df, value):
+    return 2 * value
+
+class _ImmediateExecutor:
+    """Runs jobs on submit and returns an already finished future."""
+
+    def submit(self, func, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(func(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+class _ImmediateJobQueue(JobQueue):
+    def _new_executor(self):
+        return _ImmediateExecutor()
+
+def _run_with_timeout(func, timeout=5.0):
+    result = {}
+    thread = threading.Thread(target=lambda: result.setdefault('value', func()), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "JobQueue call did not return (deadlock)"
+    return result['value']
+
+def test_submit_with_already_finished_future_does_not_deadlock():
+    queue = _ImmediateJobQueue(max_workers=1)
+
+    key = _run_with_timeout(lambda: queue.submit(_double, value=21))
+    job = _run_with_timeout(lambda: queue.get(key))
+
+    assert job.state == 'done'
+    assert job.future.result() == 42
+    assert job.finished_at is not None
+    assert _run_with_timeout(lambda: queue.submit(_double, value=21)) == key
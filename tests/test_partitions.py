@@ -0,0 +1,87 @@
+# tests/test_partitions.py
+
+import pandas as pd
+import pytest
+
+from src.analysis.forecasting import aggregate_daily_sales
+from src.data_processing.partitions import IncrementalDataset, write_partitioned_dataset
+
+ROLLUPS = {'daily_sales': aggregate_daily_sales}
+KEYS = ['order_id', 'order_item_id']
+
+def _sorted(df, keys):
+    return df.sort_values(keys).reset_index(drop=True)
+
+def _assert_matches_full_reload(dataset, directory, df):
+    """The refreshed dataset holds the same rows, rollups and versions as a fresh load of the export."""
+    fresh = IncrementalDataset(directory, rollups=ROLLUPS)
+    fresh.refresh()
+
+    expected = df.assign(customer_segment=df['customer_segment'].astype('category'))
+    pd.testing.assert_frame_equal(_sorted(dataset.df, KEYS), _sorted(expected, KEYS), check_categorical=False)
+    pd.testing.assert_frame_equal(_sorted(dataset.df, KEYS), _sorted(fresh.df, KEYS))
+    for rollup in (dataset.rollups['daily_sales'], fresh.rollups['daily_sales']):
+        pd.testing.assert_frame_equal(_sorted(rollup, ['product_category_name_english', 'ds']),
+                                      _sorted(aggregate_daily_sales(df), ['product_category_name_english', 'ds']))
+    assert dataset.version == fresh.version
+    assert dataset.category_versions == fresh.category_versions
+
+@pytest.fixture
+def dataset(master_df, tmp_path):
+    directory = str(tmp_path / 'master_partitions')
+    write_partitioned_dataset(master_df, directory)
+    dataset = IncrementalDataset(directory, rollups=ROLLUPS)
+    dataset.refresh()
+    return dataset
+
+def _months(df):
+    return df['order_purchase_timestamp'].dt.strftime('%Y-%m')
+
+def test_initial_load_matches_the_export(dataset, master_df):
+    _assert_matches_full_reload(dataset, dataset.directory, master_df)
+    assert dataset.refresh() == set()
+
+def test_added_partition(dataset, master_df):
+    last_month = _months(master_df).max()
+    new_month = master_df[_months(master_df) == last_month].head(40).copy()
+    new_month['order_purchase_timestamp'] += pd.DateOffset(months=1)
+    new_month['order_id'] = new_month['order_id'].str.replace('0', 'f', n=1)
+    df = pd.concat([master_df, new_month], ignore_index=True)
+    previous = dict(dataset.category_versions)
+
+    changes = write_partitioned_dataset(df, dataset.directory)
+    affected = dataset.refresh()
+
+    assert changes['added'] == [_months(new_month).iloc[0]] and not changes['changed'] and not changes['removed']
+    assert affected == set(new_month['product_category_name_english'])
+    for category, version in previous.items():
+        assert (dataset.category_versions[category] == version) == (category not in affected)
+    _assert_matches_full_reload(dataset, dataset.directory, df)
+
+def test_changed_partition(dataset, master_df):
+    month = _months(master_df).sort_values().iloc[len(master_df) // 2]
+    changed_rows = (_months(master_df) == month) & (master_df['product_category_name_english'] == 'cat_1')
+    df = master_df.copy()
+    df.loc[changed_rows, 'price'] = (df.loc[changed_rows, 'price'] * 1.1).round(2)
+    previous = dict(dataset.category_versions)
+
+    changes = write_partitioned_dataset(df, dataset.directory)
+    affected = dataset.refresh()
+
+    assert changes['changed'] == [month] and not changes['added'] and not changes['removed']
+    assert affected == {'cat_1'}
+    assert dataset.category_versions['cat_1'] != previous['cat_1']
+    assert all(dataset.category_versions[c] == v for c, v in previous.items() if c != 'cat_1')
+    _assert_matches_full_reload(dataset, dataset.directory, df)
+
+def test_removed_partition(dataset, master_df):
+    first_month = _months(master_df).min()
+    removed = master_df[_months(master_df) == first_month]
+    df = master_df.drop(removed.index).reset_index(drop=True)
+
+    changes = write_partitioned_dataset(df, dataset.directory)
+    affected = dataset.refresh()
+
+    assert changes['removed'] == [first_month] and not changes['added'] and not changes['changed']
+    assert affected == set(removed['product_category_name_english'])
+    _assert_matches_full_reload(dataset, dataset.directory, df)
@@ -0,0 +1,79 @@
+# tests/test_pricing_service.py
+
+import http.client
+import json
+import threading
+
+import pandas as pd
+import pytest
+
+from src.serving.pricing_service import PricingServer
+
+@pytest.fixture
+def server(tmp_path):
+    table = pd.DataFrame([
+        {'level': 'category', 'product_category_name_english': 'toys', 'product_id': '', 'elasticity': -2.0,
+         'intercept': 10.0, 'min_price': 5.0, 'max_price': 50.0, 'recommended_price': 20.0,
+         'predicted_demand': 55.0, 'projected_revenue': 1100.0},
+        {'level': 'product', 'product_category_name_english': 'toys', 'product_id': 'p1', 'elasticity': -0.5,
+         'intercept': 4.0, 'min_price': 5.0, 'max_price': 50.0, 'recommended_price': 50.0,
+         'predicted_demand': 7.7, 'projected_revenue': 386.0}
+    ])
+    table_path = tmp_path / 'price_recommendations.parquet'
+    table.to_parquet(table_path, index=False)
+
+    server = PricingServer(('127.0.0.1', 0), str(table_path), reload_interval=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def _request(server, method, path, payload=None):
+    conn = http.client.HTTPConnection(*server.server_address, timeout=5)
+    body = json.dumps(payload) if payload is not None else None
+    conn.request(method, path, body=body, headers={'Content-Type': 'application/json'})
+    response = conn.getresponse()
+    # json.loads accepts 'Infinity'; a strict parse makes sure the server never sends it
+    data = json.loads(response.read(), parse_constant=lambda name: pytest.fail(f"Invalid JSON constant {name}"))
+    conn.close()
+    return response.status, data
+
+def test_predict(server):
+    status, data = _request(server, 'GET', '/v1/predict?product_id=p1&category=toys&price=10')
+    assert status == 200
+    assert data['product_id'] == 'p1'
+    assert data['projected_revenue'] == pytest.approx(10 * data['predicted_demand'])
+
+def test_predict_overflow_is_a_bad_request(server):
+    # exp(10 + 2 * 690) overflows a float
+    status, data = _request(server, 'GET', '/v1/predict?category=toys&price=1e-300')
+    assert status == 400
+    assert 'finite' in data['error']
+
+def test_batch_overflow_fails_only_that_item(server):
+    status, data = _request(server, 'POST', '/v1/batch', {'items': [
+        {'category': 'toys', 'price': 1e-300},
+        {'category': 'toys', 'price': 10},
+        {'product_id': 'p1'}
+    ]})
+    assert status == 200
+    overflow, prediction, recommendation = data['results']
+    assert 'finite' in overflow['error']
+    assert prediction['price'] == 10
+    assert recommendation['product_id'] == 'p1'
+
+@pytest.mark.parametrize('price', [0, -1, 'abc', 'inf'])
+def test_batch_invalid_price(server, price):
+    status, data = _request(server, 'POST', '/v1/batch', {'items': [{'category': 'toys', 'price': price}]})
+    assert status == 200
+    assert data['results'][0]['error'] == "'price' must be a positive number."
+
+@pytest.mark.parametrize('item', [{'product_id': ['p1']}, {'category': {'name': 'toys'}}, {'product_id': 1}])
+def test_batch_rejects_non_string_keys(server, item):
+    status, data = _request(server, 'POST', '/v1/batch', {'items': [{'category': 'toys'}, item]})
+    assert status == 400
+    assert 'must be strings' in data['error']
+
+def test_batch_rejects_malformed_body(server):
+    status, _ = _request(server, 'POST', '/v1/batch', {'rows': []})
+    assert status == 400